@@ -156,7 +156,9 @@ class GroupDetailsEndpoint(GroupEndpoint, EnvironmentMixin):
                     }
                 )
 
-            get_range = functools.partial(tsdb.get_range, environment_ids=environment_ids)
+            get_range_series = functools.partial(
+                tsdb.get_range_series, environment_ids=environment_ids
+            )
 
             tags = tagstore.get_group_tag_keys(
                 group.project_id, group.id, environment_ids, limit=100
@@ -169,21 +171,18 @@ class GroupDetailsEndpoint(GroupEndpoint, EnvironmentMixin):
                 )
 
             now = timezone.now()
-            hourly_stats = tsdb.rollup(
-                get_range(
-                    model=tsdb.models.group, keys=[group.id], end=now, start=now - timedelta(days=1)
-                ),
-                3600,
-            )[group.id]
-            daily_stats = tsdb.rollup(
-                get_range(
-                    model=tsdb.models.group,
-                    keys=[group.id],
-                    end=now,
-                    start=now - timedelta(days=30),
-                ),
-                3600 * 24,
-            )[group.id]
+
+            def get_stats(start, rollup):
+                series, values = tsdb.rollup_series(
+                    *get_range_series(
+                        model=tsdb.models.group, keys=[group.id], end=now, start=start
+                    ),
+                    rollup,
+                )
+                return [[ts, count] for ts, count in zip(series, values[group.id])]
+
+            hourly_stats = get_stats(now - timedelta(days=1), 3600)
+            daily_stats = get_stats(now - timedelta(days=30), 3600 * 24)
 
             participants = GroupSubscriptionManager.get_participating_users(group)
 
@@ -12,6 +12,7 @@ from snuba_sdk.query import Column, Entity, Function, Query
 from sentry import eventstore, features
 from sentry.api.bases import GroupEndpoint
 from sentry.api.serializers import EventSerializer, serialize
+from sentry.grouping.grouphash_cache import invalidate_grouphash_cache
 from sentry.grouping.variants import ComponentVariant
 from sentry.models import Group, GroupHash
 from sentry.utils import snuba
@@ -133,6 +134,8 @@ def _split_group(group: Group, hash: str, hierarchical_hashes: Optional[Sequence
     grouphash.group_id = group.id
     grouphash.save()
 
+    invalidate_grouphash_cache(group.project_id)
+
 
 def _get_full_hierarchical_hashes(group: Group, hash: str) -> Optional[Sequence[str]]:
     query = (
@@ -203,6 +206,8 @@ def _unsplit_group(group: Group, hash: str, hierarchical_hashes: Optional[Sequen
         if grouphash_to_delete is not None:
             grouphash_to_delete.delete()
 
+    invalidate_grouphash_cache(group.project_id)
+
 
 def _get_group_filters(group: Group):
     return [
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 
 from sentry.api.bases import ProjectEndpoint
 from sentry.api.exceptions import ResourceDoesNotExist
+from sentry.grouping.grouphash_cache import invalidate_grouphash_cache
 from sentry.models import GroupHash, GroupTombstone
 
 
@@ -30,6 +31,7 @@ class GroupTombstoneDetailsEndpoint(ProjectEndpoint):
             # will allow new events to be captured
             group_tombstone_id=None
         )
+        invalidate_grouphash_cache(project.id)
 
         tombstone.delete()
 
@@ -1,7 +1,11 @@
 import logging
+from collections import defaultdict
 
-from django.db.models import F
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections, router
+from django.db.models import F, Model
 
+from sentry.db.models import ScoreClause
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
 from sentry.utils.services import Service
@@ -51,8 +55,185 @@ class Buffer(Service, metaclass=BufferMount):
     def process_pending(self, partition=None):
         return []
 
+    def process_batch(self, items):
+        """
+        Processes many ``(model, columns, filters, extra, signal_only)``
+        increments at once.
+
+        Increments of existing rows that are identified by their primary key
+        are applied with a single ``UPDATE ... FROM (VALUES ...)`` statement per
+        model and set of columns. Several increments of the same row are merged
+        into one. Everything else, including increments of rows that do not
+        exist yet, goes through `process`.
+        """
+        # Increments grouped by the row they update, in their original order.
+        rows = defaultdict(list)
+        for index, item in enumerate(items):
+            row = self._get_row(item) or index
+            rows[row].append((self._get_bulk_update_key(*item), item))
+
+        batches = defaultdict(dict)
+        for row, row_items in rows.items():
+            batch_keys = {batch_key for batch_key, _ in row_items}
+            if None in batch_keys or len(batch_keys) > 1:
+                # Increments that cannot be merged into one are processed one
+                # by one, so that the last `extra` value still wins.
+                for _, item in row_items:
+                    self.process(*item)
+            else:
+                (batch_key,) = batch_keys
+                batches[batch_key][row[1]] = self._merge_items([item for _, item in row_items])
+
+        for (model, columns, extra_columns), batch in batches.items():
+            if len(batch) == 1:
+                self.process(*batch.popitem()[1])
+                continue
+
+            try:
+                updated = self._bulk_update(model, columns, extra_columns, batch)
+            except Exception:
+                # The increments were already removed from the buffer, so
+                # they must not be dropped with the failed statement.
+                self.logger.exception("buffer.bulk-update-failed", extra={"model": model.__name__})
+                updated = set()
+
+            for pk, item in batch.items():
+                if pk not in updated:
+                    self.process(*item)
+                    continue
+
+                model, columns, filters, extra, _ = item
+                buffer_incr_complete.send_robust(
+                    model=model,
+                    columns=columns,
+                    filters=filters,
+                    extra=extra,
+                    created=False,
+                    sender=model,
+                )
+
+    def _get_row(self, item):
+        """
+        Returns ``(model, pk)`` of the row an increment updates, if it is only
+        filtered by its primary key.
+        """
+        model, _, filters, _, _ = item
+        if len(filters) != 1:
+            return None
+
+        meta = model._meta
+        ((name, value),) = filters.items()
+        if name not in ("pk", meta.pk.name, meta.pk.attname):
+            return None
+        try:
+            return model, meta.pk.to_python(value)
+        except ValidationError:
+            return None
+
+    def _merge_items(self, items):
+        """
+        Merges increments of the same row. Counters are summed up and later
+        `extra` values replace earlier ones.
+        """
+        if len(items) == 1:
+            return items[0]
+
+        model, columns, filters, extra, signal_only = items[0]
+        columns = dict(columns)
+        extra = dict(extra or {})
+        for _, more_columns, _, more_extra, _ in items[1:]:
+            for column, value in more_columns.items():
+                columns[column] = columns.get(column, 0) + value
+            extra.update(more_extra or {})
+        return model, columns, filters, extra or None, signal_only
+
+    def _get_bulk_update_key(self, model, columns, filters, extra=None, signal_only=None):
+        if signal_only or not columns or len(filters) != 1:
+            return None
+
+        meta = model._meta
+        try:
+            (name,) = filters
+            if name != "pk" and meta.get_field(name) != meta.pk:
+                return None
+            for column in list(columns) + list(extra or ()):
+                meta.get_field(column)
+        except FieldDoesNotExist:
+            return None
+
+        extra_columns = []
+        for column, value in (extra or {}).items():
+            if column == "score" and self._computes_score(model, columns, extra):
+                # Recomputed by `_bulk_update`
+                continue
+            if isinstance(value, Model) or hasattr(value, "resolve_expression"):
+                return None
+            extra_columns.append(column)
+
+        return model, tuple(sorted(columns)), tuple(sorted(extra_columns))
+
+    def _computes_score(self, model, columns, extra):
+        from sentry.models import Group
+
+        return model is Group and "times_seen" in columns and "last_seen" in (extra or ())
+
+    def _bulk_update(self, model, columns, extra_columns, items):
+        """
+        Applies the increments of ``items`` (a mapping of primary keys to
+        increments) with a single statement and returns the primary keys of
+        all rows which were updated.
+        """
+        from sentry.utils.dates import to_timestamp
+
+        using = router.db_for_write(model)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+        meta = model._meta
+
+        pk_field = meta.pk
+        fields = [meta.get_field(column) for column in columns + extra_columns]
+        compute_score = self._computes_score(model, columns, extra_columns)
+
+        value_columns = [qn(pk_field.column)] + [qn(field.column) for field in fields]
+        value_casts = [pk_field.rel_db_type(connection)] + [
+            field.db_type(connection) for field in fields
+        ]
+        assignments = [
+            f"{qn(field.column)} = t.{qn(field.column)} + v.{qn(field.column)}"
+            for field in fields[: len(columns)]
+        ] + [f"{qn(field.column)} = v.{qn(field.column)}" for field in fields[len(columns) :]]
+
+        if compute_score:
+            # Same as `ScoreClause` with values, based on the previous
+            # times_seen of every row.
+            value_columns.append("score_timestamp")
+            value_casts.append("integer")
+            assignments.append("score = log(t.times_seen + v.times_seen) * 600 + v.score_timestamp")
+
+        params = []
+        for pk, (_, column_values, _, extra, _) in items.items():
+            params.append(pk_field.get_db_prep_value(pk, connection))
+            params.extend(column_values[column] for column in columns)
+            params.extend(
+                field.get_db_prep_save(extra[column], connection)
+                for column, field in zip(extra_columns, fields[len(columns) :])
+            )
+            if compute_score:
+                params.append(int(to_timestamp(extra["last_seen"])))
+
+        row_sql = "(%s)" % ", ".join(f"CAST(%s AS {cast})" for cast in value_casts)
+        sql = (
+            f"UPDATE {qn(meta.db_table)} AS t SET {', '.join(assignments)} "
+            f"FROM (VALUES {', '.join([row_sql] * len(items))}) AS v({', '.join(value_columns)}) "
+            f"WHERE t.{qn(pk_field.column)} = v.{qn(pk_field.column)} "
+            f"RETURNING t.{qn(pk_field.column)}"
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return {row[0] for row in cursor.fetchall()}
+
     def process(self, model, columns, filters, extra=None, signal_only=None):
-        from sentry.event_manager import ScoreClause
         from sentry.models import Group
 
         created = False
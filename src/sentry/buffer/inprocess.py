@@ -1,4 +1,15 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+from celery.signals import worker_process_shutdown
+
 from sentry.buffer import Buffer
+from sentry.utils import metrics
+
+logger = logging.getLogger(__name__)
 
 
 class InProcessBuffer(Buffer):
@@ -11,3 +22,149 @@ class InProcessBuffer(Buffer):
 
     def incr(self, model, columns, filters, extra=None, signal_only=None):
         self.process(model, columns, filters, extra, signal_only)
+
+
+class PendingBuffer:
+    def __init__(self, size):
+        assert size > 0
+        self.buffer = [None] * size
+        self.size = size
+        self.pointer = 0
+
+    def full(self):
+        return self.pointer == self.size
+
+    def empty(self):
+        return self.pointer == 0
+
+    def append(self, item):
+        assert not self.full()
+        self.buffer[self.pointer] = item
+        self.pointer += 1
+
+    def clear(self):
+        self.pointer = 0
+
+    def flush(self):
+        rv = self.buffer[: self.pointer]
+        self.clear()
+        return rv
+
+
+class CoalescingBuffer:
+    """
+    Collects increments within the current process and passes them on to
+    ``flush_func`` merged per key (as returned by ``key_func``): counters are
+    summed up, extra values are last write wins and ``signal_only`` is set if
+    it was set by any increment.
+
+    Increments are flushed every ``window`` seconds from a background thread,
+    or as soon as ``max_ops`` increments are pending. Merged increments that
+    fail to flush are queued again for the next flush, as far as there is room
+    for them.
+
+    Pending increments are also flushed when the interpreter exits and when a
+    Celery worker process shuts down, which does not run ``atexit`` handlers.
+    Increments of a process that is killed (e.g. by the OOM killer) before
+    the next flush are lost.
+    """
+
+    def __init__(self, flush_func, key_func, window=1.0, max_ops=1000):
+        self.flush_func = flush_func
+        self.key_func = key_func
+        self.window = window
+        self.pending = PendingBuffer(max_ops)
+        self.lock = threading.Lock()
+        self._flusher_pid = None
+
+    def incr(self, model, columns, filters, extra=None, signal_only=None):
+        self._ensure_flusher()
+
+        with self.lock:
+            self.pending.append((model, columns, filters, extra, signal_only))
+            if not self.pending.full():
+                return
+            ops = self.pending.flush()
+
+        self._flush(ops)
+
+    def flush(self):
+        with self.lock:
+            ops = self.pending.flush()
+
+        self._flush(ops)
+
+    def _flush(self, ops):
+        if not ops:
+            return
+
+        merged = {}
+        for model, columns, filters, extra, signal_only in ops:
+            key = self.key_func(model, filters)
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = [model, dict(columns), filters, dict(extra or ()), signal_only]
+                continue
+
+            for column, amount in columns.items():
+                entry[1][column] = entry[1].get(column, 0) + amount
+            if extra:
+                entry[3].update(extra)
+            if signal_only is True:
+                entry[4] = True
+
+        metrics.incr("buffer.coalesced", amount=len(ops) - len(merged), skip_internal=True)
+
+        failed = []
+        for model, columns, filters, extra, signal_only in merged.values():
+            try:
+                self.flush_func(model, columns, filters, extra or None, signal_only)
+            except Exception:
+                logger.exception("buffer.coalesced-flush-failed", extra={"model": model.__name__})
+                failed.append((model, columns, filters, extra or None, signal_only))
+
+        if failed:
+            self._requeue(failed)
+
+    def _requeue(self, ops):
+        with self.lock:
+            requeued = 0
+            for op in ops:
+                # Keep one slot free: the increment that fills the buffer is
+                # the one that flushes it.
+                if self.pending.pointer >= self.pending.size - 1:
+                    break
+                self.pending.append(op)
+                requeued += 1
+
+        metrics.incr("buffer.coalesced-requeued", amount=requeued, skip_internal=True)
+        if requeued < len(ops):
+            metrics.incr("buffer.coalesced-dropped", amount=len(ops) - requeued, skip_internal=True)
+            logger.error("buffer.coalesced-dropped", extra={"count": len(ops) - requeued})
+
+    def _ensure_flusher(self):
+        # Each process needs its own flusher thread. Increments inherited
+        # from a parent process are flushed by the parent.
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+
+        with self.lock:
+            if self._flusher_pid == pid:
+                return
+
+            if self._flusher_pid is None:
+                atexit.register(self.flush)
+                worker_process_shutdown.connect(self._flush_on_shutdown, weak=False)
+            self.pending.clear()
+            self._flusher_pid = pid
+
+        threading.Thread(target=self._run_flusher, name="buffer-flusher", daemon=True).start()
+
+    def _flush_on_shutdown(self, **kwargs):
+        self.flush()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.window)
+            self.flush()
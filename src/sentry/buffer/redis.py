@@ -1,5 +1,6 @@
 import pickle
 import threading
+from collections import defaultdict
 from datetime import datetime
 from time import time
 
@@ -8,56 +9,53 @@ from django.utils import timezone
 from django.utils.encoding import force_bytes, force_text
 
 from sentry.buffer import Buffer
+from sentry.buffer.inprocess import CoalescingBuffer, PendingBuffer
+from sentry.db.models import ScoreClause
 from sentry.exceptions import InvalidConfiguration
 from sentry.tasks.process_buffer import process_incr, process_pending
 from sentry.utils import json, metrics
 from sentry.utils.compat import crc32
 from sentry.utils.hashlib import md5_text
 from sentry.utils.imports import import_string
-from sentry.utils.redis import get_cluster_from_options
+from sentry.utils.redis import get_cluster_from_options, load_script
+
+incr_script = load_script("buffer/incr.lua")
+process_script = load_script("buffer/process.lua")
 
 _local_buffers = None
 _local_buffers_lock = threading.Lock()
 
 
-class PendingBuffer:
-    def __init__(self, size):
-        assert size > 0
-        self.buffer = [None] * size
-        self.size = size
-        self.pointer = 0
-
-    def full(self):
-        return self.pointer == self.size
-
-    def empty(self):
-        return self.pointer == 0
-
-    def append(self, item):
-        assert not self.full()
-        self.buffer[self.pointer] = item
-        self.pointer += 1
-
-    def clear(self):
-        self.pointer = 0
-
-    def flush(self):
-        rv = self.buffer[: self.pointer]
-        self.clear()
-        return rv
-
-
 class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(
+        self,
+        pending_partitions=1,
+        incr_batch_size=2,
+        coalesce_window=None,
+        coalesce_max_ops=1000,
+        **options,
+    ):
+        """
+        :param coalesce_window: If set, increments are merged within the
+            process for this many seconds (or until ``coalesce_max_ops``
+            increments are pending) before they are written to Redis.
+        """
         self.cluster, options = get_cluster_from_options("SENTRY_BUFFER_OPTIONS", options)
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
 
+        if coalesce_window:
+            self.coalescer = CoalescingBuffer(
+                self._incr, self._make_key, window=coalesce_window, max_ops=coalesce_max_ops
+            )
+        else:
+            self.coalescer = None
+
     def validate(self):
         try:
             with self.cluster.all() as client:
@@ -115,14 +113,35 @@ class RedisBuffer(Buffer):
         elif isinstance(value, datetime):
             type_ = "d"
             value = value.strftime("%s.%f")
+        elif isinstance(value, bool):
+            type_ = "b"
+            value = int(value)
         elif isinstance(value, int):
             type_ = "i"
         elif isinstance(value, float):
             type_ = "f"
+        elif value is None or isinstance(value, (dict, list)):
+            type_ = "j"
+            value = json.dumps(value)
+        elif isinstance(value, ScoreClause):
+            # The score is always computed in the database when processing
+            # the buffer, the clause does not carry any state that is needed.
+            type_ = "c"
+            value = ""
         else:
             raise TypeError(type(value))
         return (type_, str(value))
 
+    def _dump_payload(self, value, dump):
+        """
+        Serializes filters or an extra value to JSON. Values which cannot be
+        represented in JSON (such as model instances) are pickled instead.
+        """
+        try:
+            return json.dumps(dump(value))
+        except TypeError:
+            return pickle.dumps(value)
+
     def _load_values(self, payload):
         result = {}
         for k, (t, v) in payload.items():
@@ -139,6 +158,12 @@ class RedisBuffer(Buffer):
             return int(value)
         elif type_ == "f":
             return float(value)
+        elif type_ == "b":
+            return bool(int(value))
+        elif type_ == "j":
+            return json.loads(value)
+        elif type_ == "c":
+            return ScoreClause()
         else:
             raise TypeError(f"invalid type: {type_}")
 
@@ -151,47 +176,47 @@ class RedisBuffer(Buffer):
             - Perform a set (last write wins) on extra
             - Perform a set on signal_only (only if True)
         - Add hashmap key to pending flushes
+
+        All of this happens atomically in a single script call. If coalescing
+        is enabled, increments are merged in memory first.
         """
+        if self.coalescer is not None:
+            self.coalescer.incr(model, columns, filters, extra, signal_only)
+        else:
+            self._incr(model, columns, filters, extra, signal_only)
 
-        # TODO(dcramer): longer term we'd rather not have to serialize values
-        # here (unless it's to JSON)
+        metrics.incr(
+            "buffer.incr",
+            skip_internal=True,
+            tags={"module": model.__module__, "model": model.__name__},
+        )
+
+    def _incr(self, model, columns, filters, extra=None, signal_only=None):
         key = self._make_key(model, filters)
         pending_key = self._make_pending_key_from_key(key)
         # We can't use conn.map() due to wanting to support multiple pending
         # keys (one per Redis partition)
         conn = self.cluster.get_local_client_for_key(key)
 
-        pipe = conn.pipeline()
-        pipe.hsetnx(key, "m", f"{model.__module__}.{model.__name__}")
-        # TODO(dcramer): once this goes live in production, we can kill the pickle path
-        # (this is to ensure a zero downtime deploy where we can transition event processing)
-        pipe.hsetnx(key, "f", pickle.dumps(filters))
-        # pipe.hsetnx(key, 'f', json.dumps(self._dump_values(filters)))
+        args = [
+            f"{model.__module__}.{model.__name__}",
+            self._dump_payload(filters, self._dump_values),
+            self.key_expire,
+            time(),
+            "1" if signal_only is True else "",
+            len(columns),
+        ]
         for column, amount in columns.items():
-            pipe.hincrby(key, "i+" + column, amount)
+            args.extend((column, amount))
 
         if extra:
             # Group tries to serialize 'score', so we'd need some kind of processing
             # hook here
             # e.g. "update score if last_seen or times_seen is changed"
             for column, value in extra.items():
-                # TODO(dcramer): once this goes live in production, we can kill the pickle path
-                # (this is to ensure a zero downtime deploy where we can transition event processing)
-                pipe.hset(key, "e+" + column, pickle.dumps(value))
-                # pipe.hset(key, 'e+' + column, json.dumps(self._dump_value(value)))
-
-        if signal_only is True:
-            pipe.hset(key, "s", "1")
+                args.extend((column, self._dump_payload(value, self._dump_value)))
 
-        pipe.expire(key, self.key_expire)
-        pipe.zadd(pending_key, {key: time()})
-        pipe.execute()
-
-        metrics.incr(
-            "buffer.incr",
-            skip_internal=True,
-            tags={"module": model.__module__, "model": model.__name__},
-        )
+        incr_script(conn, [key, pending_key], args)
 
     def process_pending(self, partition=None):
         if partition is None and self.pending_partitions > 1:
@@ -243,65 +268,73 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
-        for key in batch_keys:
-            self._process_single_incr(key)
+        items = []
+        for key, values in self._pop_values(batch_keys):
+            item = self._load_incr(key, values)
+            if item is not None:
+                items.append(item)
 
-    def _process_single_incr(self, key):
-        client = self.cluster.get_routing_client()
-        lock_key = self._make_lock_key(key)
-        # prevent a stampede due to the way we use celery etas + duplicate
-        # tasks
-        if not client.set(lock_key, "1", nx=True, ex=10):
-            metrics.incr("buffer.revoked", tags={"reason": "locked"}, skip_internal=False)
-            self.logger.debug("buffer.revoked.locked", extra={"redis_key": key})
-            return
+        super().process_batch(items)
 
-        pending_key = self._make_pending_key_from_key(key)
+    def _pop_values(self, keys):
+        """
+        Reads and deletes the hashes of ``keys``, with one pipeline per Redis
+        host. Yields ``(key, values)`` pairs.
+        """
+        router = self.cluster.get_router()
+        keys_by_host = defaultdict(list)
+        for key in keys:
+            keys_by_host[router.get_host_for_key(key)].append(key)
+
+        for host, host_keys in keys_by_host.items():
+            with self.cluster.get_local_client(host).pipeline(transaction=False) as pipe:
+                for key in host_keys:
+                    # Reading and deleting the hash happens atomically, so
+                    # there is no need to lock the key against duplicate tasks.
+                    process_script(pipe, [key, self._make_pending_key_from_key(key)], [])
+                results = pipe.execute()
+
+            for key, values in zip(host_keys, results):
+                values = iter(values)
+                # XXX(python3): In python2 this isn't as important since redis will
+                # return string tyes (be it, byte strings), but in py3 we get bytes
+                # back, and really we just want to deal with keys as strings.
+                yield key, {force_text(k): v for k, v in zip(values, values)}
+
+    def _load_incr(self, key, values):
+        """
+        Turns the contents of a buffer hash back into the arguments of
+        `incr`. Returns `None` if the hash was empty.
+        """
+        if not values:
+            metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+            self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+            return None
+
+        # XXX(py3): Note that ``import_string`` explicitly wants a str in
+        # python2, so we'll decode (for python3) and then translate back to
+        # a byte string (in python2) for import_string.
+        model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
+
+        if values["f"].startswith(b"{"):
+            filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
+        else:
+            # Filters which cannot be represented in JSON, or legacy pickle payloads
+            filters = pickle.loads(values.pop("f"))
 
-        try:
-            conn = self.cluster.get_local_client_for_key(key)
-            pipe = conn.pipeline()
-            pipe.hgetall(key)
-            pipe.zrem(pending_key, key)
-            pipe.delete(key)
-            values = pipe.execute()[0]
-
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_text(k): v for k, v in values.items()}
-
-            if not values:
-                metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
-                self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
-                return
-
-            # XXX(py3): Note that ``import_string`` explicitly wants a str in
-            # python2, so we'll decode (for python3) and then translate back to
-            # a byte string (in python2) for import_string.
-            model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
-
-            if values["f"].startswith(b"{"):
-                filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(values.pop("f"))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"["):
-                        extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(v)
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
-            super().process(model, incr_values, filters, extra_values, signal_only)
-        finally:
-            client.delete(lock_key)
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                if v.startswith(b"["):
+                    extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
+                else:
+                    # Values which cannot be represented in JSON, or legacy pickle payloads
+                    extra_values[k[2:]] = pickle.loads(v)
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
@@ -2385,6 +2385,10 @@ SENTRY_REPROCESSING_SYNC_REDIS_CLUSTER = "default"
 # How long can reprocessing take before we start deleting its Redis keys?
 SENTRY_REPROCESSING_SYNC_TTL = 3600 * 24
 
+# Which cluster is used as the shared tier of the cache that resolves GroupHash
+# rows while saving events. See `sentry.grouping.grouphash_cache`.
+SENTRY_GROUPHASH_CACHE_REDIS_CLUSTER = "default"
+
 # How many events to query for at once while paginating through an entire
 # issue. Note that this needs to be kept in sync with the time-limits on
 # `sentry.tasks.reprocessing2.reprocess_group`. That task is responsible for
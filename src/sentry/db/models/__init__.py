@@ -1,4 +1,5 @@
 from .base import *  # NOQA
+from .expressions import *  # NOQA
 from .fields import *  # NOQA
 from .manager import *  # NOQA
 from .paranoia import *  # NOQA
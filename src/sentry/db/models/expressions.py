@@ -0,0 +1,33 @@
+from django.db.models import Func
+
+from sentry.utils.dates import to_timestamp
+
+__all__ = ("ScoreClause",)
+
+
+class ScoreClause(Func):
+    def __init__(self, group=None, last_seen=None, times_seen=None, *args, **kwargs):
+        self.group = group
+        self.last_seen = last_seen
+        self.times_seen = times_seen
+        # times_seen is likely an F-object that needs the value extracted
+        if hasattr(self.times_seen, "rhs"):
+            self.times_seen = self.times_seen.rhs.value
+        super().__init__(*args, **kwargs)
+
+    def __int__(self):
+        # Calculate the score manually when coercing to an int.
+        # This is used within create_or_update and friends
+        return self.group.get_score() if self.group else 0
+
+    def as_sql(self, compiler, connection, function=None, template=None):
+        has_values = self.last_seen is not None and self.times_seen is not None
+        if has_values:
+            sql = "log(times_seen + %d) * 600 + %d" % (
+                self.times_seen,
+                to_timestamp(self.last_seen),
+            )
+        else:
+            sql = "log(times_seen) * 600 + last_seen::abstime::int"
+
+        return (sql, [])
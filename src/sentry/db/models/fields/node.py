@@ -137,11 +137,31 @@ class NodeData(MutableMapping):
             currently only {"unprocessed": {...}} is added for reprocessing.
             See documentation of nodestore.
         """
+        subkeys = self._get_subkeys_to_save(subkeys)
+        if subkeys is not None:
+            nodestore.set_subkeys(self.id, subkeys)
 
+    @classmethod
+    def save_multi(cls, items):
+        """
+        Write the data of multiple nodes back to nodestore at once.
+
+        :param items: A list of ``(node_data, subkeys)`` tuples, see `save`.
+        """
+        to_write = {}
+        for node_data, subkeys in items:
+            subkeys = node_data._get_subkeys_to_save(subkeys)
+            if subkeys is not None:
+                to_write[node_data.id] = subkeys
+
+        if to_write:
+            nodestore.set_subkeys_multi(to_write)
+
+    def _get_subkeys_to_save(self, subkeys):
         # We never loaded any data for reading or writing, so there
         # is nothing to save.
         if self._node_data is None:
-            return
+            return None
 
         # We can't put our wrappers into the nodestore, so we need to
         # ensure that the data is converted into a plain old dict
@@ -151,8 +171,7 @@ class NodeData(MutableMapping):
 
         subkeys = subkeys or {}
         subkeys[None] = to_write
-
-        nodestore.set_subkeys(self.id, subkeys)
+        return subkeys
 
 
 class NodeField(GzippedDictField):
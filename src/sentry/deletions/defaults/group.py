@@ -119,10 +119,13 @@ class GroupDeletionTask(ModelDeletionTask):
 
     def delete_instance(self, instance):
         from sentry import similarity
+        from sentry.grouping.grouphash_cache import invalidate_grouphash_cache
 
         if not self.skip_models or similarity not in self.skip_models:
             similarity.delete(None, instance)
 
+        invalidate_grouphash_cache(instance.project_id)
+
         return super().delete_instance(instance)
 
     def mark_deletion_in_progress(self, instance_list):
@@ -3,14 +3,15 @@ import ipaddress
 import logging
 import random
 import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 from io import BytesIO
+from itertools import chain
 
 import sentry_sdk
 from django.conf import settings
 from django.core.cache import cache
 from django.db import IntegrityError, OperationalError, connection, router, transaction
-from django.db.models import Func
 from django.utils.encoding import force_text
 from pytz import UTC
 
@@ -33,6 +34,7 @@ from sentry.constants import (
     DataCategory,
 )
 from sentry.culprit import generate_culprit
+from sentry.db.models import NodeData, ScoreClause
 from sentry.eventstore.processing import event_processing_store
 from sentry.grouping.api import (
     BackgroundGroupingConfigLoader,
@@ -45,6 +47,7 @@ from sentry.grouping.api import (
     get_grouping_config_dict_for_project,
     load_grouping_config,
 )
+from sentry.grouping.grouphash_cache import get_grouphashes, invalidate_grouphash_cache
 from sentry.grouping.result import CalculatedHashes
 from sentry.ingest.inbound_filters import FilterStatKeys
 from sentry.killswitches import killswitch_matches_context
@@ -84,7 +87,7 @@ from sentry.types.activity import ActivityType
 from sentry.utils import json, metrics
 from sentry.utils.cache import cache_key_for_event
 from sentry.utils.canonical import CanonicalKeyDict
-from sentry.utils.dates import to_datetime, to_timestamp
+from sentry.utils.dates import to_datetime
 from sentry.utils.outcomes import Outcome, track_outcome
 from sentry.utils.safe import get_path, safe_execute, setdefault_path, trim
 
@@ -178,34 +181,6 @@ class HashDiscarded(Exception):
     pass
 
 
-class ScoreClause(Func):
-    def __init__(self, group=None, last_seen=None, times_seen=None, *args, **kwargs):
-        self.group = group
-        self.last_seen = last_seen
-        self.times_seen = times_seen
-        # times_seen is likely an F-object that needs the value extracted
-        if hasattr(self.times_seen, "rhs"):
-            self.times_seen = self.times_seen.rhs.value
-        super().__init__(*args, **kwargs)
-
-    def __int__(self):
-        # Calculate the score manually when coercing to an int.
-        # This is used within create_or_update and friends
-        return self.group.get_score() if self.group else 0
-
-    def as_sql(self, compiler, connection, function=None, template=None):
-        has_values = self.last_seen is not None and self.times_seen is not None
-        if has_values:
-            sql = "log(times_seen + %d) * 600 + %d" % (
-                self.times_seen,
-                to_timestamp(self.last_seen),
-            )
-        else:
-            sql = "log(times_seen) * 600 + last_seen::abstime::int"
-
-        return (sql, [])
-
-
 class EventManager:
     """
     Handles normalization in both the store endpoint and the save task. The
@@ -336,229 +311,17 @@ class EventManager:
 
             return jobs[0]["event"]
 
-        with metrics.timer("event_manager.save.organization.get_from_cache"):
-            project.set_cached_field_value(
-                "organization", Organization.objects.get_from_cache(id=project.organization_id)
-            )
-
-        job = {"data": self._data, "project_id": project_id, "raw": raw, "start_time": start_time}
-        jobs = [job]
-
-        is_reprocessed = is_reprocessed_event(job["data"])
-
-        with sentry_sdk.start_span(op="event_manager.save.pull_out_data"):
-            _pull_out_data(jobs, projects)
-
-        with sentry_sdk.start_span(op="event_manager.save.get_or_create_release_many"):
-            _get_or_create_release_many(jobs, projects)
-
-        with sentry_sdk.start_span(op="event_manager.save.get_event_user_many"):
-            _get_event_user_many(jobs, projects)
-
-        job["project_key"] = None
-        if job["key_id"] is not None:
-            with metrics.timer("event_manager.load_project_key"):
-                try:
-                    job["project_key"] = ProjectKey.objects.get_from_cache(id=job["key_id"])
-                except ProjectKey.DoesNotExist:
-                    pass
-
-        _derive_plugin_tags_many(jobs, projects)
-        _derive_interface_tags_many(jobs)
-
-        do_background_grouping_before = options.get("store.background-grouping-before")
-        if do_background_grouping_before:
-            _run_background_grouping(project, job)
-
-        secondary_hashes = None
-
-        try:
-            secondary_grouping_config = project.get_option("sentry:secondary_grouping_config")
-            secondary_grouping_expiry = project.get_option("sentry:secondary_grouping_expiry")
-            if secondary_grouping_config and (secondary_grouping_expiry or 0) >= time.time():
-                with metrics.timer("event_manager.secondary_grouping"):
-                    secondary_event = copy.deepcopy(job["event"])
-                    loader = SecondaryGroupingConfigLoader()
-                    secondary_grouping_config = loader.get_config_dict(project)
-                    secondary_hashes = _calculate_event_grouping(
-                        project, secondary_event, secondary_grouping_config
-                    )
-        except Exception:
-            sentry_sdk.capture_exception()
-
-        with metrics.timer("event_manager.load_grouping_config"):
-            # At this point we want to normalize the in_app values in case the
-            # clients did not set this appropriately so far.
-            grouping_config = get_grouping_config_dict_for_event_data(
-                job["event"].data.data, project
-            )
-
-        with sentry_sdk.start_span(op="event_manager.save.calculate_event_grouping"), metrics.timer(
-            "event_manager.calculate_event_grouping"
-        ):
-            hashes = _calculate_event_grouping(project, job["event"], grouping_config)
-
-        hashes = CalculatedHashes(
-            hashes=hashes.hashes + (secondary_hashes and secondary_hashes.hashes or []),
-            hierarchical_hashes=hashes.hierarchical_hashes,
-            tree_labels=hashes.tree_labels,
-        )
-
-        if not do_background_grouping_before:
-            _run_background_grouping(project, job)
-
-        if hashes.tree_labels:
-            job["finest_tree_label"] = hashes.finest_tree_label
-
-        _materialize_metadata_many(jobs)
-
-        kwargs = {
-            "platform": job["platform"],
-            "message": job["event"].search_message,
-            "culprit": job["culprit"],
-            "logger": job["logger_name"],
-            "level": LOG_LEVELS_MAP.get(job["level"]),
-            "last_seen": job["event"].datetime,
-            "first_seen": job["event"].datetime,
-            "active_at": job["event"].datetime,
+        job = {
+            "data": self._data,
+            "project_id": project_id,
+            "raw": raw,
+            "start_time": start_time,
+            "cache_key": cache_key,
         }
+        save_error_events([job], projects)
 
-        if job["release"]:
-            kwargs["first_release"] = job["release"]
-
-        # Load attachments first, but persist them at the very last after
-        # posting to eventstream to make sure all counters and eventstream are
-        # incremented for sure. Also wait for grouping to remove attachments
-        # based on the group counter.
-        with metrics.timer("event_manager.get_attachments"):
-            with sentry_sdk.start_span(op="event_manager.save.get_attachments"):
-                attachments = get_attachments(cache_key, job)
-
-        try:
-            with sentry_sdk.start_span(op="event_manager.save.save_aggregate_fn"):
-                job["group"], job["is_new"], job["is_regression"] = _save_aggregate(
-                    event=job["event"],
-                    hashes=hashes,
-                    release=job["release"],
-                    metadata=dict(job["event_metadata"]),
-                    received_timestamp=job["received_timestamp"],
-                    **kwargs,
-                )
-        except HashDiscarded:
-            discard_event(job, attachments)
-            raise
-
-        job["event"].group = job["group"]
-
-        # store a reference to the group id to guarantee validation of isolation
-        # XXX(markus): No clue what this does
-        job["event"].data.bind_ref(job["event"])
-
-        _get_or_create_environment_many(jobs, projects)
-
-        if job["group"]:
-            group_environment, job["is_new_group_environment"] = GroupEnvironment.get_or_create(
-                group_id=job["group"].id,
-                environment_id=job["environment"].id,
-                defaults={"first_release": job["release"] or None},
-            )
-        else:
-            job["is_new_group_environment"] = False
-
-        _get_or_create_release_associated_models(jobs, projects)
-
-        if job["release"] and job["group"]:
-            job["grouprelease"] = GroupRelease.get_or_create(
-                group=job["group"],
-                release=job["release"],
-                environment=job["environment"],
-                datetime=job["event"].datetime,
-            )
-
-        _tsdb_record_all_metrics(jobs)
-
-        if job["group"]:
-            UserReport.objects.filter(project_id=project.id, event_id=job["event"].event_id).update(
-                group_id=job["group"].id, environment_id=job["environment"].id
-            )
-
-        with metrics.timer("event_manager.filter_attachments_for_group"):
-            attachments = filter_attachments_for_group(attachments, job)
-
-        # XXX: DO NOT MUTATE THE EVENT PAYLOAD AFTER THIS POINT
-        _materialize_event_metrics(jobs)
-
-        for attachment in attachments:
-            key = f"bytes.stored.{attachment.type}"
-            old_bytes = job["event_metrics"].get(key) or 0
-            job["event_metrics"][key] = old_bytes + attachment.size
-
-        _nodestore_save_many(jobs)
-        save_unprocessed_event(project, job["event"].event_id)
-
-        if job["release"]:
-            if job["is_new"]:
-                buffer.incr(
-                    ReleaseProject,
-                    {"new_groups": 1},
-                    {"release_id": job["release"].id, "project_id": project.id},
-                )
-            if job["is_new_group_environment"]:
-                buffer.incr(
-                    ReleaseProjectEnvironment,
-                    {"new_issues_count": 1},
-                    {
-                        "project_id": project.id,
-                        "release_id": job["release"].id,
-                        "environment_id": job["environment"].id,
-                    },
-                )
-        if not raw:
-            if not project.first_event:
-                project.update(first_event=job["event"].datetime)
-                first_event_received.send_robust(
-                    project=project, event=job["event"], sender=Project
-                )
-
-        if is_reprocessed:
-            safe_execute(
-                reprocessing2.buffered_delete_old_primary_hash,
-                project_id=job["event"].project_id,
-                group_id=reprocessing2.get_original_group_id(job["event"]),
-                event_id=job["event"].event_id,
-                datetime=job["event"].datetime,
-                old_primary_hash=reprocessing2.get_original_primary_hash(job["event"]),
-                current_primary_hash=job["event"].get_primary_hash(),
-                _with_transaction=False,
-            )
-
-        _eventstream_insert_many(jobs)
-
-        # Do this last to ensure signals get emitted even if connection to the
-        # file store breaks temporarily.
-        #
-        # We do not need this for reprocessed events as for those we update the
-        # group_id on existing models in post_process_group, which already does
-        # this because of indiv. attachments.
-        if not is_reprocessed:
-            with metrics.timer("event_manager.save_attachments"):
-                save_attachments(cache_key, attachments, job)
-
-        metric_tags = {"from_relay": "_relay_processed" in job["data"]}
-
-        metrics.timing(
-            "events.latency",
-            job["received_timestamp"] - job["recorded_timestamp"],
-            tags=metric_tags,
-        )
-        metrics.timing("events.size.data.post_save", job["event"].size, tags=metric_tags)
-        metrics.incr(
-            "events.post_save.normalize.errors",
-            amount=len(job["data"].get("errors") or ()),
-            tags=metric_tags,
-        )
-
-        _track_outcome_accepted_many(jobs)
+        if "hash_discarded" in job:
+            raise job["hash_discarded"]
 
         self._data = job["event"].data.data
 
@@ -785,29 +548,41 @@ def _tsdb_record_all_metrics(jobs):
     """
     Do all tsdb-related things for save_event in here s.t. we can potentially
     put everything in a single redis pipeline someday.
+
+    Writes are merged across the jobs of a batch: counters are incremented
+    with one call per environment (the event timestamp travels with each
+    item), distinct counters and frequencies with one call per environment
+    and timestamp.
     """
 
     # XXX: validate whether anybody actually uses those metrics
 
-    for job in jobs:
-        incrs = []
-        frequencies = []
-        records = []
+    # environment_id -> [(model, key, options)]
+    incrs = defaultdict(list)
+    # (environment_id, timestamp) -> [(model, key, values)]
+    records = defaultdict(list)
+    # timestamp -> [(model, request)]
+    frequencies = defaultdict(list)
 
-        incrs.append((tsdb.models.project, job["project_id"]))
+    for job in jobs:
         event = job["event"]
         group = job["group"]
         release = job["release"]
         environment = job["environment"]
+        timestamp = event.datetime
+
+        incr_options = {"timestamp": timestamp}
+        environment_incrs = incrs[environment.id]
+        environment_incrs.append((tsdb.models.project, job["project_id"], incr_options))
 
         if group:
-            incrs.append((tsdb.models.group, group.id))
-            frequencies.append(
+            environment_incrs.append((tsdb.models.group, group.id, incr_options))
+            frequencies[timestamp].append(
                 (tsdb.models.frequent_environments_by_group, {group.id: {environment.id: 1}})
             )
 
             if release:
-                frequencies.append(
+                frequencies[timestamp].append(
                     (
                         tsdb.models.frequent_releases_by_group,
                         {group.id: {job["grouprelease"].id: 1}},
@@ -815,30 +590,36 @@ def _tsdb_record_all_metrics(jobs):
                 )
 
         if release:
-            incrs.append((tsdb.models.release, release.id))
+            environment_incrs.append((tsdb.models.release, release.id, incr_options))
 
         user = job["user"]
 
         if user:
             project_id = job["project_id"]
-            records.append((tsdb.models.users_affected_by_project, project_id, (user.tag_value,)))
+            environment_records = records[(environment.id, timestamp)]
+            environment_records.append(
+                (tsdb.models.users_affected_by_project, project_id, (user.tag_value,))
+            )
 
             if group:
-                records.append((tsdb.models.users_affected_by_group, group.id, (user.tag_value,)))
+                environment_records.append(
+                    (tsdb.models.users_affected_by_group, group.id, (user.tag_value,))
+                )
 
-        if incrs:
-            tsdb.incr_multi(incrs, timestamp=event.datetime, environment_id=environment.id)
+    for environment_id, items in incrs.items():
+        tsdb.incr_multi(items, environment_id=environment_id)
 
-        if records:
-            tsdb.record_multi(records, timestamp=event.datetime, environment_id=environment.id)
+    for (environment_id, timestamp), items in records.items():
+        tsdb.record_multi(items, timestamp=timestamp, environment_id=environment_id)
 
-        if frequencies:
-            tsdb.record_frequency_multi(frequencies, timestamp=event.datetime)
+    for timestamp, requests in frequencies.items():
+        tsdb.record_frequency_multi(requests, timestamp=timestamp)
 
 
 @metrics.wraps("save_event.nodestore_save_many")
 def _nodestore_save_many(jobs):
     inserted_time = datetime.utcnow().replace(tzinfo=UTC).timestamp()
+    to_save = []
     for job in jobs:
         # Write the event to Nodestore
         subkeys = {}
@@ -853,7 +634,9 @@ def _nodestore_save_many(jobs):
                 subkeys["unprocessed"] = data
 
         job["event"].data["nodestore_insert"] = inserted_time
-        job["event"].data.save(subkeys=subkeys)
+        to_save.append((job["event"].data, subkeys))
+
+    NodeData.save_multi(to_save)
 
 
 @metrics.wraps("save_event.eventstream_insert_many")
@@ -1001,11 +784,25 @@ def get_culprit(data):
     )
 
 
-def _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwargs):
+def _save_aggregate(
+    event,
+    hashes,
+    release,
+    metadata,
+    received_timestamp,
+    prefetched_grouphashes=None,
+    prefetched_groups=None,
+    **kwargs,
+):
     project = event.project
 
+    if prefetched_grouphashes is None:
+        prefetched_grouphashes = {}
+
     flat_grouphashes = [
-        GroupHash.objects.get_or_create(project=project, hash=hash)[0] for hash in hashes.hashes
+        prefetched_grouphashes.get(hash)
+        or GroupHash.objects.get_or_create(project=project, hash=hash)[0]
+        for hash in hashes.hashes
     ]
 
     # The root_hierarchical_hash is the least specific hash within the tree, so
@@ -1015,13 +812,17 @@ def _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwar
     # when groups are created and also relieves contention by locking a more
     # specific hash than `hierarchical_hashes[0]`.
     existing_grouphash, root_hierarchical_hash = _find_existing_grouphash(
-        project, flat_grouphashes, hashes.hierarchical_hashes
+        project,
+        flat_grouphashes,
+        hashes.hierarchical_hashes,
+        prefetched_grouphashes=prefetched_grouphashes,
     )
 
     if root_hierarchical_hash is not None:
-        root_hierarchical_grouphash = GroupHash.objects.get_or_create(
-            project=project, hash=root_hierarchical_hash
-        )[0]
+        root_hierarchical_grouphash = (
+            prefetched_grouphashes.get(root_hierarchical_hash)
+            or GroupHash.objects.get_or_create(project=project, hash=root_hierarchical_hash)[0]
+        )
 
         metadata.update(
             hashes.group_metadata_from_hash(
@@ -1135,7 +936,9 @@ def _save_aggregate(event, hashes, release, metadata, received_timestamp, **kwar
 
                 return group, is_new, is_regression
 
-    group = Group.objects.get(id=existing_grouphash.group_id)
+    group = (prefetched_groups or {}).get(existing_grouphash.group_id)
+    if group is None:
+        group = Group.objects.get(id=existing_grouphash.group_id)
 
     is_new = False
 
@@ -1184,6 +987,7 @@ def _find_existing_grouphash(
     project,
     flat_grouphashes,
     hierarchical_hashes,
+    prefetched_grouphashes=None,
 ):
     all_grouphashes = []
     root_hierarchical_hash = None
@@ -1191,10 +995,19 @@ def _find_existing_grouphash(
     found_split = False
 
     if hierarchical_hashes:
-        hierarchical_grouphashes = {
-            h.hash: h
-            for h in GroupHash.objects.filter(project=project, hash__in=hierarchical_hashes)
-        }
+        if prefetched_grouphashes and all(
+            hash in prefetched_grouphashes for hash in hierarchical_hashes
+        ):
+            hierarchical_grouphashes = {
+                hash: prefetched_grouphashes[hash]
+                for hash in hierarchical_hashes
+                if prefetched_grouphashes[hash] is not None
+            }
+        else:
+            hierarchical_grouphashes = {
+                h.hash: h
+                for h in GroupHash.objects.filter(project=project, hash__in=hierarchical_hashes)
+            }
 
         for hash in reversed(hierarchical_hashes):
             group_hash = hierarchical_grouphashes.get(hash)
@@ -1738,6 +1551,389 @@ def _calculate_span_grouping(jobs, projects):
             sentry_sdk.capture_exception()
 
 
+@metrics.wraps("save_event.get_project_key_many")
+def _get_project_key_many(jobs):
+    key_ids = {job["key_id"] for job in jobs if job["key_id"] is not None}
+
+    project_keys = {}
+    if key_ids:
+        with metrics.timer("event_manager.load_project_key"):
+            project_keys = {pk.id: pk for pk in ProjectKey.objects.get_many_from_cache(key_ids)}
+
+    for job in jobs:
+        job["project_key"] = project_keys.get(job["key_id"])
+
+
+@metrics.wraps("save_event.calculate_event_grouping_many")
+def _calculate_event_grouping_many(jobs, project):
+    do_background_grouping_before = options.get("store.background-grouping-before")
+
+    for job in jobs:
+        if do_background_grouping_before:
+            _run_background_grouping(project, job)
+
+        secondary_hashes = None
+
+        try:
+            secondary_grouping_config = project.get_option("sentry:secondary_grouping_config")
+            secondary_grouping_expiry = project.get_option("sentry:secondary_grouping_expiry")
+            if secondary_grouping_config and (secondary_grouping_expiry or 0) >= time.time():
+                with metrics.timer("event_manager.secondary_grouping"):
+                    secondary_event = copy.deepcopy(job["event"])
+                    loader = SecondaryGroupingConfigLoader()
+                    secondary_grouping_config = loader.get_config_dict(project)
+                    secondary_hashes = _calculate_event_grouping(
+                        project, secondary_event, secondary_grouping_config
+                    )
+        except Exception:
+            sentry_sdk.capture_exception()
+
+        with metrics.timer("event_manager.load_grouping_config"):
+            # At this point we want to normalize the in_app values in case the
+            # clients did not set this appropriately so far.
+            grouping_config = get_grouping_config_dict_for_event_data(
+                job["event"].data.data, project
+            )
+
+        with sentry_sdk.start_span(op="event_manager.save.calculate_event_grouping"), metrics.timer(
+            "event_manager.calculate_event_grouping"
+        ):
+            hashes = _calculate_event_grouping(project, job["event"], grouping_config)
+
+        job["hashes"] = hashes = CalculatedHashes(
+            hashes=hashes.hashes + (secondary_hashes and secondary_hashes.hashes or []),
+            hierarchical_hashes=hashes.hierarchical_hashes,
+            tree_labels=hashes.tree_labels,
+        )
+
+        if not do_background_grouping_before:
+            _run_background_grouping(project, job)
+
+        if hashes.tree_labels:
+            job["finest_tree_label"] = hashes.finest_tree_label
+
+
+def _prefetch_grouphashes(project, jobs):
+    """
+    Loads the `GroupHash` rows for all flat and hierarchical hashes of a batch
+    from the grouphash cache, or with a single query. Hashes that do not exist yet are mapped to `None`, such
+    that `_find_existing_grouphash` can tell them apart from hashes that were
+    never prefetched.
+    """
+    all_hashes = set()
+    for job in jobs:
+        all_hashes.update(job["hashes"].hashes)
+        all_hashes.update(job["hashes"].hierarchical_hashes)
+
+    return get_grouphashes(project, all_hashes)
+
+
+@metrics.wraps("save_event.save_aggregate_many")
+def _save_aggregate_many(jobs, project):
+    """
+    Assigns a group to every job. Jobs whose event got discarded are removed
+    from the batch and carry the `HashDiscarded` exception in
+    `job["hash_discarded"]`. Returns the remaining jobs.
+    """
+    with metrics.timer("event_manager.prefetch_grouphashes"):
+        grouphashes = _prefetch_grouphashes(project, jobs)
+        groups = Group.objects.in_bulk(
+            {gh.group_id for gh in grouphashes.values() if gh is not None and gh.group_id}
+        )
+
+    saved_jobs = []
+
+    for job in jobs:
+        kwargs = {
+            "platform": job["platform"],
+            "message": job["event"].search_message,
+            "culprit": job["culprit"],
+            "logger": job["logger_name"],
+            "level": LOG_LEVELS_MAP.get(job["level"]),
+            "last_seen": job["event"].datetime,
+            "first_seen": job["event"].datetime,
+            "active_at": job["event"].datetime,
+        }
+
+        if job["release"]:
+            kwargs["first_release"] = job["release"]
+
+        try:
+            with sentry_sdk.start_span(op="event_manager.save.save_aggregate_fn"):
+                try:
+                    job["group"], job["is_new"], job["is_regression"] = _save_aggregate(
+                        event=job["event"],
+                        hashes=job["hashes"],
+                        release=job["release"],
+                        metadata=dict(job["event_metadata"]),
+                        received_timestamp=job["received_timestamp"],
+                        prefetched_grouphashes=grouphashes,
+                        prefetched_groups=groups,
+                        **kwargs,
+                    )
+                except Group.DoesNotExist:
+                    # A cached hash pointed to a group that has been deleted
+                    # in the meantime. Retry with fresh rows from Postgres.
+                    metrics.incr("event_manager.save_aggregate.stale_grouphash")
+                    invalidate_grouphash_cache(project.id)
+                    grouphashes.clear()
+                    job["group"], job["is_new"], job["is_regression"] = _save_aggregate(
+                        event=job["event"],
+                        hashes=job["hashes"],
+                        release=job["release"],
+                        metadata=dict(job["event_metadata"]),
+                        received_timestamp=job["received_timestamp"],
+                        **kwargs,
+                    )
+        except HashDiscarded as e:
+            discard_event(job, job["attachments"])
+            job["hash_discarded"] = e
+            continue
+        finally:
+            # Whatever this job created or re-associated is not reflected in
+            # the prefetched rows anymore, so later jobs of the batch have to
+            # look those hashes up again.
+            for hash in chain(job["hashes"].hashes, job["hashes"].hierarchical_hashes):
+                group_hash = grouphashes.get(hash)
+                if group_hash is None or group_hash.group_id is None:
+                    grouphashes.pop(hash, None)
+
+        if job["group"] is not None:
+            groups[job["group"].id] = job["group"]
+
+        job["event"].group = job["group"]
+
+        # store a reference to the group id to guarantee validation of isolation
+        # XXX(markus): No clue what this does
+        job["event"].data.bind_ref(job["event"])
+
+        saved_jobs.append(job)
+
+    return saved_jobs
+
+
+@metrics.wraps("save_event.get_or_create_group_environment_many")
+def _get_or_create_group_environment_many(jobs):
+    group_environments = {}
+
+    for job in jobs:
+        if not job["group"]:
+            job["is_new_group_environment"] = False
+            continue
+
+        key = (job["group"].id, job["environment"].id)
+        if key in group_environments:
+            job["is_new_group_environment"] = False
+            continue
+
+        _, job["is_new_group_environment"] = GroupEnvironment.get_or_create(
+            group_id=job["group"].id,
+            environment_id=job["environment"].id,
+            defaults={"first_release": job["release"] or None},
+        )
+        group_environments[key] = True
+
+
+@metrics.wraps("save_event.get_or_create_group_release_many")
+def _get_or_create_group_release_many(jobs):
+    jobs_by_group_release = {}
+    for job in jobs:
+        if job["release"] and job["group"]:
+            key = (job["group"].id, job["release"].id, job["environment"].id)
+            jobs_by_group_release.setdefault(key, []).append(job)
+
+    for jobs_to_update in jobs_by_group_release.values():
+        job = jobs_to_update[0]
+        grouprelease = GroupRelease.get_or_create(
+            group=job["group"],
+            release=job["release"],
+            environment=job["environment"],
+            datetime=max(j["event"].datetime for j in jobs_to_update),
+        )
+        for job in jobs_to_update:
+            job["grouprelease"] = grouprelease
+
+
+@metrics.wraps("save_event.update_user_reports_many")
+def _update_user_reports_many(jobs, project):
+    event_ids_by_group = {}
+    for job in jobs:
+        if job["group"]:
+            key = (job["group"].id, job["environment"].id)
+            event_ids_by_group.setdefault(key, []).append(job["event"].event_id)
+
+    for (group_id, environment_id), event_ids in event_ids_by_group.items():
+        UserReport.objects.filter(project_id=project.id, event_id__in=event_ids).update(
+            group_id=group_id, environment_id=environment_id
+        )
+
+
+@metrics.wraps("save_event.incr_release_new_groups_many")
+def _incr_release_new_groups_many(jobs, project):
+    new_groups = defaultdict(int)
+    new_issues = defaultdict(int)
+
+    for job in jobs:
+        if not job["release"]:
+            continue
+        if job["is_new"]:
+            new_groups[job["release"].id] += 1
+        if job["is_new_group_environment"]:
+            new_issues[(job["release"].id, job["environment"].id)] += 1
+
+    for release_id, count in new_groups.items():
+        buffer.incr(
+            ReleaseProject,
+            {"new_groups": count},
+            {"release_id": release_id, "project_id": project.id},
+        )
+
+    for (release_id, environment_id), count in new_issues.items():
+        buffer.incr(
+            ReleaseProjectEnvironment,
+            {"new_issues_count": count},
+            {
+                "project_id": project.id,
+                "release_id": release_id,
+                "environment_id": environment_id,
+            },
+        )
+
+
+@metrics.wraps("event_manager.save_error_events")
+def save_error_events(jobs, projects):
+    """
+    Saves a batch of error (non-transaction) events which all belong to the
+    same project. Group lookups, tsdb increments and the other writes that
+    are shared between events are done once for the whole batch.
+
+    Every job needs at least ``data``, ``project_id``, ``raw``, ``start_time``
+    and ``cache_key``. Events that get discarded while grouping are dropped
+    from the batch and carry the exception in ``job["hash_discarded"]``.
+    Returns the list of saved jobs.
+    """
+    project_ids = {int(job["project_id"]) for job in jobs}
+    if len(project_ids) != 1:
+        raise ValueError("save_error_events requires all events to belong to one project")
+
+    project = projects[project_ids.pop()]
+
+    with metrics.timer("event_manager.save.organization.get_from_cache"):
+        project.set_cached_field_value(
+            "organization", Organization.objects.get_from_cache(id=project.organization_id)
+        )
+
+    for job in jobs:
+        job["is_reprocessed"] = is_reprocessed_event(job["data"])
+
+    with sentry_sdk.start_span(op="event_manager.save.pull_out_data"):
+        _pull_out_data(jobs, projects)
+
+    with sentry_sdk.start_span(op="event_manager.save.get_or_create_release_many"):
+        _get_or_create_release_many(jobs, projects)
+
+    with sentry_sdk.start_span(op="event_manager.save.get_event_user_many"):
+        _get_event_user_many(jobs, projects)
+
+    _get_project_key_many(jobs)
+    _derive_plugin_tags_many(jobs, projects)
+    _derive_interface_tags_many(jobs)
+    _calculate_event_grouping_many(jobs, project)
+    _materialize_metadata_many(jobs)
+
+    # Load attachments first, but persist them at the very last after
+    # posting to eventstream to make sure all counters and eventstream are
+    # incremented for sure. Also wait for grouping to remove attachments
+    # based on the group counter.
+    with metrics.timer("event_manager.get_attachments"):
+        with sentry_sdk.start_span(op="event_manager.save.get_attachments"):
+            for job in jobs:
+                job["attachments"] = get_attachments(job["cache_key"], job)
+
+    jobs = _save_aggregate_many(jobs, project)
+    if not jobs:
+        return jobs
+
+    _get_or_create_environment_many(jobs, projects)
+    _get_or_create_group_environment_many(jobs)
+    _get_or_create_release_associated_models(jobs, projects)
+    _get_or_create_group_release_many(jobs)
+    _tsdb_record_all_metrics(jobs)
+    _update_user_reports_many(jobs, project)
+
+    with metrics.timer("event_manager.filter_attachments_for_group"):
+        for job in jobs:
+            job["attachments"] = filter_attachments_for_group(job["attachments"], job)
+
+    # XXX: DO NOT MUTATE THE EVENT PAYLOAD AFTER THIS POINT
+    _materialize_event_metrics(jobs)
+
+    for job in jobs:
+        for attachment in job["attachments"]:
+            key = f"bytes.stored.{attachment.type}"
+            old_bytes = job["event_metrics"].get(key) or 0
+            job["event_metrics"][key] = old_bytes + attachment.size
+
+    _nodestore_save_many(jobs)
+    for job in jobs:
+        save_unprocessed_event(project, job["event"].event_id)
+
+    _incr_release_new_groups_many(jobs, project)
+
+    if not project.first_event:
+        first_job = next((job for job in jobs if not job["raw"]), None)
+        if first_job is not None:
+            project.update(first_event=first_job["event"].datetime)
+            first_event_received.send_robust(
+                project=project, event=first_job["event"], sender=Project
+            )
+
+    for job in jobs:
+        if job["is_reprocessed"]:
+            safe_execute(
+                reprocessing2.buffered_delete_old_primary_hash,
+                project_id=job["event"].project_id,
+                group_id=reprocessing2.get_original_group_id(job["event"]),
+                event_id=job["event"].event_id,
+                datetime=job["event"].datetime,
+                old_primary_hash=reprocessing2.get_original_primary_hash(job["event"]),
+                current_primary_hash=job["event"].get_primary_hash(),
+                _with_transaction=False,
+            )
+
+    _eventstream_insert_many(jobs)
+
+    # Do this last to ensure signals get emitted even if connection to the
+    # file store breaks temporarily.
+    #
+    # We do not need this for reprocessed events as for those we update the
+    # group_id on existing models in post_process_group, which already does
+    # this because of indiv. attachments.
+    with metrics.timer("event_manager.save_attachments"):
+        for job in jobs:
+            if not job["is_reprocessed"]:
+                save_attachments(job["cache_key"], job["attachments"], job)
+
+    for job in jobs:
+        metric_tags = {"from_relay": "_relay_processed" in job["data"]}
+
+        metrics.timing(
+            "events.latency",
+            job["received_timestamp"] - job["recorded_timestamp"],
+            tags=metric_tags,
+        )
+        metrics.timing("events.size.data.post_save", job["event"].size, tags=metric_tags)
+        metrics.incr(
+            "events.post_save.normalize.errors",
+            amount=len(job["data"].get("errors") or ()),
+            tags=metric_tags,
+        )
+
+    _track_outcome_accepted_many(jobs)
+
+    return jobs
+
+
 @metrics.wraps("event_manager.save_transaction_events")
 def save_transaction_events(jobs, projects):
     with metrics.timer("event_manager.save_transactions.collect_organization_ids"):
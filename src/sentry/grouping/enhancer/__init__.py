@@ -1,6 +1,7 @@
 import base64
 import os
 import zlib
+from contextlib import contextmanager
 
 import msgpack
 from parsimonious.exceptions import ParseError
@@ -8,10 +9,13 @@ from parsimonious.grammar import Grammar, NodeVisitor
 
 from sentry import projectoptions
 from sentry.grouping.component import GroupingComponent
+from sentry.utils import metrics
+from sentry.utils.datastructures import LRUCache
 from sentry.utils.strings import unescape_string
 
 from .actions import Action, FlagAction, VarAction
 from .exceptions import InvalidEnhancerConfig
+from .index import RuleIndex
 from .matchers import (
     CalleeMatch,
     CallerMatch,
@@ -19,6 +23,7 @@ from .matchers import (
     FrameMatch,
     Match,
     create_match_frame,
+    frame_match_cache,
 )
 
 # Grammar is defined in EBNF syntax.
@@ -70,6 +75,30 @@ _        = space*
 VERSIONS = [1, 2]
 LATEST_VERSION = VERSIONS[-1]
 
+# Decoded enhancements by their serialized form, see `Enhancements.loads`
+_loaded_enhancements = LRUCache(maxsize=1000)
+
+
+@contextmanager
+def _track_frame_match_cache():
+    """Reports hits and misses of the process-wide frame match cache for the
+    enclosed block. Concurrent threads may skew the numbers slightly."""
+    hits, misses = frame_match_cache.hits, frame_match_cache.misses
+    try:
+        yield
+    finally:
+        metrics.incr(
+            "grouping.enhancer.frame_match_cache",
+            amount=frame_match_cache.hits - hits,
+            tags={"result": "hit"},
+        )
+        metrics.incr(
+            "grouping.enhancer.frame_match_cache",
+            amount=frame_match_cache.misses - misses,
+            tags={"result": "miss"},
+        )
+        metrics.gauge("grouping.enhancer.frame_match_cache.size", len(frame_match_cache))
+
 
 class StacktraceState:
     def __init__(self):
@@ -116,6 +145,11 @@ class Enhancements:
         self._modifier_rules = [rule for rule in self.iter_rules() if rule.is_modifier]
         self._updater_rules = [rule for rule in self.iter_rules() if rule.is_updater]
 
+        # `category=` changes the category of frames while modifier rules are
+        # applied, later rules have to see the new value.
+        self._modifier_index = RuleIndex(self._modifier_rules, mutable_fields={"category"})
+        self._updater_index = RuleIndex(self._updater_rules)
+
     def apply_modifications_to_frame(self, frames, platform, exception_data):
         """This applies the frame modifications to the frames itself.  This
         does not affect grouping.
@@ -125,11 +159,12 @@ class Enhancements:
 
         match_frames = [create_match_frame(frame, platform) for frame in frames]
 
-        for rule in self._modifier_rules:
-            for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
-            ):
-                action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
+        with _track_frame_match_cache():
+            for rule, frame_indices in self._modifier_index.iter_candidates(match_frames):
+                for idx, action in rule.get_matching_frame_actions(
+                    match_frames, platform, exception_data, cache, frame_indices
+                ):
+                    action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
 
     def update_frame_components_contributions(self, components, frames, platform, exception_data):
 
@@ -139,13 +174,14 @@ class Enhancements:
 
         stacktrace_state = StacktraceState()
         # Apply direct frame actions and update the stack state alongside
-        for rule in self._updater_rules:
+        with _track_frame_match_cache():
+            for rule, frame_indices in self._updater_index.iter_candidates(match_frames):
 
-            for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
-            ):
-                action.update_frame_components_contributions(components, frames, idx, rule=rule)
-                action.modify_stacktrace_state(stacktrace_state, rule)
+                for idx, action in rule.get_matching_frame_actions(
+                    match_frames, platform, exception_data, cache, frame_indices
+                ):
+                    action.update_frame_components_contributions(components, frames, idx, rule=rule)
+                    action.modify_stacktrace_state(stacktrace_state, rule)
 
         # Use the stack state to update frame contributions again to trim
         # down to max-frames.  min-frames is handled on the other hand for
@@ -251,14 +287,25 @@ class Enhancements:
     def loads(cls, data):
         if isinstance(data, str):
             data = data.encode("ascii", "ignore")
+
+        # Grouping configs get loaded for every event, but there are only few
+        # distinct ones. Keep the decoded (and indexed) instances around.
+        cache_key = (cls, data)
+        rv = _loaded_enhancements.get(cache_key)
+        if rv is not None:
+            return rv
+
         padded = data + b"=" * (4 - (len(data) % 4))
         try:
-            return cls._from_config_structure(
+            rv = cls._from_config_structure(
                 msgpack.loads(zlib.decompress(base64.urlsafe_b64decode(padded)), raw=False)
             )
         except (LookupError, AttributeError, TypeError, ValueError) as e:
             raise ValueError("invalid stack trace rule config: %s" % e)
 
+        _loaded_enhancements.set(cache_key, rv)
+        return rv
+
     @classmethod
     def from_config_string(self, s, bases=None, id=None):
         try:
@@ -312,9 +359,14 @@ class Rule:
             matchers[matcher.key] = matcher.pattern
         return {"match": matchers, "actions": [str(x) for x in self.actions]}
 
-    def get_matching_frame_actions(self, frames, platform, exception_data=None, cache=None):
+    def get_matching_frame_actions(
+        self, frames, platform, exception_data=None, cache=None, frame_indices=None
+    ):
         """Given a frame returns all the matching actions based on this rule.
         If the rule does not match `None` is returned.
+
+        If `frame_indices` is given, only those frames are considered (see
+        `RuleIndex`).
         """
         if not self.matchers:
             return []
@@ -326,8 +378,11 @@ class Rule:
 
         rv = []
 
+        if frame_indices is None:
+            frame_indices = range(len(frames))
+
         # 2 - Check if frame matchers match
-        for idx, frame in enumerate(frames):
+        for idx in frame_indices:
             if all(
                 m.matches_frame(frames, idx, platform, exception_data, cache)
                 for m in self._other_matchers
@@ -0,0 +1,158 @@
+import re
+from collections import defaultdict
+from typing import Collection, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .matchers import FamilyMatch, FrameFieldMatch, FrameMatch, FunctionMatch, PathLikeMatch
+
+# Everything that is not a plain character in a glob pattern. This is more
+# conservative than it has to be, the prefix in front of it is all we need.
+_GLOB_SPECIAL_CHARS_RE = re.compile(rb"[*?\[\]{}\\!]")
+
+
+def _split_glob(pattern: bytes) -> Tuple[bytes, bool]:
+    """Returns the literal prefix of a glob pattern, and whether the pattern
+    is literal as a whole."""
+    match = _GLOB_SPECIAL_CHARS_RE.search(pattern)
+    if match is None:
+        return pattern, True
+    return pattern[: match.start()], False
+
+
+def _path_like_values(value: bytes) -> Sequence[bytes]:
+    """The values `path_like_match` can match a pattern against."""
+    value = value.replace(b"\\", b"/")
+    if value.startswith(b"/"):
+        return (value,)
+    return (value, b"/" + value)
+
+
+class _FieldIndex:
+    """Maps values of one frame field to the rules whose anchor matcher can
+    match them, either by exact value or by literal pattern prefix."""
+
+    def __init__(self) -> None:
+        self.exact: Dict[bytes, List[int]] = defaultdict(list)
+        # prefix length -> prefix -> rules
+        self.prefixes: Dict[int, Dict[bytes, List[int]]] = defaultdict(lambda: defaultdict(list))
+
+    def add(self, literal: bytes, is_exact: bool, rule_idx: int) -> None:
+        if is_exact:
+            self.exact[literal].append(rule_idx)
+        else:
+            self.prefixes[len(literal)][literal].append(rule_idx)
+
+    def lookup(self, value: bytes, rv: Set[int]) -> None:
+        rv.update(self.exact.get(value, ()))
+        for length, prefixes in self.prefixes.items():
+            if length <= len(value):
+                rv.update(prefixes.get(value[:length], ()))
+
+
+def _get_anchor(
+    rule, mutable_fields: Collection[str] = ()
+) -> Optional[Tuple[Tuple[int, int], FrameMatch, bytes, bool]]:
+    """Picks the most selective matcher of a rule that every frame matched by
+    the rule has to satisfy. Returns ``(score, matcher, literal, is_exact)``.
+
+    Only positive matchers on the frame itself qualify. Matchers on ``app``
+    are skipped on purpose: the ``app`` action changes that field while the
+    rules are applied. The same goes for ``mutable_fields``.
+    """
+    best = None
+
+    for matcher in rule._other_matchers:
+        if not isinstance(matcher, FrameMatch) or matcher.negated:
+            continue
+
+        if matcher.key in mutable_fields:
+            continue
+
+        if isinstance(matcher, (FunctionMatch, FrameFieldMatch)):
+            literal, is_exact = _split_glob(matcher._encoded_pattern)
+            if not literal:
+                continue
+            # `path_like_match` is the only place where values get normalized,
+            # so plain fields can make use of exact lookups.
+            candidate = ((2 if is_exact else 1, len(literal)), matcher, literal, is_exact)
+        elif isinstance(matcher, PathLikeMatch):
+            literal, _ = _split_glob(matcher._encoded_pattern)
+            if not literal:
+                continue
+            candidate = ((1, len(literal)), matcher, literal, False)
+        elif isinstance(matcher, FamilyMatch):
+            if b"all" in matcher._flags:
+                continue
+            candidate = ((0, 0), matcher, b"", False)
+        else:
+            continue
+
+        if best is None or candidate[0] > best[0]:
+            best = candidate
+
+    return best
+
+
+class RuleIndex:
+    """
+    Pre-filters the rules of an enhancement config per stack trace.
+
+    Each rule is indexed by one "anchor" matcher (see `_get_anchor`). For a
+    list of match frames the index yields every rule together with the frames
+    its anchor can match, such that the full set of matchers of a rule only
+    has to be evaluated for those frames. Rules without a usable anchor are
+    evaluated against all frames.
+
+    Candidates are computed before any rule is applied, so frame fields that
+    the rules themselves change have to be passed as ``mutable_fields``.
+    Matchers on these fields are never used as anchors.
+    """
+
+    def __init__(self, rules: Sequence, mutable_fields: Collection[str] = ()) -> None:
+        self.rules = list(rules)
+        self._unindexed: Set[int] = set()
+        self._fields: Dict[str, _FieldIndex] = defaultdict(_FieldIndex)
+        self._families: Dict[bytes, List[int]] = defaultdict(list)
+
+        for rule_idx, rule in enumerate(self.rules):
+            anchor = _get_anchor(rule, mutable_fields)
+            if anchor is None:
+                self._unindexed.add(rule_idx)
+                continue
+
+            _, matcher, literal, is_exact = anchor
+            if isinstance(matcher, FamilyMatch):
+                for family in matcher._flags:
+                    self._families[family].append(rule_idx)
+            else:
+                self._fields[matcher.key].add(literal, is_exact, rule_idx)
+
+    def _get_frame_candidates(self, match_frame) -> Set[int]:
+        rv: Set[int] = set(self._families.get(match_frame["family"], ()))
+
+        for field, field_index in self._fields.items():
+            value = match_frame[field]
+            if value is None:
+                continue
+
+            if field in ("path", "package"):
+                for normalized_value in _path_like_values(value):
+                    field_index.lookup(normalized_value, rv)
+            else:
+                field_index.lookup(value, rv)
+
+        return rv
+
+    def iter_candidates(self, match_frames) -> Iterator[Tuple[object, Optional[List[int]]]]:
+        """Yields ``(rule, frame_indices)`` in rule order. ``frame_indices`` is
+        `None` if the rule has to be checked against all frames. Rules that
+        cannot match any frame are skipped."""
+        frames_by_rule: Dict[int, List[int]] = defaultdict(list)
+        for frame_idx, match_frame in enumerate(match_frames):
+            for rule_idx in self._get_frame_candidates(match_frame):
+                frames_by_rule[rule_idx].append(frame_idx)
+
+        for rule_idx, rule in enumerate(self.rules):
+            if rule_idx in self._unindexed:
+                yield rule, None
+            elif rule_idx in frames_by_rule:
+                yield rule, frames_by_rule[rule_idx]
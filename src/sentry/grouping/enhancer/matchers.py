@@ -3,6 +3,7 @@ from typing import Optional
 from sentry.grouping.utils import get_rule_bool
 from sentry.stacktraces.functions import get_function_name_for_frame
 from sentry.stacktraces.platform import get_behavior_family_for_platform
+from sentry.utils.datastructures import LRUCache
 from sentry.utils.functional import cached
 from sentry.utils.glob import glob_match
 from sentry.utils.safe import get_path
@@ -28,6 +29,28 @@ assert len(SHORT_MATCH_KEYS) == len(MATCH_KEYS)  # assert short key names are no
 FAMILIES = {"native": "N", "javascript": "J", "all": "a"}
 REVERSE_FAMILIES = {v: k for k, v in FAMILIES.items()}
 
+# Results of glob matches against frame values, shared by all events in this
+# process. The same modules, functions and paths show up in events over and
+# over again, and match results only depend on the pattern and the value.
+frame_match_cache = LRUCache(maxsize=100000)
+
+
+def cached_frame_match(cache, function, *args):
+    """Like `cached`, but falls back to the process-wide `frame_match_cache`
+    before calling ``function``."""
+    key = (function, args)
+
+    rv = cache.get(key) if cache is not None else None
+    if rv is None:
+        rv = frame_match_cache.get(key)
+        if rv is None:
+            rv = function(*args)
+            frame_match_cache.set(key, rv)
+        if cache is not None:
+            cache[key] = rv
+
+    return rv
+
 
 MATCHERS = {
     # discover field names
@@ -205,7 +228,7 @@ class PathLikeMatch(FrameMatch):
         if value is None:
             return False
 
-        return cached(cache, path_like_match, self._encoded_pattern, value)
+        return cached_frame_match(cache, path_like_match, self._encoded_pattern, value)
 
 
 class PackageMatch(PathLikeMatch):
@@ -243,7 +266,7 @@ class InAppMatch(FrameMatch):
 class FunctionMatch(FrameMatch):
     def _positive_frame_match(self, match_frame, platform, exception_data, cache):
 
-        return cached(cache, glob_match, match_frame["function"], self._encoded_pattern)
+        return cached_frame_match(cache, glob_match, match_frame["function"], self._encoded_pattern)
 
 
 class FrameFieldMatch(FrameMatch):
@@ -252,7 +275,7 @@ class FrameFieldMatch(FrameMatch):
         if field is None:
             return False
 
-        return cached(cache, glob_match, field, self._encoded_pattern)
+        return cached_frame_match(cache, glob_match, field, self._encoded_pattern)
 
 
 class ModuleMatch(FrameFieldMatch):
@@ -268,6 +291,8 @@ class CategoryMatch(FrameFieldMatch):
 class ExceptionFieldMatch(FrameMatch):
     def _positive_frame_match(self, frame_data, platform, exception_data, cache):
         field = get_path(exception_data, *self.field_path) or "<unknown>"
+        # Exception values are mostly unique per event, which is why they are
+        # not kept in `frame_match_cache`.
         return cached(cache, glob_match, field, self._encoded_pattern)
 
 
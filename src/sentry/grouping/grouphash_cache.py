@@ -0,0 +1,167 @@
+"""
+A cache resolving ``(project_id, hash)`` to the `GroupHash` rows that
+``_save_aggregate`` needs to find the group of an event.
+
+Almost all events map to a group that already exists, so the rows are
+cached in two tiers: a bounded in-process LRU and Redis. Only rows that are
+attached to a group, are tombstoned, or are split get cached; everything
+else is still in the middle of group creation and always hits Postgres.
+
+Instead of tracking individual hashes, every project has a generation
+counter in Redis which is part of every cache key. Merge, unmerge, split,
+tombstoning and deletion bump the counter through `invalidate_grouphash_cache`,
+which orphans all cached rows of that project in both tiers at once.
+"""
+
+from django.conf import settings
+
+from sentry import options
+from sentry.models import GroupHash
+from sentry.utils import json, metrics, redis
+from sentry.utils.datastructures import LRUCache
+
+#: How long resolved rows are kept in Redis.
+REDIS_TTL = 3600
+
+#: How long resolved rows are kept in the in-process cache. Entries can never
+#: become incoherent thanks to the generation counter, this only keeps
+#: projects that stopped sending events from occupying the cache.
+LOCAL_TTL = 300
+
+LOCAL_MAXSIZE = 50000
+
+_local_cache = LRUCache(maxsize=LOCAL_MAXSIZE, ttl=LOCAL_TTL)
+
+
+def _get_redis_client():
+    return redis.redis_clusters.get(settings.SENTRY_GROUPHASH_CACHE_REDIS_CLUSTER)
+
+
+def _get_generation_key(project_id):
+    # Legacy string formatting because the keys contain a redis cluster hash
+    # tag, which would have to be escaped in f-strings.
+    return "ghc:{%s}:gen" % (project_id,)
+
+
+def _get_entry_key(project_id, generation, hash):
+    return "ghc:{%s}:%s:%s" % (project_id, generation, hash)
+
+
+def _is_cacheable(group_hash):
+    if group_hash.state == GroupHash.State.LOCKED_IN_MIGRATION:
+        return False
+
+    return (
+        group_hash.group_id is not None
+        or group_hash.group_tombstone_id is not None
+        or group_hash.state == GroupHash.State.SPLIT
+    )
+
+
+def _dump(group_hash):
+    return json.dumps(
+        [group_hash.id, group_hash.group_id, group_hash.group_tombstone_id, group_hash.state]
+    )
+
+
+def _load(project_id, hash, value):
+    id, group_id, group_tombstone_id, state = json.loads(value)
+    return GroupHash(
+        id=id,
+        project_id=project_id,
+        hash=hash,
+        group_id=group_id,
+        group_tombstone_id=group_tombstone_id,
+        state=state,
+    )
+
+
+def get_grouphashes(project, hashes):
+    """
+    Returns a dictionary mapping each of ``hashes`` to its `GroupHash` row, or
+    to `None` if the row does not exist. Rows which are not in the cache are
+    loaded from Postgres with a single query.
+    """
+    hashes = set(hashes)
+    if not hashes:
+        return {}
+
+    if not options.get("store.grouphash-cache-enabled"):
+        return _query_grouphashes(project, hashes)
+
+    client = _get_redis_client()
+    generation = client.get(_get_generation_key(project.id)) or "0"
+
+    result = {}
+    missing = []
+    for hash in hashes:
+        group_hash = _local_cache.get((project.id, generation, hash))
+        if group_hash is not None:
+            result[hash] = group_hash
+        else:
+            missing.append(hash)
+
+    metrics.incr(
+        "grouphash_cache.lookup", amount=len(hashes) - len(missing), tags={"tier": "local"}
+    )
+
+    if missing:
+        values = client.mget([_get_entry_key(project.id, generation, hash) for hash in missing])
+
+        not_in_redis = []
+        for hash, value in zip(missing, values):
+            if value is None:
+                not_in_redis.append(hash)
+                continue
+
+            group_hash = result[hash] = _load(project.id, hash, value)
+            _local_cache.set((project.id, generation, hash), group_hash)
+
+        metrics.incr(
+            "grouphash_cache.lookup",
+            amount=len(missing) - len(not_in_redis),
+            tags={"tier": "redis"},
+        )
+        metrics.incr("grouphash_cache.lookup", amount=len(not_in_redis), tags={"tier": "miss"})
+
+        if not_in_redis:
+            queried = _query_grouphashes(project, not_in_redis)
+            result.update(queried)
+            _set_grouphashes(client, project.id, generation, queried.values())
+
+    return result
+
+
+def _query_grouphashes(project, hashes):
+    result = dict.fromkeys(hashes)
+    for group_hash in GroupHash.objects.filter(project=project, hash__in=hashes):
+        result[group_hash.hash] = group_hash
+    return result
+
+
+def _set_grouphashes(client, project_id, generation, grouphashes):
+    cacheable = [gh for gh in grouphashes if gh is not None and _is_cacheable(gh)]
+    if not cacheable:
+        return
+
+    with client.pipeline(transaction=False) as pipe:
+        for group_hash in cacheable:
+            pipe.set(
+                _get_entry_key(project_id, generation, group_hash.hash),
+                _dump(group_hash),
+                ex=REDIS_TTL,
+            )
+        pipe.execute()
+
+    for group_hash in cacheable:
+        _local_cache.set((project_id, generation, group_hash.hash), group_hash)
+
+
+def invalidate_grouphash_cache(project_id):
+    """
+    Drops all cached `GroupHash` rows of a project. Has to be called whenever
+    existing rows are moved to another group, tombstoned, split or deleted.
+    """
+    # The generation key never expires: if it did, the counter would restart
+    # and could hit a generation whose entries are still in Redis.
+    _get_redis_client().incr(_get_generation_key(project_id))
@@ -85,6 +85,47 @@ class IncidentManager(BaseManager):
 
         return incident
 
+    def get_active_incidents(self, keys):
+        """
+        Bulk version of `get_active_incident`. Takes an iterable of
+        ``(alert_rule_id, project_id)`` tuples and returns a dict mapping each of them to
+        the active incident, or `None`.
+        """
+        cache_keys = {self._build_active_incident_cache_key(*key): key for key in keys}
+        result = {}
+        for cache_key, incident in cache.get_many(cache_keys.keys()).items():
+            if incident is not None:
+                # Falsey values are the negative cache, see `get_active_incident`
+                result[cache_keys[cache_key]] = incident or None
+
+        missing = [key for key in cache_keys.values() if key not in result]
+        if missing:
+            incident_projects = (
+                IncidentProject.objects.filter(
+                    incident__type=IncidentType.ALERT_TRIGGERED.value,
+                    incident__alert_rule_id__in={alert_rule_id for alert_rule_id, _ in missing},
+                    project_id__in={project_id for _, project_id in missing},
+                )
+                .exclude(incident__status=IncidentStatus.CLOSED.value)
+                .select_related("incident")
+                .order_by("-incident__date_added")
+            )
+            loaded = dict.fromkeys(missing)
+            for incident_project in incident_projects:
+                key = (incident_project.incident.alert_rule_id, incident_project.project_id)
+                if key in loaded and loaded[key] is None:
+                    loaded[key] = incident_project.incident
+
+            cache.set_many(
+                {
+                    self._build_active_incident_cache_key(*key): incident or False
+                    for key, incident in loaded.items()
+                }
+            )
+            result.update(loaded)
+
+        return result
+
     @classmethod
     def clear_active_incident_cache(cls, instance, **kwargs):
         for project in instance.projects.all():
@@ -316,6 +357,41 @@ class AlertRuleManager(BaseManager):
 
         return alert_rule
 
+    def get_for_subscriptions(self, subscriptions):
+        """
+        Bulk version of `get_for_subscription`. Returns a dict mapping subscription ids to
+        their AlertRule. Subscriptions without an AlertRule are left out.
+        """
+        cache_keys = {
+            self.__build_subscription_cache_key(subscription.id): subscription
+            for subscription in subscriptions
+        }
+        result = {
+            cache_keys[cache_key].id: alert_rule
+            for cache_key, alert_rule in cache.get_many(cache_keys.keys()).items()
+            if alert_rule is not None
+        }
+
+        missing = [
+            subscription for subscription in cache_keys.values() if subscription.id not in result
+        ]
+        if missing:
+            alert_rules = {
+                alert_rule.snuba_query_id: alert_rule
+                for alert_rule in AlertRule.objects.filter(
+                    snuba_query_id__in={subscription.snuba_query_id for subscription in missing}
+                )
+            }
+            to_cache = {}
+            for subscription in missing:
+                alert_rule = alert_rules.get(subscription.snuba_query_id)
+                if alert_rule is not None:
+                    result[subscription.id] = alert_rule
+                    to_cache[self.__build_subscription_cache_key(subscription.id)] = alert_rule
+            cache.set_many(to_cache, 3600)
+
+        return result
+
     @classmethod
     def clear_subscription_cache(cls, instance, **kwargs):
         cache.delete(cls.__build_subscription_cache_key(instance.id))
@@ -467,6 +543,39 @@ class AlertRuleTriggerManager(BaseManager):
             cache.set(cache_key, triggers, 3600)
         return triggers
 
+    def get_for_alert_rules(self, alert_rules):
+        """
+        Bulk version of `get_for_alert_rule`. Returns a dict mapping alert rule ids to
+        lists of their AlertRuleTriggers.
+        """
+        cache_keys = {
+            self._build_trigger_cache_key(alert_rule.id): alert_rule.id
+            for alert_rule in alert_rules
+        }
+        result = {
+            cache_keys[cache_key]: triggers
+            for cache_key, triggers in cache.get_many(cache_keys.keys()).items()
+            if triggers is not None
+        }
+
+        missing = [
+            alert_rule_id for alert_rule_id in cache_keys.values() if alert_rule_id not in result
+        ]
+        if missing:
+            loaded = {alert_rule_id: [] for alert_rule_id in missing}
+            for trigger in AlertRuleTrigger.objects.filter(alert_rule_id__in=missing):
+                loaded[trigger.alert_rule_id].append(trigger)
+            cache.set_many(
+                {
+                    self._build_trigger_cache_key(alert_rule_id): triggers
+                    for alert_rule_id, triggers in loaded.items()
+                },
+                3600,
+            )
+            result.update(loaded)
+
+        return result
+
     @classmethod
     def clear_trigger_cache(cls, instance, **kwargs):
         cache.delete(cls._build_trigger_cache_key(instance.alert_rule_id))
@@ -1,5 +1,6 @@
 import logging
 import operator
+from collections import defaultdict
 from copy import deepcopy
 from datetime import timedelta
 from typing import Optional
@@ -67,21 +68,29 @@ class SubscriptionProcessor:
         AlertRuleThresholdType.BELOW: (operator.lt, operator.gt),
     }
 
-    def __init__(self, subscription):
+    def __init__(self, subscription, alert_rule=None, triggers=None, stats=None, pipeline=None):
+        """
+        `alert_rule`, `triggers` and `stats` (as returned by `get_alert_rule_stats`) can be
+        passed in if they have been prefetched, otherwise they're fetched here. If a Redis
+        `pipeline` is passed, stat updates are added to it instead of being written right
+        away, and the caller has to execute it.
+        """
         self.subscription = subscription
-        try:
-            self.alert_rule = AlertRule.objects.get_for_subscription(subscription)
-        except AlertRule.DoesNotExist:
-            return
+        self.pipeline = pipeline
+        if alert_rule is None:
+            try:
+                alert_rule = AlertRule.objects.get_for_subscription(subscription)
+            except AlertRule.DoesNotExist:
+                return
+        self.alert_rule = alert_rule
 
-        self.triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
-        self.triggers.sort(key=lambda trigger: trigger.alert_threshold)
+        if triggers is None:
+            triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
+        self.triggers = sorted(triggers, key=lambda trigger: trigger.alert_threshold)
 
-        (
-            self.last_update,
-            self.trigger_alert_counts,
-            self.trigger_resolve_counts,
-        ) = get_alert_rule_stats(self.alert_rule, self.subscription, self.triggers)
+        if stats is None:
+            stats = get_alert_rule_stats(self.alert_rule, self.subscription, self.triggers)
+        self.last_update, self.trigger_alert_counts, self.trigger_resolve_counts = stats
         self.orig_trigger_alert_counts = deepcopy(self.trigger_alert_counts)
         self.orig_trigger_resolve_counts = deepcopy(self.trigger_resolve_counts)
 
@@ -627,7 +636,77 @@ class SubscriptionProcessor:
             self.last_update,
             updated_trigger_alert_counts,
             updated_trigger_resolve_counts,
+            pipeline=self.pipeline,
+        )
+        # Later updates only need to write what changed since this one.
+        self.orig_trigger_alert_counts = deepcopy(self.trigger_alert_counts)
+        self.orig_trigger_resolve_counts = deepcopy(self.trigger_resolve_counts)
+
+
+def process_subscription_updates(updates):
+    """
+    Processes many subscription updates at once. Takes a sequence of
+    ``(subscription_update, subscription)`` tuples, where updates of the same subscription
+    are processed in the given order.
+
+    Alert rules, triggers, active incidents and alert rule stats of all subscriptions are
+    fetched in bulk, and the changed stats are written back in a single pipeline once all
+    updates have been processed, or once one of them has failed.
+    """
+    updates_by_subscription = defaultdict(list)
+    subscriptions = {}
+    for subscription_update, subscription in updates:
+        updates_by_subscription[subscription.id].append(subscription_update)
+        subscriptions.setdefault(subscription.id, subscription)
+
+    alert_rules = AlertRule.objects.get_for_subscriptions(subscriptions.values())
+    triggers = AlertRuleTrigger.objects.get_for_alert_rules(alert_rules.values())
+    active_incidents = Incident.objects.get_active_incidents(
+        (alert_rules[subscription.id].id, subscription.project_id)
+        for subscription in subscriptions.values()
+        if subscription.id in alert_rules
+    )
+    subscriptions_with_rules = [
+        subscription for subscription in subscriptions.values() if subscription.id in alert_rules
+    ]
+    stats = get_alert_rule_stats_bulk(
+        (
+            alert_rules[subscription.id],
+            subscription,
+            triggers[alert_rules[subscription.id].id],
         )
+        for subscription in subscriptions_with_rules
+    )
+    stats_by_subscription = {
+        subscription.id: subscription_stats
+        for subscription, subscription_stats in zip(subscriptions_with_rules, stats)
+    }
+
+    pipeline = get_redis_client().pipeline()
+    try:
+        for subscription_id, subscription_updates in updates_by_subscription.items():
+            subscription = subscriptions[subscription_id]
+            alert_rule = alert_rules.get(subscription_id)
+            if alert_rule is None:
+                processor = SubscriptionProcessor(subscription, pipeline=pipeline)
+            else:
+                processor = SubscriptionProcessor(
+                    subscription,
+                    alert_rule=alert_rule,
+                    triggers=triggers[alert_rule.id],
+                    stats=stats_by_subscription[subscription_id],
+                    pipeline=pipeline,
+                )
+                processor.active_incident = active_incidents[
+                    (alert_rule.id, subscription.project_id)
+                ]
+
+            for subscription_update in subscription_updates:
+                processor.process_update(subscription_update)
+    finally:
+        # Stats of updates that were already processed must be written even if a later
+        # update fails, since their incidents may already have been created or resolved.
+        pipeline.execute()
 
 
 def build_alert_rule_stat_keys(alert_rule, subscription):
@@ -681,28 +760,53 @@ def get_alert_rule_stats(alert_rule, subscription, triggers):
        trigger id, and the value is an int representing how many consecutive times we
        have triggered the resolve threshold
     """
-    alert_rule_keys = build_alert_rule_stat_keys(alert_rule, subscription)
-    trigger_keys = build_trigger_stat_keys(alert_rule, subscription, triggers)
-    results = get_redis_client().mget(alert_rule_keys + trigger_keys)
-    results = tuple(0 if result is None else int(result) for result in results)
-    last_update = to_datetime(results[0])
-    trigger_results = results[1:]
-    trigger_alert_counts = {}
-    trigger_resolve_counts = {}
-    for trigger, trigger_result in zip(
-        triggers, partition(trigger_results, len(ALERT_RULE_TRIGGER_STAT_KEYS))
-    ):
-        trigger_alert_counts[trigger.id] = trigger_result[0]
-        trigger_resolve_counts[trigger.id] = trigger_result[1]
-
-    return last_update, trigger_alert_counts, trigger_resolve_counts
-
-
-def update_alert_rule_stats(alert_rule, subscription, last_update, alert_counts, resolve_counts):
+    return get_alert_rule_stats_bulk([(alert_rule, subscription, triggers)])[0]
+
+
+def get_alert_rule_stats_bulk(items):
+    """
+    Bulk version of `get_alert_rule_stats`, which fetches the stats of all items with
+    a single `mget`.
+    :param items: An iterable of ``(alert_rule, subscription, triggers)`` tuples
+    :return: A list with a stats tuple for each item
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    keys = []
+    for alert_rule, subscription, triggers in items:
+        keys.extend(build_alert_rule_stat_keys(alert_rule, subscription))
+        keys.extend(build_trigger_stat_keys(alert_rule, subscription, triggers))
+    results = get_redis_client().mget(keys)
+    results = (0 if result is None else int(result) for result in results)
+
+    stats = []
+    for _, _, triggers in items:
+        last_update = to_datetime(next(results))
+        trigger_alert_counts = {}
+        trigger_resolve_counts = {}
+        for trigger in triggers:
+            trigger_alert_counts[trigger.id] = next(results)
+            trigger_resolve_counts[trigger.id] = next(results)
+        stats.append((last_update, trigger_alert_counts, trigger_resolve_counts))
+
+    return stats
+
+
+def update_alert_rule_stats(
+    alert_rule, subscription, last_update, alert_counts, resolve_counts, pipeline=None
+):
     """
     Updates stats about the alert rule, subscription and triggers if they've changed.
+    If a `pipeline` is passed the updates are only added to it, and the caller has to
+    execute it.
     """
-    pipeline = get_redis_client().pipeline()
+    if pipeline is None:
+        pipeline = get_redis_client().pipeline()
+        execute = True
+    else:
+        execute = False
 
     counts_with_stat_keys = zip(ALERT_RULE_TRIGGER_STAT_KEYS, (alert_counts, resolve_counts))
     for stat_key, trigger_counts in counts_with_stat_keys:
@@ -717,7 +821,8 @@ def update_alert_rule_stats(alert_rule, subscription, last_update, alert_counts,
 
     last_update_key = build_alert_rule_stat_keys(alert_rule, subscription)[0]
     pipeline.set(last_update_key, int(to_timestamp(last_update)), ex=REDIS_TTL)
-    pipeline.execute()
+    if execute:
+        pipeline.execute()
 
 
 def get_redis_client():
@@ -17,7 +17,7 @@ from sentry.incidents.models import (
     IncidentStatusMethod,
 )
 from sentry.models import Project
-from sentry.snuba.query_subscription_consumer import register_subscriber
+from sentry.snuba.query_subscription_consumer import register_batch_subscriber, register_subscriber
 from sentry.tasks.base import instrumented_task
 from sentry.utils import metrics
 from sentry.utils.email import MessageBuilder
@@ -148,6 +148,20 @@ def handle_snuba_query_update(subscription_update, subscription):
         SubscriptionProcessor(subscription).process_update(subscription_update)
 
 
+@register_batch_subscriber(INCIDENTS_SNUBA_SUBSCRIPTION_TYPE)
+def handle_snuba_query_updates(updates):
+    """
+    Handles many subscription updates for `QuerySubscription`s at once.
+    :param updates: A list of ``(subscription_update, subscription)`` tuples, see
+    `handle_snuba_query_update`
+    """
+    from sentry.incidents.subscription_processor import process_subscription_updates
+
+    # noinspection SpellCheckingInspection
+    with metrics.timer("incidents.subscription_procesor.process_updates"):
+        process_subscription_updates(updates)
+
+
 @instrumented_task(
     name="sentry.incidents.tasks.handle_trigger_action",
     queue="incidents",
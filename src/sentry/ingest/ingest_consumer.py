@@ -31,7 +31,7 @@ from sentry.ingest.userreport import Conflict, save_userreport
 from sentry.killswitches import killswitch_matches_context
 from sentry.models import Project
 from sentry.signals import event_accepted
-from sentry.tasks.store import preprocess_event, save_event_transaction
+from sentry.tasks.store import batch_save_events, preprocess_event, save_event_transaction
 from sentry.utils import json, metrics
 from sentry.utils.batching_kafka_consumer import AbstractBatchWorker
 from sentry.utils.cache import cache_key_for_event
@@ -125,7 +125,9 @@ class IngestConsumerWorker(AbstractBatchWorker):
                     process_attachment_chunk(attachment_chunk, projects=projects)
 
         if other_messages:
-            with metrics.timer("ingest_consumer.process_other_messages_batch"):
+            # Error events that do not need processing are saved together per
+            # project once the whole batch has been preprocessed.
+            with metrics.timer("ingest_consumer.process_other_messages_batch"), batch_save_events():
                 other_messages_flush_start = time.monotonic()
 
                 # Keep a mapping of futures to their metadata so that we can
@@ -1,11 +1,16 @@
 import base64
 import errno
 import logging
+import os
 import re
 import sys
+import threading
 import time
 import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from hashlib import sha1
 from io import BytesIO
 from os.path import splitext
 from typing import IO, Optional, Tuple
@@ -29,6 +34,8 @@ from sentry.utils import json, metrics
 # holding the results of attempting to fetch both kinds of files, either from the
 # database or from the internet
 from sentry.utils.cache import cache
+from sentry.utils.concurrent import SingleFlight
+from sentry.utils.datastructures import LRUCache
 from sentry.utils.files import compress_file
 from sentry.utils.hashlib import md5_text
 from sentry.utils.http import is_valid_origin
@@ -36,7 +43,7 @@ from sentry.utils.retries import ConditionalRetryPolicy, exponential_delay
 from sentry.utils.safe import get_path
 from sentry.utils.urls import non_standard_url_join
 
-from .cache import SourceCache, SourceMapCache
+from .cache import SourceCache, SourceMapCache, make_source_view
 
 __all__ = ["JavaScriptStacktraceProcessor"]
 
@@ -74,9 +81,42 @@ CACHE_CONTROL_MIN = 60
 MAX_RESOURCE_FETCHES = 100
 
 CACHE_MAX_VALUE_SIZE = settings.SENTRY_CACHE_MAX_VALUE_SIZE
+# the number of bytes of raw files whose parsed source views and sourcemaps are
+# kept in memory across events (see `parsed_artifact_cache`). Parsed views take
+# several times the size of their file, so this is well below the memory that
+# the cache may use.
+PARSED_CACHE_MAX_SIZE = 32 * 1024 * 1024
+
+# Passed for the index entry of a url that was not looked up yet
+UNSET = object()
 
 logger = logging.getLogger(__name__)
 
+# A parsed source file, along with the url it was fetched from and the url of
+# its sourcemap. ``size`` is the size of the raw file.
+ParsedSource = namedtuple("ParsedSource", ["url", "source_view", "sourcemap_url", "size"])
+ParsedSourceMap = namedtuple("ParsedSourceMap", ["sourcemap_view", "size"])
+
+# Parsing large sourcemaps is a lot more expensive than fetching them, and
+# every event of a release needs the same ones. This keeps the parsed views
+# around for the whole process, keyed by ``(release, dist, url, sha1)``. As
+# the key contains the checksum of the file, re-uploaded files never hit a
+# stale entry. Entries are sized by their file, which understates the memory
+# of the parsed views (see `PARSED_CACHE_MAX_SIZE`).
+parsed_artifact_cache = LRUCache(maxsize=PARSED_CACHE_MAX_SIZE, getsizeof=lambda value: value.size)
+
+# Concurrent events of the same release usually need the same artifacts. This
+# makes sure that only one of them fetches an artifact at a time, and the
+# others reuse its result.
+fetch_flight = SingleFlight()
+
+# The pool that fetches the artifacts of events concurrently. It lives as long
+# as the process, so that its threads keep their database connections across
+# events instead of opening new ones for every event.
+_fetch_executor = None
+_fetch_executor_key = None
+_fetch_executor_lock = threading.Lock()
+
 
 class UnparseableSourcemap(http.BadSource):
     error_type = EventError.JS_INVALID_SOURCEMAP
@@ -382,6 +422,27 @@ def fetch_release_file(filename, release, dist=None):
     return result
 
 
+def get_fetch_executor(max_workers):
+    """
+    Returns the process-wide pool for fetching artifacts. A new pool is only
+    created in forked processes or when ``max_workers`` changes.
+    """
+    global _fetch_executor, _fetch_executor_key
+
+    key = (os.getpid(), max_workers)
+    with _fetch_executor_lock:
+        if _fetch_executor_key != key:
+            # The threads of a pool inherited from a parent process do not
+            # exist in this one, so it must not be shut down here.
+            if _fetch_executor is not None and _fetch_executor_key[0] == key[0]:
+                _fetch_executor.shutdown(wait=False)
+            _fetch_executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="sourcemaps-fetch"
+            )
+            _fetch_executor_key = key
+        return _fetch_executor
+
+
 @metrics.wraps("sourcemaps.get_from_archive")
 def get_from_archive(url: str, archive: ReleaseArchive) -> Tuple[bytes, dict]:
     candidates = ReleaseFile.normalize(url)
@@ -432,16 +493,19 @@ def get_index_entry(release, dist, url) -> Optional[dict]:
 
 
 @metrics.wraps("sourcemaps.fetch_release_archive")
-def fetch_release_archive_for_url(release, dist, url) -> Optional[IO]:
+def fetch_release_archive_for_url(release, dist, url, index_entry=UNSET) -> Optional[IO]:
     """Fetch release archive and cache if possible.
 
     Multiple archives might have been uploaded, so we need the URL
-    to get the correct archive from the artifact index.
+    to get the correct archive from the artifact index. Callers that already
+    looked up the index entry of the URL pass it as `index_entry`.
 
     If return value is not empty, the caller is responsible for closing the stream.
     """
-    with sentry_sdk.start_span(op="fetch_release_archive_for_url.get_index_entry"):
-        info = get_index_entry(release, dist, url)
+    info = index_entry
+    if info is UNSET:
+        with sentry_sdk.start_span(op="fetch_release_archive_for_url.get_index_entry"):
+            info = get_index_entry(release, dist, url)
     if info is None:
         # Cannot write negative cache entry here because ID of release archive
         # is not yet known
@@ -514,7 +578,7 @@ def compress(fp: IO) -> Tuple[bytes, bytes]:
     return zlib.compress(content), content
 
 
-def fetch_release_artifact(url, release, dist):
+def fetch_release_artifact(url, release, dist, index_entry=UNSET):
     """
     Get a release artifact either by extracting it or fetching it directly.
 
@@ -532,7 +596,7 @@ def fetch_release_artifact(url, release, dist):
         return result_from_cache(url, result)
 
     start = time.monotonic()
-    archive_file = fetch_release_archive_for_url(release, dist, url)
+    archive_file = fetch_release_archive_for_url(release, dist, url, index_entry=index_entry)
     if archive_file is not None:
         try:
             archive = ReleaseArchive(archive_file)
@@ -586,7 +650,7 @@ def fetch_release_artifact(url, release, dist):
     return result
 
 
-def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True):
+def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True, index_entry=UNSET):
     """
     Pull down a URL, returning a UrlResult object.
 
@@ -602,7 +666,7 @@ def fetch_file(url, project=None, release=None, dist=None, allow_scraping=True):
 
     # if we've got a release to look on, try that first (incl associated cache)
     if release:
-        result = fetch_release_artifact(url, release, dist)
+        result = fetch_release_artifact(url, release, dist, index_entry=index_entry)
     else:
         result = None
 
@@ -720,6 +784,35 @@ def get_max_age(headers):
     return min(max_age, CACHE_CONTROL_MAX)
 
 
+def get_parsed_artifact_cache_key(url, release, dist, checksum):
+    return (release.id if release else None, dist.id if dist else None, url, checksum)
+
+
+def get_release_index_entry(url, release, dist):
+    """
+    Returns the artifact index entry of a release artifact, if it was uploaded
+    in a release archive. The entry contains the checksum of the artifact, so
+    parsed artifacts can be looked up without fetching the artifact itself.
+    """
+    if not release:
+        return None
+
+    return get_index_entry(release, dist, url)
+
+
+def get_cached_parsed_artifact(url, release, dist, kind, checksum):
+    if checksum is None:
+        return None
+
+    value = parsed_artifact_cache.get(get_parsed_artifact_cache_key(url, release, dist, checksum))
+    metrics.incr(
+        "sourcemaps.parsed_cache",
+        tags={"kind": kind, "result": "hit" if value is not None else "miss"},
+        skip_internal=True,
+    )
+    return value
+
+
 def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=True):
     if is_data_uri(url):
         try:
@@ -729,16 +822,40 @@ def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=T
             )
         except TypeError as e:
             raise UnparseableSourcemap({"url": "<base64>", "reason": str(e)})
-    else:
-        # look in the database and, if not found, optionally try to scrape the web
-        result = fetch_file(
-            url,
-            project=project,
-            release=release,
-            dist=dist,
-            allow_scraping=allow_scraping,
-        )
-        body = result.body
+        return parse_sourcemap(url, body)
+
+    index_entry = get_release_index_entry(url, release, dist)
+    cached = get_cached_parsed_artifact(
+        url, release, dist, "sourcemap", index_entry and index_entry.get("sha1")
+    )
+    if cached is not None:
+        return cached.sourcemap_view
+
+    # look in the database and, if not found, optionally try to scrape the web
+    result = fetch_file(
+        url,
+        project=project,
+        release=release,
+        dist=dist,
+        allow_scraping=allow_scraping,
+        index_entry=index_entry,
+    )
+    body = result.body
+
+    checksum = sha1(body).hexdigest()
+    cached = get_cached_parsed_artifact(url, release, dist, "sourcemap", checksum)
+    if cached is not None:
+        return cached.sourcemap_view
+
+    sourcemap_view = parse_sourcemap(url, body)
+    parsed_artifact_cache.set(
+        get_parsed_artifact_cache_key(url, release, dist, checksum),
+        ParsedSourceMap(sourcemap_view, len(body)),
+    )
+    return sourcemap_view
+
+
+def parse_sourcemap(url, body):
     try:
         return SourceMapView.from_json_bytes(body)
     except Exception as exc:
@@ -1129,9 +1246,57 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             cache.add_error(filename, {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES})
             return
 
-        # TODO: respect cache-control/max-age headers to some extent
-        logger.debug("Attempting to cache source %r", filename)
         try:
+            parsed = self._fetch_source(filename)
+        except http.BadSource as exc:
+            self._add_source_error(filename, exc)
+            return
+
+        sourcemap_url = self._add_source(filename, parsed)
+        if not sourcemap_url or sourcemap_url in sourcemaps:
+            return
+
+        # pull down sourcemap
+        try:
+            sourcemap_view = self._fetch_sourcemap(sourcemap_url)
+        except http.BadSource as exc:
+            # we don't perform the same check here as above, because if someone has
+            # uploaded a node_modules file, which has a sourceMappingURL, they
+            # presumably would like it mapped (and would like to know why it's not
+            # working, if that's the case). If they're not looking for it to be
+            # mapped, then they shouldn't be uploading the source file in the
+            # first place.
+            cache.add_error(filename, exc.data)
+            return
+
+        self._add_sourcemap(sourcemap_url, sourcemap_view)
+
+    def _get_fetch_key(self, kind, url):
+        return (
+            kind,
+            self.project.id,
+            self.release.id if self.release else None,
+            self.dist.id if self.dist else None,
+            url,
+        )
+
+    def _fetch_source(self, filename):
+        """
+        Returns the `ParsedSource` of a source file. Raises `http.BadSource`
+        if the file cannot be fetched.
+
+        Does not modify the processor, so that it can be called concurrently.
+        """
+        index_entry = get_release_index_entry(filename, self.release, self.dist)
+        parsed = get_cached_parsed_artifact(
+            filename, self.release, self.dist, "source", index_entry and index_entry.get("sha1")
+        )
+        if parsed is not None:
+            return parsed
+
+        def fetch():
+            # TODO: respect cache-control/max-age headers to some extent
+            logger.debug("Attempting to cache source %r", filename)
             # this both looks in the database and tries to scrape the internet
             with sentry_sdk.start_span(
                 op="JavaScriptStacktraceProcessor.cache_source.fetch_file"
@@ -1143,56 +1308,85 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                     release=self.release,
                     dist=self.dist,
                     allow_scraping=self.allow_scraping,
+                    index_entry=index_entry,
                 )
-        except http.BadSource as exc:
-            # most people don't upload release artifacts for their third-party libraries,
-            # so ignore missing node_modules files
-            if exc.data["type"] == EventError.JS_MISSING_SOURCE and "node_modules" in filename:
-                pass
-            else:
-                cache.add_error(filename, exc.data)
 
-            # either way, there's no more for us to do here, since we don't have
-            # a valid file to cache
-            return
-        cache.add(filename, result.body, result.encoding)
-        cache.alias(result.url, filename)
+            checksum = sha1(result.body).hexdigest()
+            parsed = get_cached_parsed_artifact(
+                filename, self.release, self.dist, "source", checksum
+            )
+            if parsed is None:
+                parsed = ParsedSource(
+                    url=result.url,
+                    source_view=make_source_view(result.body, result.encoding),
+                    sourcemap_url=discover_sourcemap(result),
+                    size=len(result.body),
+                )
+                parsed_artifact_cache.set(
+                    get_parsed_artifact_cache_key(filename, self.release, self.dist, checksum),
+                    parsed,
+                )
+            return parsed
 
-        sourcemap_url = discover_sourcemap(result)
-        if not sourcemap_url:
-            return
+        return fetch_flight.do(self._get_fetch_key("source", filename), fetch)
 
-        logger.debug(
-            "Found sourcemap URL %r for minified script %r", sourcemap_url[:256], result.url
-        )
-        sourcemaps.link(filename, sourcemap_url)
-        if sourcemap_url in sourcemaps:
-            return
+    def _fetch_sourcemap(self, sourcemap_url):
+        """
+        Returns the `SourceMapView` of a sourcemap. Raises `http.BadSource` if
+        the sourcemap cannot be fetched or parsed.
 
-        # pull down sourcemap
-        try:
+        Does not modify the processor, so that it can be called concurrently.
+        """
+
+        def fetch():
             with sentry_sdk.start_span(
                 op="JavaScriptStacktraceProcessor.cache_source.fetch_sourcemap"
             ) as span:
                 span.set_data("sourcemap_url", sourcemap_url)
-                sourcemap_view = fetch_sourcemap(
+                return fetch_sourcemap(
                     sourcemap_url,
                     project=self.project,
                     release=self.release,
                     dist=self.dist,
                     allow_scraping=self.allow_scraping,
                 )
-        except http.BadSource as exc:
-            # we don't perform the same check here as above, because if someone has
-            # uploaded a node_modules file, which has a sourceMappingURL, they
-            # presumably would like it mapped (and would like to know why it's not
-            # working, if that's the case). If they're not looking for it to be
-            # mapped, then they shouldn't be uploading the source file in the
-            # first place.
-            cache.add_error(filename, exc.data)
-            return
 
-        sourcemaps.add(sourcemap_url, sourcemap_view)
+        if is_data_uri(sourcemap_url):
+            return fetch()
+
+        return fetch_flight.do(self._get_fetch_key("sourcemap", sourcemap_url), fetch)
+
+    def _add_source_error(self, filename, exc):
+        # most people don't upload release artifacts for their third-party libraries,
+        # so ignore missing node_modules files
+        if exc.data["type"] == EventError.JS_MISSING_SOURCE and "node_modules" in filename:
+            pass
+        else:
+            self.cache.add_error(filename, exc.data)
+
+        # either way, there's no more for us to do here, since we don't have
+        # a valid file to cache
+
+    def _add_source(self, filename, parsed):
+        """
+        Adds a fetched source file to the cache and returns the url of its
+        sourcemap, if any.
+        """
+        self.cache.add(filename, parsed.source_view)
+        self.cache.alias(parsed.url, filename)
+
+        sourcemap_url = parsed.sourcemap_url
+        if not sourcemap_url:
+            return None
+
+        logger.debug(
+            "Found sourcemap URL %r for minified script %r", sourcemap_url[:256], parsed.url
+        )
+        self.sourcemaps.link(filename, sourcemap_url)
+        return sourcemap_url
+
+    def _add_sourcemap(self, sourcemap_url, sourcemap_view):
+        self.sourcemaps.add(sourcemap_url, sourcemap_view)
 
         # cache any inlined sources
         for src_id, source_name in sourcemap_view.iter_sources():
@@ -1200,10 +1394,39 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             if source_view is not None:
                 self.cache.add(non_standard_url_join(sourcemap_url, source_name), source_view)
 
+    def _fetch_concurrently(self, fetch, urls):
+        """
+        Calls ``fetch`` with every url of ``urls`` on the process-wide fetch
+        pool. Returns a list of ``(result, error)`` tuples in the order of
+        ``urls``, where ``error`` is the `http.BadSource` raised by ``fetch``,
+        if any.
+        """
+
+        def fetch_url(url):
+            try:
+                return fetch(url), None
+            except http.BadSource as exc:
+                return None, exc
+
+        concurrency = options.get("sourcemaps.fetch-concurrency")
+        if concurrency <= 1 or len(urls) <= 1:
+            return [fetch_url(url) for url in urls]
+
+        hub = sentry_sdk.Hub.current
+
+        def fetch_url_in_thread(url):
+            with sentry_sdk.Hub(hub):
+                return fetch_url(url)
+
+        return list(get_fetch_executor(concurrency).map(fetch_url_in_thread, urls))
+
     def populate_source_cache(self, frames):
         """
         Fetch all sources that we know are required (being referenced directly
         in frames).
+
+        Source files are fetched concurrently, followed by all of their
+        sourcemaps.
         """
         pending_file_list = set()
         for f in frames:
@@ -1221,12 +1444,47 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 continue
             pending_file_list.add(f["abs_path"])
 
-        for idx, filename in enumerate(pending_file_list):
-            with sentry_sdk.start_span(
-                op="JavaScriptStacktraceProcessor.populate_source_cache.cache_source"
-            ) as span:
-                span.set_data("filename", filename)
-                self.cache_source(filename=filename)
+        filenames = []
+        for filename in pending_file_list:
+            self.fetch_count += 1
+            if self.fetch_count > self.max_fetches:
+                self.cache.add_error(filename, {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES})
+            else:
+                filenames.append(filename)
+
+        with sentry_sdk.start_span(
+            op="JavaScriptStacktraceProcessor.populate_source_cache.fetch_sources"
+        ) as span:
+            span.set_data("count", len(filenames))
+            sources = self._fetch_concurrently(self._fetch_source, filenames)
+
+        # sourcemap url -> files that refer to the sourcemap
+        pending_sourcemaps = {}
+        for filename, (parsed, exc) in zip(filenames, sources):
+            if exc is not None:
+                self._add_source_error(filename, exc)
+                continue
+
+            sourcemap_url = self._add_source(filename, parsed)
+            if sourcemap_url and sourcemap_url not in self.sourcemaps:
+                pending_sourcemaps.setdefault(sourcemap_url, []).append(filename)
+
+        sourcemap_urls = list(pending_sourcemaps)
+        with sentry_sdk.start_span(
+            op="JavaScriptStacktraceProcessor.populate_source_cache.fetch_sourcemaps"
+        ) as span:
+            span.set_data("count", len(sourcemap_urls))
+            sourcemaps = self._fetch_concurrently(self._fetch_sourcemap, sourcemap_urls)
+
+        for sourcemap_url, (sourcemap_view, exc) in zip(sourcemap_urls, sourcemaps):
+            if exc is not None:
+                # see `cache_source` on why this error is reported for
+                # node_modules files as well.
+                for filename in pending_sourcemaps[sourcemap_url]:
+                    self.cache.add_error(filename, exc.data)
+                continue
+
+            self._add_sourcemap(sourcemap_url, sourcemap_view)
 
     def close(self):
         StacktraceProcessor.close(self)
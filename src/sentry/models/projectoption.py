@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, Any, Mapping, Optional, Sequence
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Sequence
 
 from django.db import models
 
@@ -69,6 +69,41 @@ class ProjectOptionManager(OptionManager["Project"]):
         values: Mapping[str, Value] = self._option_cache.get(cache_key, {})
         return values
 
+    def get_all_values_bulk(
+        self, projects: Sequence["Project"]
+    ) -> Mapping[int, Mapping[str, Value]]:
+        """
+        Like `get_all_values` for many projects, with one cache lookup and at
+        most one query for all of them. Subsequent `get_value` calls for these
+        projects are served from the local cache.
+        """
+        cache_keys = {self._make_key(project.id): project.id for project in projects}
+        result = {
+            project_id: self._option_cache[cache_key]
+            for cache_key, project_id in cache_keys.items()
+            if cache_key in self._option_cache
+        }
+
+        missing = [
+            cache_key for cache_key, project_id in cache_keys.items() if project_id not in result
+        ]
+        for cache_key, values in cache.get_many(missing).items():
+            if values is not None:
+                self._option_cache[cache_key] = result[cache_keys[cache_key]] = values
+
+        to_load = [project_id for project_id in cache_keys.values() if project_id not in result]
+        if to_load:
+            loaded: Dict[int, Dict[str, Value]] = {project_id: {} for project_id in to_load}
+            for option in self.filter(project__in=to_load):
+                loaded[option.project_id][option.key] = option.value
+
+            to_cache = {self._make_key(project_id): values for project_id, values in loaded.items()}
+            cache.set_many(to_cache)
+            self._option_cache.update(to_cache)
+            result.update(loaded)
+
+        return result
+
     def reload_cache(self, project_id: int, update_reason: str) -> Mapping[str, Value]:
         if update_reason != "projectoption.get_all_values":
             schedule_update_config_cache(
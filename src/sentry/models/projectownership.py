@@ -7,12 +7,18 @@ from django.utils import timezone
 from sentry.db.models import Model, sane_repr
 from sentry.db.models.fields import FlexibleForeignKey, JSONField
 from sentry.models import ActorTuple
-from sentry.ownership.grammar import Rule, load_schema, resolve_actors
-from sentry.utils import metrics
+from sentry.ownership.grammar import Rule, compile_schema, resolve_actors
+from sentry.utils import json, metrics
 from sentry.utils.cache import cache
+from sentry.utils.datastructures import LRUCache
+from sentry.utils.hashlib import md5_text
 
 READ_CACHE_DURATION = 3600
 
+#: Compiled rules of recently matched schemas, keyed by project and a digest
+#: of the schema. Entries never become stale, a changed schema has a new key.
+_compiled_rules_cache = LRUCache(maxsize=1000, ttl=READ_CACHE_DURATION)
+
 
 class ProjectOwnership(Model):
     __include_in_export__ = True
@@ -194,13 +200,19 @@ class ProjectOwnership(Model):
     def _matching_ownership_rules(
         cls, ownership: "ProjectOwnership", project_id: int, data: Mapping[str, Any]
     ) -> Sequence["Rule"]:
-        rules = []
-        if ownership.schema is not None:
-            for rule in load_schema(ownership.schema):
-                if rule.test(data):
-                    rules.append(rule)
+        if ownership.schema is None:
+            return []
+
+        return cls._get_compiled_rules(project_id, ownership.schema).match(data)
 
-        return rules
+    @classmethod
+    def _get_compiled_rules(cls, project_id, schema):
+        cache_key = (project_id, md5_text(json.dumps(schema)).hexdigest())
+        compiled_rules = _compiled_rules_cache.get(cache_key)
+        if compiled_rules is None:
+            compiled_rules = compile_schema(schema)
+            _compiled_rules_cache.set(cache_key, compiled_rules)
+        return compiled_rules
 
 
 # Signals update the cached reads used in post_processing
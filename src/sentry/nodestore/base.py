@@ -1,14 +1,17 @@
+import struct
 from threading import local
 
 import sentry_sdk
 from django.core.cache import InvalidCacheBackendError, caches
 
+from sentry import options
 from sentry.utils import json
 from sentry.utils.cache import memoize
+from sentry.utils.iterators import chunked
 from sentry.utils.services import Service
 
 # Cache an instance of the encoder we want to use
-json_dumps = json.JSONEncoder(
+json_dumps = json.RapidJSONEncoder(
     separators=(",", ":"),
     sort_keys=True,
     skipkeys=False,
@@ -20,7 +23,18 @@ json_dumps = json.JSONEncoder(
     default=None,
 ).encode
 
-json_loads = json._default_decoder.decode
+json_loads = json.loads
+
+# Nodes with subkeys start with this magic, followed by a header with the
+# name, offset and length of every payload in the node. This allows to decode
+# a single subkey without scanning or copying the rest of the node. Nodes
+# without the magic are newline-delimited (see `NodeStorage._decode_lines`).
+# Writing this format is gated by the ``nodestore.write-subkey-index`` option,
+# since older code can only read newline-delimited nodes.
+SUBKEY_INDEX_MAGIC = b"\x00nsk1"
+_subkey_index_count = struct.Struct(">H")
+# (length of subkey name, offset of payload, length of payload)
+_subkey_index_entry = struct.Struct(">HII")
 
 
 class NodeStorage(local, Service):
@@ -56,6 +70,13 @@ class NodeStorage(local, Service):
 
     This is used in reprocessing to store a snapshot of the event from multiple
     stages of the pipeline.
+
+    Backends that can read, write or delete many nodes in a single request
+    override `_get_bytes_multi`, `_set_bytes_multi` and `delete_multi`, as
+    the Django and Bigtable backends do. The default implementations loop over
+    the single-node methods serially: since `NodeStorage` is thread-local,
+    fanning them out to other threads would set up the backend (and its
+    clients) again in every thread.
     """
 
     __all__ = (
@@ -64,12 +85,18 @@ class NodeStorage(local, Service):
         "get",
         "get_multi",
         "set",
+        "set_multi",
         "set_subkeys",
+        "set_subkeys_multi",
         "cleanup",
         "validate",
         "bootstrap",
     )
 
+    #: The maximum number of nodes read, written or deleted per call to one of
+    #: the ``_multi`` methods.
+    multi_batch_size = 100
+
     def delete(self, id):
         """
         >>> nodestore.delete('key1')
@@ -92,12 +119,36 @@ class NodeStorage(local, Service):
         if value is None:
             return None
 
+        if value.startswith(SUBKEY_INDEX_MAGIC):
+            return self._decode_indexed(value, subkey)
+
+        return self._decode_lines(value, subkey)
+
+    def _decode_indexed(self, value, subkey):
+        # Those keys should be statically known identifiers in the app, such as
+        # "unprocessed_event". There is really no reason to allow anything but
+        # ASCII here. The default payload has an empty name.
+        name = b"" if subkey is None else subkey.encode("ascii")
+
+        view = memoryview(value)
+        pos = len(SUBKEY_INDEX_MAGIC)
+        (count,) = _subkey_index_count.unpack_from(view, pos)
+        pos += _subkey_index_count.size
+
+        for _ in range(count):
+            name_length, offset, length = _subkey_index_entry.unpack_from(view, pos)
+            pos += _subkey_index_entry.size
+            if view[pos : pos + name_length] == name:
+                # Decoding from bytes saves the round trip through str
+                return json_loads(bytes(view[offset : offset + length]))
+            pos += name_length
+
+        return None
+
+    def _decode_lines(self, value, subkey):
         lines_iter = iter(value.splitlines())
         try:
             if subkey is not None:
-                # Those keys should be statically known identifiers in the app, such as
-                # "unprocessed_event". There is really no reason to allow anything but
-                # ASCII here.
                 subkey = subkey.encode("ascii")
 
                 next(lines_iter)
@@ -179,10 +230,12 @@ class NodeStorage(local, Service):
             else:
                 uncached_ids = id_list
 
-            items = {
-                id: self._decode(value, subkey=subkey)
-                for id, value in self._get_bytes_multi(uncached_ids).items()
-            }
+            items = {}
+            for chunk in chunked(uncached_ids, self.multi_batch_size):
+                items.update(
+                    (id, self._decode(value, subkey=subkey))
+                    for id, value in self._get_bytes_multi(chunk).items()
+                )
             if subkey is None:
                 self._set_cache_items(items)
                 items.update(cache_items)
@@ -198,15 +251,58 @@ class NodeStorage(local, Service):
         independently. A `None` key must always be present which is served as
         the "default" subkey (the regular event payload).
 
+        Without any other subkeys the result is just the JSON of the default
+        payload. Otherwise the payloads are newline-delimited, following the
+        name of their subkey:
+
+        >>> _encode({"unprocessed": {}, None: {"stacktrace": {}}})
+        b'{"stacktrace":{}}\\nunprocessed\\n{}'
+
+        With the ``nodestore.write-subkey-index`` option, nodes with subkeys
+        are instead written as (all numbers big-endian):
+
+        * ``SUBKEY_INDEX_MAGIC``
+        * the number of payloads (2 bytes)
+        * for every payload, starting with the default one: the length of its
+          subkey name (2 bytes), its offset and its length (4 bytes each),
+          followed by the name itself
+        * the payloads, in the same order
+
         >>> _encode({"unprocessed": {}, None: {"stacktrace": {}}})
-        b'{"stacktrace": {}}\nunprocessed\n{}'
+        b'\\x00nsk1\\x00\\x02\\x00\\x00\\x00\\x00\\x00&\\x00\\x00\\x00\\x11\\x00\\x0b\\x00\\x00\\x007\\x00\\x00\\x00\\x02unprocessed{"stacktrace":{}}{}'
         """
-        lines = [json_dumps(data.pop(None)).encode("utf8")]
+        default = json_dumps(data.pop(None)).encode("utf8")
+        if not data:
+            return default
+
+        if not options.get("nodestore.write-subkey-index"):
+            lines = [default]
+            for key, value in data.items():
+                lines.append(key.encode("ascii"))
+                lines.append(json_dumps(value).encode("utf8"))
+
+            return b"\n".join(lines)
+
+        names = [b""]
+        payloads = [default]
         for key, value in data.items():
-            lines.append(key.encode("ascii"))
-            lines.append(json_dumps(value).encode("utf8"))
+            names.append(key.encode("ascii"))
+            payloads.append(json_dumps(value).encode("utf8"))
 
-        return b"\n".join(lines)
+        offset = (
+            len(SUBKEY_INDEX_MAGIC)
+            + _subkey_index_count.size
+            + _subkey_index_entry.size * len(names)
+            + sum(len(name) for name in names)
+        )
+
+        header = [SUBKEY_INDEX_MAGIC, _subkey_index_count.pack(len(names))]
+        for name, payload in zip(names, payloads):
+            header.append(_subkey_index_entry.pack(len(name), offset, len(payload)))
+            header.append(name)
+            offset += len(payload)
+
+        return b"".join(header + payloads)
 
     def _set_bytes(self, id, data, ttl=None):
         """
@@ -214,6 +310,13 @@ class NodeStorage(local, Service):
         """
         raise NotImplementedError
 
+    def _set_bytes_multi(self, items, ttl=None):
+        """
+        >>> nodestore._set_bytes_multi({'key1': b"{'foo': 'bar'}"})
+        """
+        for id, data in items.items():
+            self._set_bytes(id, data, ttl=ttl)
+
     def set(self, id, data, ttl=None):
         """
         Set value for `id`. Note that this deletes existing subkeys for `id` as
@@ -246,6 +349,35 @@ class NodeStorage(local, Service):
             # set cache only after encoding and write to nodestore has succeeded
             self._set_cache_item(id, cache_item)
 
+    def set_multi(self, items, ttl=None):
+        """
+        Set values for multiple ids. Like `set`, this deletes existing subkeys.
+
+        >>> nodestore.set_multi({'key1': {'foo': 'bar'}, 'key2': {'foo': 'baz'}})
+        """
+        return self.set_subkeys_multi({id: {None: data} for id, data in items.items()}, ttl=ttl)
+
+    def set_subkeys_multi(self, items, ttl=None):
+        """
+        Set values and subkeys for multiple ids.
+
+        Note: This is not guaranteed to be atomic and may result in a partial
+        write.
+
+        >>> nodestore.set_subkeys_multi({
+        ...    'key1': {None: {'foo': 'bar'}, "reprocessing": {'foo': 'bam'}},
+        ...    'key2': {None: {'foo': 'baz'}},
+        ... })
+        """
+        with sentry_sdk.start_span(op="nodestore.set_subkeys_multi") as span:
+            span.set_tag("num_ids", len(items))
+            cache_items = {id: data.get(None) for id, data in items.items()}
+            bytes_items = [(id, self._encode(data)) for id, data in items.items()]
+            for chunk in chunked(bytes_items, self.multi_batch_size):
+                self._set_bytes_multi(dict(chunk), ttl=ttl)
+            # set cache only after encoding and write to nodestore has succeeded
+            self._set_cache_items({id: data for id, data in cache_items.items() if data})
+
     def cleanup(self, cutoff_timestamp):
         raise NotImplementedError
 
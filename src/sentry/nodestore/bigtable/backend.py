@@ -3,6 +3,7 @@ import os
 import sentry_sdk
 
 from sentry.nodestore.base import NodeStorage
+from sentry.utils.iterators import chunked
 from sentry.utils.kvstore.bigtable import BigtableKVStorage
 
 
@@ -67,6 +68,9 @@ class BigtableNodeStorage(NodeStorage):
     def _set_bytes(self, id, data, ttl=None):
         self.store.set(id, data, ttl)
 
+    def _set_bytes_multi(self, items, ttl=None):
+        self.store.set_many(list(items.items()), ttl)
+
     def delete(self, id):
         if self.skip_deletes:
             return
@@ -89,7 +93,8 @@ class BigtableNodeStorage(NodeStorage):
                 return
 
             try:
-                self.store.delete_many(id_list)
+                for chunk in chunked(id_list, self.multi_batch_size):
+                    self.store.delete_many(chunk)
             finally:
                 self._delete_cache_items(id_list)
 
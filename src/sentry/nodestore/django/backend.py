@@ -1,19 +1,101 @@
 import logging
 import math
 import pickle
+import re
+from base64 import b64decode, b64encode
+from functools import lru_cache
 
+import zstandard
+from django.db import IntegrityError, router, transaction
 from django.utils import timezone
 
 from sentry.db.models import create_or_update
-from sentry.nodestore.base import NodeStorage
+from sentry.nodestore.base import SUBKEY_INDEX_MAGIC, NodeStorage
+from sentry.utils.codecs import ZstdCodec
+from sentry.utils.iterators import chunked
 from sentry.utils.strings import compress, decompress
 
 from .models import Node
 
 logger = logging.getLogger("sentry")
 
+# Prefix of node data compressed with zstd. Data written with
+# `sentry.utils.strings.compress` is plain base64 which never contains a colon.
+ZSTD_MAGIC = "zstd:"
+
+# Only used to pick the dictionary to compress a node with, so it does not
+# matter much if this matches the platform of a frame instead of the event.
+_platform_re = re.compile(rb'"platform":"([^"]+)"')
+
+
+@lru_cache(maxsize=None)
+def _load_zstd_dictionary(path):
+    with open(path, "rb") as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
 
 class DjangoNodeStorage(NodeStorage):
+    """
+    A Postgres-based backend for storing node data.
+
+    :param compression: ``"zlib"`` or ``"zstd"``. Nodes are always decompressed
+        according to how they were written, so this can be changed at any
+        time.
+    :param zstd_dictionaries: A mapping of platforms to paths of trained zstd
+        dictionaries (see ``zstd --train``), used to compress the nodes of
+        events of those platforms. A dictionary has to stay configured for as
+        long as nodes compressed with it exist.
+
+    >>> DjangoNodeStorage(
+    ...     compression="zstd",
+    ...     zstd_dictionaries={"python": "/etc/sentry/nodestore/python.dict"},
+    ... )
+    """
+
+    def __init__(self, compression="zlib", zstd_dictionaries=None):
+        if compression not in ("zlib", "zstd"):
+            raise ValueError('"compression" must be one of "zlib", "zstd"')
+
+        self.compression = compression
+        self.zstd_codec = ZstdCodec()
+        self.zstd_codecs_by_platform = {}
+        self.zstd_codecs_by_dict_id = {}
+
+        for platform, path in (zstd_dictionaries or {}).items():
+            dictionary = _load_zstd_dictionary(path)
+            codec = ZstdCodec(dictionary)
+            self.zstd_codecs_by_platform[platform] = codec
+            self.zstd_codecs_by_dict_id[dictionary.dict_id()] = codec
+
+    def _compress(self, data):
+        if self.compression != "zstd":
+            return compress(data)
+
+        codec = self.zstd_codec
+        if self.zstd_codecs_by_platform:
+            match = _platform_re.search(data)
+            if match is not None:
+                platform = match.group(1).decode("ascii", "replace")
+                codec = self.zstd_codecs_by_platform.get(platform, codec)
+
+        return ZSTD_MAGIC + b64encode(codec.encode(data)).decode("ascii")
+
+    def _decompress(self, data):
+        if not data.startswith(ZSTD_MAGIC):
+            return decompress(data)
+
+        frame = b64decode(data[len(ZSTD_MAGIC) :])
+        dict_id = zstandard.get_frame_parameters(frame).dict_id
+        if not dict_id:
+            return self.zstd_codec.decode(frame)
+
+        try:
+            codec = self.zstd_codecs_by_dict_id[dict_id]
+        except KeyError:
+            raise ValueError(f"Unknown zstd dictionary: {dict_id}")
+
+        return codec.decode(frame)
+
     def delete(self, id):
         Node.objects.filter(id=id).delete()
         self._delete_cache_item(id)
@@ -23,7 +105,7 @@ class DjangoNodeStorage(NodeStorage):
             return None
 
         try:
-            if value.startswith(b"{"):
+            if value.startswith(b"{") or value.startswith(SUBKEY_INDEX_MAGIC):
                 return NodeStorage._decode(self, value, subkey=subkey)
 
             if subkey is None:
@@ -37,19 +119,40 @@ class DjangoNodeStorage(NodeStorage):
     def _get_bytes(self, id):
         try:
             data = Node.objects.get(id=id).data
-            return decompress(data)
+            return self._decompress(data)
         except Node.DoesNotExist:
             return None
 
     def _get_bytes_multi(self, id_list):
-        return {n.id: decompress(n.data) for n in Node.objects.filter(id__in=id_list)}
+        return {n.id: self._decompress(n.data) for n in Node.objects.filter(id__in=id_list)}
 
     def delete_multi(self, id_list):
-        Node.objects.filter(id__in=id_list).delete()
+        for chunk in chunked(id_list, self.multi_batch_size):
+            Node.objects.filter(id__in=chunk).delete()
         self._delete_cache_items(id_list)
 
     def _set_bytes(self, id, data, ttl=None):
-        create_or_update(Node, id=id, values={"data": compress(data), "timestamp": timezone.now()})
+        create_or_update(
+            Node, id=id, values={"data": self._compress(data), "timestamp": timezone.now()}
+        )
+
+    def _set_bytes_multi(self, items, ttl=None):
+        timestamp = timezone.now()
+        nodes = [
+            Node(id=id, data=self._compress(data), timestamp=timestamp)
+            for id, data in items.items()
+        ]
+        try:
+            with transaction.atomic(using=router.db_for_write(Node)):
+                Node.objects.filter(id__in=list(items)).delete()
+                Node.objects.bulk_create(nodes)
+        except IntegrityError:
+            # Another writer created some of these nodes concurrently, which
+            # `create_or_update` can deal with.
+            for node in nodes:
+                create_or_update(
+                    Node, id=node.id, values={"data": node.data, "timestamp": timestamp}
+                )
 
     def cleanup(self, cutoff_timestamp):
         from sentry.db.deletion import BulkDeleteQuery
@@ -57,6 +57,9 @@ register(
     default=1024 * 1024 * 1024,
     flags=FLAG_PRIORITIZE_DISK,
 )
+# The number of threads of the pool that fetches the source files and
+# sourcemaps of events. Set to 1 to fetch them one after another.
+register("sourcemaps.fetch-concurrency", type=Int, default=4)
 
 
 # Mail
@@ -284,6 +287,10 @@ register("nodedata.cache-on-save", default=False, flags=FLAG_PRIORITIZE_DISK)
 # Use nodestore for eventstore.get_events
 register("eventstore.use-nodestore", default=False, flags=FLAG_PRIORITIZE_DISK)
 
+# Write nodes with subkeys in the indexed format instead of newline-delimited.
+# Only enable this once every reader of nodestore understands the format.
+register("nodestore.write-subkey-index", default=False, flags=FLAG_PRIORITIZE_DISK)
+
 # Alerts / Workflow incremental rollout rate. Tied to feature handlers in getsentry
 register("workflow.rollout-rate", default=0, flags=FLAG_PRIORITIZE_DISK)
 
@@ -345,6 +352,13 @@ register("store.background-grouping-sample-rate", default=0.0)
 # True if background grouping should run before secondary and primary grouping
 register("store.background-grouping-before", default=False)
 
+# Resolve GroupHash rows through the local/Redis cache while saving events
+register("store.grouphash-cache-enabled", default=False)
+
+# Maximum number of error events of a project that the ingest consumer saves
+# together in one save_event_batch task. 1 saves every event on its own.
+register("store.save-event-batch-size", default=1)
+
 # Store release files bundled as zip files
 register("processing.save-release-archives", default=False)  # unused
 
@@ -1,8 +1,8 @@
 import operator
 import re
 from collections import namedtuple
-from functools import reduce
-from typing import Iterable, List, Mapping, Pattern, Tuple
+from functools import lru_cache, reduce
+from typing import Any, Iterable, List, Mapping, Pattern, Sequence, Tuple
 
 from django.db.models import Q
 from parsimonious.exceptions import ParseError  # noqa
@@ -13,7 +13,7 @@ from sentry.models import ActorTuple
 from sentry.utils.glob import glob_match
 from sentry.utils.safe import get_path
 
-__all__ = ("parse_rules", "dump_schema", "load_schema")
+__all__ = ("parse_rules", "dump_schema", "load_schema", "compile_schema")
 
 VERSION = 1
 
@@ -233,6 +233,7 @@ class OwnershipVisitor(NodeVisitor):
         return children or node
 
 
+@lru_cache(maxsize=10000)
 def _path_to_regex(pattern: str) -> Pattern[str]:
     """
     ported from https://github.com/hmarr/codeowners/blob/d0452091447bd2a29ee508eebc5a79874fb5d4ff/match.go#L33
@@ -319,6 +320,98 @@ def _path_to_regex(pattern: str) -> Pattern[str]:
     return re.compile(regex)
 
 
+def _get_codeowners_literal(pattern: str) -> str:
+    """
+    Returns the longest literal part of a CODEOWNERS pattern. Every path that
+    `_path_to_regex` matches contains it, so it is a cheap pre-check before
+    running the regex.
+    """
+    if pattern[0] == "\\":
+        return ""
+
+    slash_pos = pattern.find("/")
+    anchored = slash_pos > -1 and slash_pos != len(pattern) - 1
+    # The leading slash of anchored patterns is optional, the trailing one is
+    # matched separately.
+    if anchored and pattern[0] == "/":
+        pattern = pattern[1:]
+    pattern = pattern.rstrip("/")
+
+    # A slash following a double star is consumed by it
+    return max(re.split(r"\*\*/|[*?]", pattern), key=len)
+
+
+class _EventValues:
+    """The values of an event which rules are matched against, extracted
+    from all frames in one pass and deduplicated."""
+
+    def __init__(self, data):
+        paths = {}
+        modules = {}
+        codeowners_paths = {}
+
+        for frame in _iter_frames(data):
+            filename = frame.get("filename")
+            abs_path = frame.get("abs_path")
+            module = frame.get("module")
+
+            if filename:
+                paths[filename] = None
+            if abs_path:
+                paths[abs_path] = None
+            if module:
+                modules[module] = None
+
+            # CODEOWNERS rules only look at the first available path of a frame
+            codeowners_path = filename or abs_path
+            if codeowners_path:
+                codeowners_paths[codeowners_path] = None
+
+        self.paths = list(paths)
+        self.modules = list(modules)
+        self.codeowners_paths = list(codeowners_paths)
+
+
+class CompiledRules:
+    """
+    The rules of an ownership schema, prepared for matching many events.
+
+    CODEOWNERS patterns are compiled once, and paired with a literal that
+    has to occur in a path before the regex is worth running. The frames of
+    an event are walked once per event instead of once per rule.
+    """
+
+    def __init__(self, rules: Sequence[Rule]):
+        self.rules = list(rules)
+        self._codeowners = {
+            i: (_get_codeowners_literal(rule.matcher.pattern), _path_to_regex(rule.matcher.pattern))
+            for i, rule in enumerate(self.rules)
+            if rule.matcher.type == CODEOWNERS
+        }
+
+    def match(self, data: Mapping[str, Any]) -> List[Rule]:
+        """Returns all rules matching the event, in order."""
+        values = _EventValues(data)
+        return [rule for i, rule in enumerate(self.rules) if self._test(i, rule, data, values)]
+
+    def _test(self, i, rule, data, values):
+        matcher = rule.matcher
+        if matcher.type == CODEOWNERS:
+            literal, regex = self._codeowners[i]
+            return any(
+                literal in value and regex.search(value) for value in values.codeowners_paths
+            )
+        elif matcher.type == PATH:
+            return _glob_match_any(values.paths, matcher.pattern)
+        elif matcher.type == MODULE:
+            return _glob_match_any(values.modules, matcher.pattern)
+        return matcher.test(data)
+
+
+def _glob_match_any(values, pattern):
+    return any(glob_match(value, pattern, ignorecase=True, path_normalize=True) for value in values)
+
+
 def _iter_frames(data):
     try:
         yield from get_path(data, "stacktrace", "frames", filter=True) or ()
@@ -355,6 +448,11 @@ def load_schema(schema):
     return [Rule.load(r) for r in schema["rules"]]
 
 
+def compile_schema(schema):
+    """Convert a JSON schema into `CompiledRules`"""
+    return CompiledRules(load_schema(schema))
+
+
 def convert_schema_to_rules_text(schema):
     rules = load_schema(schema)
     text = ""
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
 
 from sentry.utils.services import Service
 
 if TYPE_CHECKING:
     from sentry.models import Project
 
+#: A rate limit check of the form ``(key, limit, window)``.
+RateLimitCheck = Tuple[str, int, Optional[int]]
+
 
 class RateLimiter(Service):  # type: ignore
-    __all__ = ("is_limited", "validate", "current_value", "is_limited_with_value")
+    __all__ = (
+        "is_limited",
+        "validate",
+        "current_value",
+        "is_limited_with_value",
+        "is_limited_with_value_multi",
+    )
 
     window = 60
 
@@ -29,5 +38,18 @@ class RateLimiter(Service):  # type: ignore
     ) -> tuple[bool, int, int]:
         return False, 0, 0
 
+    def is_limited_with_value_multi(
+        self, checks: Sequence[RateLimitCheck], project: Project | None = None
+    ) -> list[tuple[bool, int, int]]:
+        """
+        Does several rate limit checks at once. Returns the result of
+        `is_limited_with_value` for every ``(key, limit, window)`` in
+        ``checks``, in the same order.
+        """
+        return [
+            self.is_limited_with_value(key, limit, project=project, window=window)
+            for key, limit, window in checks
+        ]
+
     def validate(self) -> None:
         raise NotImplementedError
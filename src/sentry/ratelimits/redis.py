@@ -1,14 +1,15 @@
 from __future__ import annotations
 
 import logging
+from functools import lru_cache
 from time import time
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Sequence
 
 from django.conf import settings
 from redis.exceptions import RedisError
 
 from sentry.exceptions import InvalidConfiguration
-from sentry.ratelimits.base import RateLimiter
+from sentry.ratelimits.base import RateLimitCheck, RateLimiter
 from sentry.utils import redis
 from sentry.utils.hashlib import md5_text
 
@@ -18,6 +19,11 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4096)
+def _hash_key(key: str) -> str:
+    return md5_text(key).hexdigest()
+
+
 def _time_bucket(request_time: float, window: int) -> int:
     """Bucket number lookup for given UTC time since epoch"""
     return int(request_time / window)
@@ -52,7 +58,7 @@ class RedisRateLimiter(RateLimiter):
         if request_time is None:
             request_time = time()
 
-        key_hex = md5_text(key).hexdigest()
+        key_hex = _hash_key(key)
         bucket = _time_bucket(request_time, window)
 
         redis_key = f"rl:{key_hex}"
@@ -96,21 +102,42 @@ class RedisRateLimiter(RateLimiter):
         Does a rate limit check as well as returning the new rate limit value and when the next
         rate limit window will start
         """
-        request_time = time()
-        if window is None or window == 0:
-            window = self.window
-        redis_key = self._construct_redis_key(key, project=project, window=window)
+        return self.is_limited_with_value_multi([(key, limit, window)], project=project)[0]
 
-        expiration = window - int(request_time % window)
-        # Reset Time = next time bucket's start time
-        reset_time = _bucket_start_time(_time_bucket(request_time, window) + 1, window)
-        try:
-            result = self.client.incr(redis_key)
-            self.client.expire(redis_key, expiration)
-        except RedisError:
-            # We don't want rate limited endpoints to fail when ratelimits
-            # can't be updated. We do want to know when that happens.
-            logger.exception("Failed to retrieve current value from redis")
-            return False, 0, reset_time
+    def is_limited_with_value_multi(
+        self, checks: Sequence[RateLimitCheck], project: Project | None = None
+    ) -> list[tuple[bool, int, int]]:
+        """
+        Does several rate limit checks in a single round trip to redis. The
+        counters are incremented and their expiration is set in one pipeline.
+        """
+        request_time = time()
 
-        return result > limit, result, reset_time
+        reset_times = []
+        with self.client.pipeline(transaction=False) as pipe:
+            for key, _, window in checks:
+                if window is None or window == 0:
+                    window = self.window
+                redis_key = self._construct_redis_key(
+                    key, project=project, window=window, request_time=request_time
+                )
+                # Reset Time = next time bucket's start time
+                reset_times.append(
+                    _bucket_start_time(_time_bucket(request_time, window) + 1, window)
+                )
+
+                pipe.incr(redis_key)
+                pipe.expire(redis_key, window - int(request_time % window))
+
+            try:
+                results = pipe.execute()[::2]
+            except RedisError:
+                # We don't want rate limited endpoints to fail when ratelimits
+                # can't be updated. We do want to know when that happens.
+                logger.exception("Failed to retrieve current value from redis")
+                return [(False, 0, reset_time) for reset_time in reset_times]
+
+        return [
+            (result > limit, result, reset_time)
+            for (_, limit, _), result, reset_time in zip(checks, results, reset_times)
+        ]
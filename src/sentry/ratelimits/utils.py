@@ -142,6 +142,10 @@ def for_organization_member_invite(
     """
     Rate limit logic for triggering a user invite email, which should also be
     applied for generating a brand new member invite when possible.
+
+    Every check counts the attempt, even if an earlier one is already over its
+    limit, so a limited user keeps counting towards the organization and email
+    limits. The checks share one round trip to the rate limiter.
     """
     if config is None:
         config = DEFAULT_CONFIG
@@ -149,25 +153,32 @@ def for_organization_member_invite(
     if not features.has("organizations:invite-members-rate-limits", organization, actor=user):
         return False
 
-    return any(
-        (
-            ratelimiter.is_limited(
+    checks = []
+    if user or auth:
+        checks.append(
+            (
                 "members:invite-by-user:{}".format(
                     md5_text(user.id if user and user.is_authenticated else str(auth)).hexdigest()
                 ),
-                **config["members:invite-by-user"],
+                config["members:invite-by-user"]["limit"],
+                config["members:invite-by-user"]["window"],
             )
-            if (user or auth)
-            else None,
-            ratelimiter.is_limited(
-                f"members:invite-by-org:{md5_text(organization.id).hexdigest()}",
-                **config["members:invite-by-org"],
-            ),
-            ratelimiter.is_limited(
-                "members:org-invite-to-email:{}-{}".format(
-                    organization.id, md5_text(email.lower()).hexdigest()
-                ),
-                **config["members:org-invite-to-email"],
+        )
+    checks.append(
+        (
+            f"members:invite-by-org:{md5_text(organization.id).hexdigest()}",
+            config["members:invite-by-org"]["limit"],
+            config["members:invite-by-org"]["window"],
+        )
+    )
+    checks.append(
+        (
+            "members:org-invite-to-email:{}-{}".format(
+                organization.id, md5_text(email.lower()).hexdigest()
             ),
+            config["members:org-invite-to-email"]["limit"],
+            config["members:org-invite-to-email"]["window"],
         )
     )
+
+    return any(is_limited for is_limited, _, _ in ratelimiter.is_limited_with_value_multi(checks))
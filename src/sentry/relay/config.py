@@ -1,6 +1,7 @@
 import uuid
+from collections import defaultdict
 from datetime import datetime
-from typing import Any, List, Mapping, Optional
+from typing import Any, Collection, List, Mapping, MutableMapping, Optional, Sequence
 
 from pytz import utc
 from sentry_sdk import Hub, capture_exception
@@ -16,7 +17,7 @@ from sentry.ingest.inbound_filters import (
     get_filter_key,
 )
 from sentry.interfaces.security import DEFAULT_DISALLOWED_SOURCES
-from sentry.models import Project
+from sentry.models import Organization, Project, ProjectKey, ProjectOption
 from sentry.relay.utils import to_camel_case_name
 from sentry.utils.http import get_origins
 from sentry.utils.sdk import configure_scope
@@ -26,13 +27,25 @@ EXPOSABLE_FEATURES = [
     "organizations:metrics-extraction",
 ]
 
+#: Organization features that change the contents of a full project config
+CONFIG_ORGANIZATION_FEATURES = [
+    "organizations:filters-and-sampling",
+    "organizations:performance-ops-breakdown",
+    "organizations:transaction-metrics-extraction",
+]
+
 
-def get_exposed_features(project: Project) -> List[str]:
+def get_exposed_features(
+    project: Project, organization_features: Optional[Collection[str]] = None
+) -> List[str]:
 
     active_features = []
     for feature in EXPOSABLE_FEATURES:
         if feature.startswith("organizations:"):
-            if features.has(feature, project.organization):
+            if organization_features is not None:
+                if feature in organization_features:
+                    active_features.append(feature)
+            elif features.has(feature, project.organization):
                 active_features.append(feature)
 
         elif feature.startswith("projects:"):
@@ -110,6 +123,83 @@ def get_quotas(project, keys=None):
     return [quota.to_json() for quota in quotas.get_quotas(project, keys=keys)]
 
 
+def get_organization_settings(
+    organization: Organization, full_config: bool = True
+) -> Mapping[str, Any]:
+    """
+    Computes the parts of a project config that only depend on the
+    organization, such that they can be shared by all of its projects.
+    """
+    organization_features = {
+        feature
+        for feature in CONFIG_ORGANIZATION_FEATURES + EXPOSABLE_FEATURES
+        if feature.startswith("organizations:") and features.has(feature, organization)
+    }
+
+    settings = {
+        "features": organization_features,
+        "trustedRelays": [
+            r["public_key"] for r in organization.get_option("sentry:trusted-relays", []) if r
+        ],
+    }
+    if full_config:
+        settings["eventRetention"] = quotas.get_event_retention(organization)
+
+    return settings
+
+
+def get_project_configs(project_keys: Sequence[ProjectKey]) -> MutableMapping[str, Any]:
+    """
+    Constructs the full configs of many project keys at once and returns a
+    dictionary mapping their public keys to the config dictionaries.
+
+    Organization settings are computed once per organization, project options
+    are loaded for all projects in bulk and everything apart from the key
+    specific parts is computed once per project. Bind the projects and their
+    organizations on the keys, otherwise they are loaded one by one.
+    """
+    keys_by_project = defaultdict(list)
+    for project_key in project_keys:
+        keys_by_project[project_key.project].append(project_key)
+
+    ProjectOption.objects.get_all_values_bulk(list(keys_by_project))
+
+    organization_settings = {}
+    configs = {}
+
+    for project, keys in keys_by_project.items():
+        if project.organization_id not in organization_settings:
+            organization_settings[project.organization_id] = get_organization_settings(
+                project.organization
+            )
+
+        first_key, other_keys = keys[0], keys[1:]
+        project_config = _get_project_config(
+            project,
+            full_config=True,
+            project_keys=[first_key],
+            organization_settings=organization_settings[project.organization_id],
+        ).to_dict()
+        configs[first_key.public_key] = project_config
+
+        for project_key in other_keys:
+            if project_config.get("disabled"):
+                configs[project_key.public_key] = project_config
+                continue
+
+            # Only the public keys and quotas differ between the keys of a
+            # project.
+            configs[project_key.public_key] = dict(
+                project_config,
+                publicKeys=get_public_key_configs(project, True, project_keys=[project_key]),
+                config=dict(
+                    project_config["config"], quotas=get_quotas(project, keys=[project_key])
+                ),
+            )
+
+    return configs
+
+
 def get_project_config(project, full_config=True, project_keys=None):
     """
     Constructs the ProjectConfig information.
@@ -127,12 +217,22 @@ def get_project_config(project, full_config=True, project_keys=None):
 
     :return: a ProjectConfig object for the given project
     """
+    return _get_project_config(project, full_config=full_config, project_keys=project_keys)
+
+
+def _get_project_config(project, full_config=True, project_keys=None, organization_settings=None):
     with configure_scope() as scope:
         scope.set_tag("project", project.id)
 
     if project.status != ObjectStatus.VISIBLE:
         return ProjectConfig(project, disabled=True)
 
+    if organization_settings is None:
+        organization_settings = get_organization_settings(
+            project.organization, full_config=full_config
+        )
+    organization_features = organization_settings["features"]
+
     public_keys = get_public_key_configs(project, full_config, project_keys=project_keys)
 
     with Hub.current.start_span(op="get_public_config"):
@@ -145,24 +245,18 @@ def get_project_config(project, full_config=True, project_keys=None):
             "rev": project.get_option("sentry:relay-rev", uuid.uuid4().hex),
             "publicKeys": public_keys,
             "config": {
-                "allowedDomains": list(get_origins(project)),
-                "trustedRelays": [
-                    r["public_key"]
-                    for r in project.organization.get_option("sentry:trusted-relays", [])
-                    if r
-                ],
+                # Sorted so that configs of unchanged projects serialize
+                # identically, see `RedisProjectConfigCache.set_many`.
+                "allowedDomains": sorted(get_origins(project)),
+                "trustedRelays": organization_settings["trustedRelays"],
                 "piiConfig": get_pii_config(project),
                 "datascrubbingSettings": get_datascrubbing_settings(project),
-                "features": get_exposed_features(project),
+                "features": get_exposed_features(project, organization_features),
             },
             "organizationId": project.organization_id,
             "projectId": project.id,  # XXX: Unused by Relay, required by Python store
         }
-    allow_dynamic_sampling = features.has(
-        "organizations:filters-and-sampling",
-        project.organization,
-    )
-    if allow_dynamic_sampling:
+    if "organizations:filters-and-sampling" in organization_features:
         dynamic_sampling = project.get_option("sentry:dynamic_sampling")
         if dynamic_sampling is not None:
             cfg["config"]["dynamicSampling"] = dynamic_sampling
@@ -171,9 +265,9 @@ def get_project_config(project, full_config=True, project_keys=None):
         # This is all we need for external Relay processors
         return ProjectConfig(project, **cfg)
 
-    if features.has("organizations:performance-ops-breakdown", project.organization):
+    if "organizations:performance-ops-breakdown" in organization_features:
         cfg["config"]["breakdownsV2"] = project.get_option("sentry:breakdowns")
-    if features.has("organizations:transaction-metrics-extraction", project.organization):
+    if "organizations:transaction-metrics-extraction" in organization_features:
         cfg["config"]["transactionMetrics"] = get_transaction_metrics_settings(
             project, cfg["config"].get("breakdownsV2")
         )
@@ -184,7 +278,7 @@ def get_project_config(project, full_config=True, project_keys=None):
     with Hub.current.start_span(op="get_grouping_config_dict_for_project"):
         cfg["config"]["groupingConfig"] = get_grouping_config_dict_for_project(project)
     with Hub.current.start_span(op="get_event_retention"):
-        cfg["config"]["eventRetention"] = quotas.get_event_retention(project.organization)
+        cfg["config"]["eventRetention"] = organization_settings["eventRetention"]
     with Hub.current.start_span(op="get_all_quotas"):
         cfg["config"]["quotas"] = get_quotas(project, keys=project_keys)
 
@@ -1,9 +1,20 @@
 from sentry.relay.projectconfig_cache.base import ProjectConfigCache
-from sentry.utils import json, redis
+from sentry.utils import json, metrics, redis
+from sentry.utils.hashlib import md5_text
 from sentry.utils.redis import validate_dynamic_cluster
 
 REDIS_CACHE_TIMEOUT = 3600  # 1 hr
 
+#: Fields of a project config which change on every build. They are left out
+#: of the digest that decides whether a cached config needs to be rewritten.
+VOLATILE_CONFIG_FIELDS = ("lastFetch", "lastChange", "rev")
+
+
+def get_config_digest(config):
+    return md5_text(
+        json.dumps({k: v for k, v in config.items() if k not in VOLATILE_CONFIG_FIELDS})
+    ).hexdigest()
+
 
 class RedisProjectConfigCache(ProjectConfigCache):
     def __init__(self, **options):
@@ -18,19 +29,69 @@ class RedisProjectConfigCache(ProjectConfigCache):
     def __get_redis_key(self, public_key):
         return f"relayconfig:{public_key}"
 
+    def __get_digest_key(self, public_key):
+        return f"relayconfig-digest:{public_key}"
+
     def set_many(self, configs):
+        """
+        Writes configs whose content changed since they were last written.
+        Unchanged configs only have their expiry extended, which keeps large
+        rebuilds from rewriting every config of an organization.
+        """
+        public_keys = list(configs)
+        digests = {public_key: get_config_digest(configs[public_key]) for public_key in public_keys}
+
         # Note: Those are multiple pipelines, one per cluster node
         p = self.cluster.pipeline()
-        for public_key, config in configs.items():
-            p.setex(self.__get_redis_key(public_key), REDIS_CACHE_TIMEOUT, json.dumps(config))
+        for public_key in public_keys:
+            p.get(self.__get_digest_key(public_key))
+        stored_digests = p.execute()
 
-        p.execute()
+        unchanged = [
+            public_key
+            for public_key, stored_digest in zip(public_keys, stored_digests)
+            if stored_digest == digests[public_key]
+        ]
+
+        refreshed = set()
+        if unchanged:
+            p = self.cluster.pipeline()
+            for public_key in unchanged:
+                p.expire(self.__get_redis_key(public_key), REDIS_CACHE_TIMEOUT)
+                p.expire(self.__get_digest_key(public_key), REDIS_CACHE_TIMEOUT)
+            # A config can be gone while its digest is still around, e.g. if
+            # it got evicted. Those have to be written again.
+            refreshed.update(
+                public_key for public_key, found in zip(unchanged, p.execute()[::2]) if found
+            )
+
+        changed = [public_key for public_key in public_keys if public_key not in refreshed]
+        if changed:
+            p = self.cluster.pipeline()
+            for public_key in changed:
+                p.setex(
+                    self.__get_redis_key(public_key),
+                    REDIS_CACHE_TIMEOUT,
+                    json.dumps(configs[public_key]),
+                )
+                p.setex(self.__get_digest_key(public_key), REDIS_CACHE_TIMEOUT, digests[public_key])
+            p.execute()
+
+        metrics.incr(
+            "relay.projectconfig_cache.write", amount=len(changed), tags={"outcome": "changed"}
+        )
+        metrics.incr(
+            "relay.projectconfig_cache.write",
+            amount=len(refreshed),
+            tags={"outcome": "unchanged"},
+        )
 
     def delete_many(self, public_keys):
         # Note: Those are multiple pipelines, one per cluster node
         p = self.cluster.pipeline()
         for public_key in public_keys:
             p.delete(self.__get_redis_key(public_key))
+            p.delete(self.__get_digest_key(public_key))
 
         p.execute()
 
@@ -55,11 +55,11 @@ from sentry.sentry_metrics import indexer
 from sentry.sentry_metrics.sessions import SessionMetricKey as MetricKey
 from sentry.sentry_metrics.utils import (
     MetricIndexNotFound,
+    bulk_reverse_resolve,
     resolve,
     resolve_many_weak,
     resolve_tag_key,
     resolve_weak,
-    reverse_resolve,
 )
 from sentry.snuba.dataset import Dataset, EntityKey
 from sentry.snuba.sessions import _make_stats, get_rollup_starts_and_buckets, parse_snuba_datetime
@@ -202,9 +202,10 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
             count_query, referrer="release_health.metrics.get_crash_free_data", use_cache=False
         )["data"]
 
+        tag_values = bulk_reverse_resolve(row[session_status] for row in count_data)
         for row in count_data:
             project_data = data.setdefault(row["project_id"], {})
-            tag_value = reverse_resolve(row[session_status])
+            tag_value = tag_values[row[session_status]]
             project_data[tag_value] = row["value"]
 
         return data
@@ -565,12 +566,14 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
         else:
             column_names = ["project_id"]
 
+        releases: Mapping[int, str] = {}
+
         def extract_row_info_func(
             include_releases: bool,
         ) -> Callable[[Mapping[str, Union[int, str]]], ProjectOrRelease]:
             def f(row: Mapping[str, Union[int, str]]) -> ProjectOrRelease:
                 if include_releases:
-                    return row["project_id"], reverse_resolve(row.get(release_column_name))  # type: ignore
+                    return row["project_id"], releases[row.get(release_column_name)]  # type: ignore
                 else:
                     return row["project_id"]  # type: ignore
 
@@ -593,6 +596,11 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
             query, referrer="release_health.metrics.check_has_health_data", use_cache=False
         )
 
+        if includes_releases:
+            releases = bulk_reverse_resolve(
+                row.get(release_column_name) for row in result["data"]  # type: ignore
+            )
+
         return {extract_row_info(row) for row in result["data"]}
 
     def check_releases_have_health_data(
@@ -632,8 +640,12 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
             use_cache=False,
         )
 
+        releases = bulk_reverse_resolve(
+            row.get(release_column_name) for row in result["data"]  # type: ignore
+        )
+
         def extract_row_info(row: Mapping[str, Union[OrganizationId, str]]) -> ReleaseName:
-            return reverse_resolve(row.get(release_column_name))  # type: ignore
+            return releases[row.get(release_column_name)]  # type: ignore
 
         return {extract_row_info(row) for row in result["data"]}
 
@@ -654,7 +666,7 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
             Column("project_id"),
         ]
 
-        for row in raw_snql_query(
+        rows = raw_snql_query(
             Query(
                 dataset=Dataset.Metrics.value,
                 match=Entity(EntityKey.MetricsDistributions.value),
@@ -681,9 +693,11 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
                 granularity=Granularity(rollup),
             ),
             referrer="release_health.metrics.get_session_duration_data_for_overview",
-        )["data"]:
+        )["data"]
+        releases = bulk_reverse_resolve(row[release_column_name] for row in rows)
+        for row in rows:
             # See https://github.com/getsentry/snuba/blob/8680523617e06979427bfa18c6b4b4e8bf86130f/snuba/datasets/entities/metrics.py#L184 for quantiles
-            key = (row["project_id"], reverse_resolve(row[release_column_name]))
+            key = (row["project_id"], releases[row[release_column_name]])
             rv_durations[key] = {
                 "duration_p50": row["percentiles"][0],
                 "duration_p90": row["percentiles"][1],
@@ -709,7 +723,7 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
             Column("project_id"),
         ]
 
-        for row in raw_snql_query(
+        rows = raw_snql_query(
             Query(
                 dataset=Dataset.Metrics.value,
                 match=Entity(EntityKey.MetricsSets.value),
@@ -722,8 +736,10 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
                 granularity=Granularity(rollup),
             ),
             referrer="release_health.metrics.get_errored_sessions_for_overview",
-        )["data"]:
-            key = row["project_id"], reverse_resolve(row[release_column_name])
+        )["data"]
+        releases = bulk_reverse_resolve(row[release_column_name] for row in rows)
+        for row in rows:
+            key = row["project_id"], releases[row[release_column_name]]
             rv_errored_sessions[key] = row["value"]
 
         return rv_errored_sessions
@@ -746,7 +762,7 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
 
         rv_sessions: Dict[Tuple[int, str, str], int] = {}
 
-        for row in raw_snql_query(
+        rows = raw_snql_query(
             Query(
                 dataset=Dataset.Metrics.value,
                 match=Entity(EntityKey.MetricsCounters.value),
@@ -764,11 +780,17 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
                 granularity=Granularity(rollup),
             ),
             referrer="release_health.metrics.get_abnormal_and_crashed_sessions_for_overview",
-        )["data"]:
+        )["data"]
+        tag_values = bulk_reverse_resolve(
+            row[column_name]
+            for row in rows
+            for column_name in (release_column_name, session_status_column_name)
+        )
+        for row in rows:
             key = (
                 row["project_id"],
-                reverse_resolve(row[release_column_name]),
-                reverse_resolve(row[session_status_column_name]),
+                tag_values[row[release_column_name]],
+                tag_values[row[session_status_column_name]],
             )
             rv_sessions[key] = row["value"]
 
@@ -801,7 +823,7 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
             ),
         ]
 
-        for row in raw_snql_query(
+        rows = raw_snql_query(
             Query(
                 dataset=Dataset.Metrics.value,
                 match=Entity(EntityKey.MetricsSets.value),
@@ -811,11 +833,17 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
                 granularity=Granularity(rollup),
             ),
             referrer="release_health.metrics.get_users_and_crashed_users_for_overview",
-        )["data"]:
+        )["data"]
+        tag_values = bulk_reverse_resolve(
+            row[column_name]
+            for row in rows
+            for column_name in (release_column_name, session_status_column_name)
+        )
+        for row in rows:
             key = (
                 row["project_id"],
-                reverse_resolve(row[release_column_name]),
-                reverse_resolve(row[session_status_column_name]),
+                tag_values[row[release_column_name]],
+                tag_values[row[session_status_column_name]],
             )
             rv_users[key] = row["value"]
 
@@ -857,7 +885,7 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
 
         metric_name = resolve({"sessions": MetricKey.SESSION, "users": MetricKey.USER}[stat].value)
 
-        for row in raw_snql_query(
+        rows = raw_snql_query(
             Query(
                 dataset=Dataset.Metrics.value,
                 match=Entity(entity),
@@ -877,12 +905,14 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
                 groupby=aggregates,
             ),
             referrer="release_health.metrics.get_health_stats_for_overview",
-        )["data"]:
+        )["data"]
+        releases = bulk_reverse_resolve(row[release_column_name] for row in rows)
+        for row in rows:
             time_bucket = int(
                 (parse_snuba_datetime(row["bucketed_time"]) - stats_start).total_seconds()
                 / stats_rollup
             )
-            key = row["project_id"], reverse_resolve(row[release_column_name])
+            key = row["project_id"], releases[row[release_column_name]]
             timeseries = rv[key]
             if time_bucket < len(timeseries):
                 timeseries[time_bucket][1] = row["value"]
@@ -1198,8 +1228,12 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
             use_cache=False,
         )
 
+        releases = bulk_reverse_resolve(
+            row.get(release_column_name) for row in result["data"]  # type: ignore
+        )
+
         def extract_row_info(row: Mapping[str, Union[OrganizationId, str]]) -> ProjectRelease:
-            return row.get("project_id"), reverse_resolve(row.get(release_column_name))  # type: ignore
+            return row.get("project_id"), releases[row.get(release_column_name)]  # type: ignore
 
         return [extract_row_info(row) for row in result["data"]]
 
@@ -1253,8 +1287,9 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
 
         result = {}
 
+        releases = bulk_reverse_resolve(row[release_column_name] for row in rows)
         for row in rows:
-            result[row["project_id"], reverse_resolve(row[release_column_name])] = row["oldest"]
+            result[row["project_id"], releases[row[release_column_name]]] = row["oldest"]
 
         return result
 
@@ -1407,10 +1442,11 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
 
         series: DefaultDict[datetime, SessionCounts] = defaultdict(self._default_session_counts)
 
+        statuses = bulk_reverse_resolve(row[session_status_key] for row in session_series_data)
         for row in session_series_data:
             dt = parse_snuba_datetime(row["bucketed_time"])
             target = series[dt]
-            status = reverse_resolve(row[session_status_key])
+            status = statuses[row[session_status_key]]
             value = int(row["value"])
             if status == "init":
                 target["sessions"] = value
@@ -1513,6 +1549,9 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
         series: DefaultDict[datetime, UserCounts] = defaultdict(self._default_user_counts)
         totals: UserCounts = self._default_user_counts()
 
+        statuses = bulk_reverse_resolve(
+            row[session_status_key] for row in itertools.chain(user_series_data, user_totals_data)
+        )
         for is_totals, data in [(False, user_series_data), (True, user_totals_data)]:
             for row in data:
                 if is_totals:
@@ -1520,7 +1559,7 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
                 else:
                     dt = parse_snuba_datetime(row["bucketed_time"])
                     target = series[dt]
-                status = reverse_resolve(row[session_status_key])
+                status = statuses[row[session_status_key]]
                 value = int(row["value"])
                 if status == "init":
                     target["users"] = value
@@ -1943,7 +1982,11 @@ class MetricsReleaseHealthBackend(ReleaseHealthBackend):
             use_cache=False,
         )
 
+        releases = bulk_reverse_resolve(
+            row.get(release_column_name) for row in rows["data"]  # type: ignore
+        )
+
         def extract_row_info(row: Mapping[str, Union[OrganizationId, str]]) -> ProjectRelease:
-            return row.get("project_id"), reverse_resolve(row.get(release_column_name))  # type: ignore
+            return row.get("project_id"), releases[row.get(release_column_name)]  # type: ignore
 
         return [extract_row_info(row) for row in rows["data"]]
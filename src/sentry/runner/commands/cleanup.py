@@ -1,3 +1,5 @@
+import itertools
+import logging
 import os
 from datetime import timedelta
 from uuid import uuid4
@@ -323,6 +325,18 @@ def cleanup(days, project, concurrency, silent, model, router, timed):
         click.echo("Clean up took %s second(s)." % duration)
 
 
+#: How many `FileBlob` rows are checked for references and deleted at once.
+UNUSED_FILES_CHUNK_SIZE = 1000
+
+#: How many storage objects of deleted blobs are removed concurrently.
+UNUSED_FILES_STORAGE_CONCURRENCY = 16
+
+#: Remembers the last blob id `cleanup_unused_files` got through, so that an
+#: interrupted run continues where it stopped.
+UNUSED_FILES_CURSOR_KEY = "cleanup:unused-files:cursor"
+UNUSED_FILES_CURSOR_TTL = 60 * 60 * 24 * 7
+
+
 def cleanup_unused_files(quiet=False):
     """
     Remove FileBlob's (and thus the actual files) if they are no longer
@@ -331,20 +345,144 @@ def cleanup_unused_files(quiet=False):
     We set a minimum-age on the query to ensure that we don't try to remove
     any blobs which are brand new and potentially in the process of being
     referenced.
-    """
-    from sentry.models import File, FileBlob, FileBlobIndex
 
-    if quiet:
-        from sentry.utils.query import RangeQuerySetWrapper
-    else:
-        from sentry.utils.query import RangeQuerySetWrapperWithProgressBar as RangeQuerySetWrapper
+    Blobs are checked in chunks of ``UNUSED_FILES_CHUNK_SIZE``: unreferenced
+    blobs of a chunk are found with a single query, their rows are deleted
+    with another one and their storage objects are then deleted concurrently.
+    The progress is stored in the cache after every chunk, so an interrupted
+    run picks up where it stopped.
+    """
+    from sentry.models import FileBlob
+    from sentry.utils.cache import cache
+    from sentry.utils.query import WithProgressBar
 
     cutoff = timezone.now() - timedelta(days=1)
+    cursor = cache.get(UNUSED_FILES_CURSOR_KEY) or 0
     queryset = FileBlob.objects.filter(timestamp__lte=cutoff)
 
-    for blob in RangeQuerySetWrapper(queryset):
-        if FileBlobIndex.objects.filter(blob=blob).exists():
-            continue
-        if File.objects.filter(blob=blob).exists():
-            continue
-        blob.delete()
+    blob_ids = _iter_blob_ids(queryset, cursor)
+    if not quiet:
+        if cursor:
+            click.echo(f">> Resuming after FileBlob {cursor}")
+        total_count = queryset.filter(id__gt=cursor).count()
+        blob_ids = iter(WithProgressBar(blob_ids, total_count, "File Blobs"))
+
+    deleted = 0
+    while True:
+        chunk = list(itertools.islice(blob_ids, UNUSED_FILES_CHUNK_SIZE))
+        if not chunk:
+            break
+        deleted += _delete_unused_blobs(chunk)
+        cache.set(UNUSED_FILES_CURSOR_KEY, chunk[-1], UNUSED_FILES_CURSOR_TTL)
+
+    cache.delete(UNUSED_FILES_CURSOR_KEY)
+    if not quiet:
+        click.echo(f">> Removed {deleted} unused FileBlob(s)")
+
+
+def _iter_blob_ids(queryset, cursor):
+    while True:
+        ids = list(
+            queryset.filter(id__gt=cursor)
+            .order_by("id")
+            .values_list("id", flat=True)[:UNUSED_FILES_CHUNK_SIZE]
+        )
+        if not ids:
+            return
+        yield from ids
+        cursor = ids[-1]
+
+
+def _get_unused_blobs(blob_ids):
+    from django.db.models import Exists, OuterRef
+
+    from sentry.models import File, FileBlob, FileBlobIndex
+
+    return (
+        FileBlob.objects.filter(id__in=blob_ids)
+        .annotate(
+            has_index=Exists(FileBlobIndex.objects.filter(blob=OuterRef("pk"))),
+            has_file=Exists(File.objects.filter(blob=OuterRef("pk"))),
+        )
+        .filter(has_index=False, has_file=False)
+    )
+
+
+def _delete_unused_blobs(blob_ids):
+    """
+    Deletes the blobs of `blob_ids` that are not referenced, and returns how many
+    were deleted.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from contextlib import ExitStack
+
+    from django.db import IntegrityError, router, transaction
+
+    from sentry.app import locks
+    from sentry.models import FileBlob
+    from sentry.models.file import UPLOAD_RETRY_TIME, get_storage
+    from sentry.tasks.files import delete_file as delete_file_task
+    from sentry.utils.locking import UnableToAcquireLock
+
+    blobs = list(_get_unused_blobs(blob_ids).values_list("id", "checksum", "path"))
+    if not blobs:
+        return 0
+
+    with ExitStack() as stack:
+        # Same lock as `FileBlob.delete`, skip blobs that are being uploaded
+        # right now.
+        locked = []
+        for blob_id, checksum, path in blobs:
+            lock = locks.get(f"fileblob:upload:{checksum}", duration=UPLOAD_RETRY_TIME)
+            try:
+                stack.enter_context(lock.acquire())
+            except UnableToAcquireLock:
+                continue
+            locked.append((blob_id, checksum, path))
+
+        # Check the references again right before deleting, they might have
+        # changed since the first query.
+        deleted_ids = set()
+        try:
+            with transaction.atomic(using=router.db_for_write(FileBlob)):
+                deleted_ids.update(
+                    _get_unused_blobs([blob_id for blob_id, _, _ in locked])
+                    .select_for_update()
+                    .values_list("id", flat=True)
+                )
+                FileBlob.objects.filter(id__in=deleted_ids).delete()
+        except IntegrityError:
+            # A reference was added concurrently, fall back to deleting the
+            # blobs of this chunk one by one.
+            deleted_ids.clear()
+            for blob_id, _, _ in locked:
+                try:
+                    with transaction.atomic(using=router.db_for_write(FileBlob)):
+                        if _get_unused_blobs([blob_id]).exists():
+                            FileBlob.objects.filter(id=blob_id).delete()
+                            deleted_ids.add(blob_id)
+                except IntegrityError:
+                    pass
+
+    files = [
+        (path, checksum) for blob_id, checksum, path in locked if path and blob_id in deleted_ids
+    ]
+    if files:
+        storage = get_storage()
+
+        def delete_file(file):
+            path, checksum = file
+            try:
+                storage.delete(path)
+            except Exception:
+                # The blob row is gone already, retry in the background so
+                # the file is not orphaned in storage.
+                logging.getLogger("sentry.cleanup").exception(
+                    "Failed to delete unused file", extra={"path": path}
+                )
+                delete_file_task.apply_async(kwargs={"path": path, "checksum": checksum})
+
+        with ThreadPoolExecutor(max_workers=UNUSED_FILES_STORAGE_CONCURRENCY) as executor:
+            list(executor.map(delete_file, files))
+
+    return len(deleted_ids)
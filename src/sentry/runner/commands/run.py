@@ -385,6 +385,18 @@ def post_process_forwarder(**options):
     type=click.Choice(["earliest", "latest"]),
     help="Force subscriptions to start from a particular offset",
 )
+@click.option(
+    "--workers",
+    default=1,
+    type=int,
+    help="Number of subscriptions to process concurrently. Updates of the same subscription are always processed in order.",
+)
+@click.option(
+    "--max-batch-size",
+    default=100,
+    type=int,
+    help="Maximum number of messages to poll at once. Their updates are processed together.",
+)
 @log_options()
 @configuration
 def query_subscription_consumer(**options):
@@ -397,6 +409,8 @@ def query_subscription_consumer(**options):
         commit_batch_timeout_ms=options["commit_batch_timeout_ms"],
         initial_offset_reset=options["initial_offset_reset"],
         force_offset_reset=options["force_offset_reset"],
+        workers=options["workers"],
+        max_batch_size=options["max_batch_size"],
     )
 
     def handler(signum, frame):
@@ -0,0 +1,40 @@
+-- Records an increment in a buffer hash and marks the hash as pending.
+--
+--   KEYS = {key, pending_key}
+--   ARGV = {model, filters, expire, timestamp, signal_only, num_columns,
+--           column_1, amount_1, ..., column_n, amount_n,
+--           extra_column_1, extra_value_1, ...}
+--
+-- The model and filters are only written if the hash does not exist yet,
+-- counters are incremented and extra values are overwritten (last write
+-- wins.) `signal_only` is either "1" or an empty string.
+local key = KEYS[1]
+local pending_key = KEYS[2]
+
+local model = ARGV[1]
+local filters = ARGV[2]
+local expire = ARGV[3]
+local timestamp = ARGV[4]
+local signal_only = ARGV[5]
+local num_columns = tonumber(ARGV[6])
+
+redis.call('HSETNX', key, 'm', model)
+redis.call('HSETNX', key, 'f', filters)
+
+local i = 7
+for _ = 1, num_columns do
+    redis.call('HINCRBY', key, 'i+' .. ARGV[i], ARGV[i + 1])
+    i = i + 2
+end
+
+while i < #ARGV do
+    redis.call('HSET', key, 'e+' .. ARGV[i], ARGV[i + 1])
+    i = i + 2
+end
+
+if signal_only == '1' then
+    redis.call('HSET', key, 's', '1')
+end
+
+redis.call('EXPIRE', key, expire)
+redis.call('ZADD', pending_key, timestamp, key)
@@ -0,0 +1,12 @@
+-- Returns the contents of a buffer hash and removes it, along with its entry
+-- in the pending set. Since this happens atomically, concurrent calls for the
+-- same key never see the same increments.
+--
+--   KEYS = {key, pending_key}
+local key = KEYS[1]
+local pending_key = KEYS[2]
+
+local values = redis.call('HGETALL', key)
+redis.call('DEL', key)
+redis.call('ZREM', pending_key, key)
+return values
@@ -17,3 +17,5 @@ if TYPE_CHECKING:
     record = backend.record
     resolve = backend.resolve
     reverse_resolve = backend.reverse_resolve
+    bulk_resolve = backend.bulk_resolve
+    bulk_reverse_resolve = backend.bulk_reverse_resolve
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Mapping, Optional
 
 from sentry.utils.services import Service
 
@@ -11,7 +11,14 @@ class StringIndexer(Service):  # type: ignore
     Check `sentry.snuba.metrics` for convenience functions.
     """
 
-    __all__ = ("record", "resolve", "reverse_resolve", "bulk_record")
+    __all__ = (
+        "record",
+        "resolve",
+        "reverse_resolve",
+        "bulk_record",
+        "bulk_resolve",
+        "bulk_reverse_resolve",
+    )
 
     def bulk_record(self, strings: List[str]) -> Dict[str, int]:
         raise NotImplementedError()
@@ -39,3 +46,17 @@ class StringIndexer(Service):  # type: ignore
         Returns None if the entry cannot be found.
         """
         raise NotImplementedError()
+
+    def bulk_resolve(self, strings: Iterable[str]) -> Mapping[str, Optional[int]]:
+        """Lookup the integer IDs for many strings at once.
+
+        Strings which cannot be found map to None.
+        """
+        return {string: self.resolve(string) for string in strings}
+
+    def bulk_reverse_resolve(self, ids: Iterable[int]) -> Mapping[int, Optional[str]]:
+        """Lookup the stored strings for many integer IDs at once.
+
+        IDs which cannot be found map to None.
+        """
+        return {id: self.reverse_resolve(id) for id in ids}
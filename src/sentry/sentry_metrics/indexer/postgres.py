@@ -1,21 +1,56 @@
-from typing import Any, List, Mapping, MutableMapping, Optional, Sequence, Set
+from typing import Any, Iterable, List, Mapping, MutableMapping, Optional, Sequence, Set
 
 from sentry.sentry_metrics.indexer.models import MetricsKeyIndexer
 from sentry.utils import metrics
+from sentry.utils.datastructures import LRUCache
 from sentry.utils.services import Service
 
 _INDEXER_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
 _INDEXER_CACHE_HIT_METRIC = "sentry_metrics.indexer.memcache.hit"
 _INDEXER_CACHE_MISS_METRIC = "sentry_metrics.indexer.memcache.miss"
+_INDEXER_LOCAL_CACHE_METRIC = "sentry_metrics.indexer.local_cache"
 
 
 class PGStringIndexer(Service):  # type: ignore
     """
     Provides integer IDs for metric names, tag keys and tag values
     and the corresponding reverse lookup.
+
+    Strings never change their ID, so every mapping that has been looked up
+    is kept in a bounded in-process cache in both directions, in front of the
+    Django cache and Postgres.
     """
 
-    __all__ = ("record", "resolve", "reverse_resolve", "bulk_record")
+    __all__ = (
+        "record",
+        "resolve",
+        "reverse_resolve",
+        "bulk_record",
+        "bulk_resolve",
+        "bulk_reverse_resolve",
+    )
+
+    def __init__(self, local_cache_size: int = 10000, **options: Any) -> None:
+        self._ids: LRUCache = LRUCache(maxsize=local_cache_size)
+        self._strings: LRUCache = LRUCache(maxsize=local_cache_size)
+
+    def _cache_locally(self, records: Iterable[MetricsKeyIndexer]) -> None:
+        for record in records:
+            self._ids.set(record.string, record.id)
+            self._strings.set(record.id, record.string)
+
+    def _get_local(self, cache: LRUCache, keys: Set[Any]) -> Mapping[Any, Any]:
+        found = {}
+        for key in keys:
+            value = cache.get(key)
+            if value is not None:
+                found[key] = value
+
+        metrics.incr(_INDEXER_LOCAL_CACHE_METRIC, amount=len(found), tags={"result": "hit"})
+        metrics.incr(
+            _INDEXER_LOCAL_CACHE_METRIC, amount=len(keys) - len(found), tags={"result": "miss"}
+        )
+        return found
 
     def _bulk_record(self, unmapped_strings: Set[str]) -> Any:
         records = [MetricsKeyIndexer(string=string) for string in unmapped_strings]
@@ -32,12 +67,18 @@ class PGStringIndexer(Service):  # type: ignore
         return MetricsKeyIndexer.objects.get_many_from_cache(list(unmapped_strings), key="string")
 
     def bulk_record(self, strings: List[str]) -> Mapping[str, int]:
+        mapped_result: MutableMapping[str, int] = dict(self._get_local(self._ids, set(strings)))
+        strings = [string for string in strings if string not in mapped_result]
+        if not strings:
+            return mapped_result
 
         cache_results: Sequence[Any] = MetricsKeyIndexer.objects.get_many_from_cache(
             strings, key="string"
         )
+        self._cache_locally(cache_results)
 
-        mapped_result: MutableMapping[str, int] = {r.string: r.id for r in cache_results}
+        for r in cache_results:
+            mapped_result[r.string] = r.id
 
         metrics.incr(_INDEXER_CACHE_FETCH_METRIC, amount=len(strings))
         unmapped = set(strings).difference(mapped_result.keys())
@@ -54,6 +95,7 @@ class PGStringIndexer(Service):  # type: ignore
 
         with metrics.timer("sentry_metrics.indexer._bulk_record"):
             new_mapped = self._bulk_record(unmapped)
+        self._cache_locally(new_mapped)
 
         for new in new_mapped:
             mapped_result[new.string] = new.id
@@ -70,21 +112,47 @@ class PGStringIndexer(Service):  # type: ignore
 
         Returns None if the entry cannot be found.
         """
-        try:
-            id: int = MetricsKeyIndexer.objects.get_from_cache(string=string).id
-        except MetricsKeyIndexer.DoesNotExist:
-            return None
-
-        return id
+        return self.bulk_resolve([string])[string]
 
     def reverse_resolve(self, id: int) -> Optional[str]:
         """Lookup the stored string for a given integer ID.
 
         Returns None if the entry cannot be found.
         """
-        try:
-            string: str = MetricsKeyIndexer.objects.get_from_cache(pk=id).string
-        except MetricsKeyIndexer.DoesNotExist:
-            return None
+        return self.bulk_reverse_resolve([id])[id]
+
+    def bulk_resolve(self, strings: Iterable[str]) -> Mapping[str, Optional[int]]:
+        """Lookup the integer IDs for many strings at once.
 
-        return string
+        Strings which cannot be found map to None.
+        """
+        strings = set(strings)
+        result: MutableMapping[str, Optional[int]] = dict.fromkeys(strings)
+        result.update(self._get_local(self._ids, strings))
+
+        missing = [string for string in strings if result[string] is None]
+        if missing:
+            records = MetricsKeyIndexer.objects.get_many_from_cache(missing, key="string")
+            self._cache_locally(records)
+            for record in records:
+                result[record.string] = record.id
+
+        return result
+
+    def bulk_reverse_resolve(self, ids: Iterable[int]) -> Mapping[int, Optional[str]]:
+        """Lookup the stored strings for many integer IDs at once.
+
+        IDs which cannot be found map to None.
+        """
+        ids = set(ids)
+        result: MutableMapping[int, Optional[str]] = dict.fromkeys(ids)
+        result.update(self._get_local(self._strings, ids))
+
+        missing = [id for id in ids if result[id] is None]
+        if missing:
+            records = MetricsKeyIndexer.objects.get_many_from_cache(missing)  # type: ignore
+            self._cache_locally(records)
+            for record in records:
+                result[record.id] = record.string
+
+        return result
@@ -1,4 +1,4 @@
-from typing import Optional, Sequence
+from typing import Iterable, Mapping, Optional, Sequence
 
 from sentry.api.utils import InvalidParams
 from sentry.sentry_metrics import indexer
@@ -18,6 +18,20 @@ def reverse_resolve(index: int) -> str:
     return resolved  # type: ignore
 
 
+def bulk_reverse_resolve(indexes: Iterable[int]) -> Mapping[int, str]:
+    """
+    Resolve many index values back to strings with a single lookup, see
+    `reverse_resolve`.
+    """
+    indexes = set(indexes)
+    assert 0 not in indexes
+    resolved = indexer.bulk_reverse_resolve(indexes)
+    if None in resolved.values():
+        raise MetricIndexNotFound()
+
+    return resolved  # type: ignore
+
+
 def reverse_resolve_weak(index: int) -> Optional[str]:
     """
     Resolve an index value back to a string, special-casing 0 to return None.
@@ -65,10 +79,5 @@ def resolve_many_weak(strings: Sequence[str]) -> Sequence[int]:
     Resolve multiple values at once, omitting missing ones. This is useful in
     the same way as `resolve_weak` is, e.g. `WHERE x in values`.
     """
-    rv = []
-    for string in strings:
-        resolved = resolve_weak(string)
-        if resolved != 0:
-            rv.append(resolved)
-
-    return rv
+    resolved = indexer.bulk_resolve(strings)
+    return [resolved[string] for string in strings if resolved[string] is not None]
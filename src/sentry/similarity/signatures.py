@@ -1,7 +1,5 @@
 import mmh3
 
-from sentry.utils.compat import map
-
 
 class MinHashSignatureBuilder:
     def __init__(self, columns, rows):
@@ -9,9 +7,37 @@ class MinHashSignatureBuilder:
         self.rows = rows
 
     def __call__(self, features):
-        return map(
-            lambda column: min(
-                map(lambda feature: mmh3.hash(feature, column) % self.rows, features)
-            ),
-            range(self.columns),
-        )
+        return self.build_many([features])[0]
+
+    def build_many(self, feature_sets):
+        """\
+        Returns the signature of every set of features in ``feature_sets``.
+
+        Every distinct feature is only hashed once per column for the entire
+        batch. Events of the same group tend to share most of their features
+        (e.g. frames), so signing them together saves most of the hashing.
+        """
+        hash = mmh3.hash
+        columns = range(self.columns)
+        rows = self.rows
+
+        # feature -> hash of the feature for every column
+        hashes = {}
+
+        signatures = []
+        for features in feature_sets:
+            feature_hashes = []
+            for feature in features:
+                column_hashes = hashes.get(feature)
+                if column_hashes is None:
+                    column_hashes = hashes[feature] = [
+                        hash(feature, column) % rows for column in columns
+                    ]
+                feature_hashes.append(column_hashes)
+
+            if not feature_hashes:
+                raise ValueError("Cannot build a signature without any features.")
+
+            signatures.append([min(values) for values in zip(*feature_hashes)])
+
+        return signatures
@@ -1,8 +1,10 @@
 import logging
 import re
 import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from random import random
-from typing import Any, Callable, Dict, Iterable, List, Optional, cast
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple, cast
 
 import jsonschema
 import pytz
@@ -23,8 +25,10 @@ from sentry.utils.batching_kafka_consumer import wait_for_topics
 logger = logging.getLogger(__name__)
 
 TQuerySubscriptionCallable = Callable[[Dict[str, Any], QuerySubscription], None]
+TQuerySubscriptionBatchCallable = Callable[[List[Tuple[Dict[str, Any], QuerySubscription]]], None]
 
 subscriber_registry: Dict[str, TQuerySubscriptionCallable] = {}
+batch_subscriber_registry: Dict[str, TQuerySubscriptionBatchCallable] = {}
 
 
 def register_subscriber(
@@ -39,6 +43,24 @@ def register_subscriber(
     return inner
 
 
+def register_batch_subscriber(
+    subscriber_key: str,
+) -> Callable[[TQuerySubscriptionBatchCallable], TQuerySubscriptionBatchCallable]:
+    """
+    Registers a callback that handles many updates of a subscription type at once. It is
+    called with a list of ``(contents, subscription)`` tuples in message order, and is used
+    instead of the callback from `register_subscriber` when the consumer handles a batch.
+    """
+
+    def inner(func: TQuerySubscriptionBatchCallable) -> TQuerySubscriptionBatchCallable:
+        if subscriber_key in batch_subscriber_registry:
+            raise Exception("Batch handler already registered for %s" % subscriber_key)
+        batch_subscriber_registry[subscriber_key] = func
+        return func
+
+    return inner
+
+
 class InvalidMessageError(Exception):
     pass
 
@@ -47,11 +69,37 @@ class InvalidSchemaError(InvalidMessageError):
     pass
 
 
+def build_validators() -> Tuple[jsonschema.Draft7Validator, Dict[int, jsonschema.Draft7Validator]]:
+    """
+    Builds validators for the subscription update wrapper and each payload version.
+    `jsonschema.validate` checks the schema itself and builds a new validator on every
+    call, while these only validate the instance.
+    """
+    for schema in (SUBSCRIPTION_WRAPPER_SCHEMA, *SUBSCRIPTION_PAYLOAD_VERSIONS.values()):
+        jsonschema.Draft7Validator.check_schema(schema)
+
+    return jsonschema.Draft7Validator(SUBSCRIPTION_WRAPPER_SCHEMA), {
+        version: jsonschema.Draft7Validator(schema)
+        for version, schema in SUBSCRIPTION_PAYLOAD_VERSIONS.items()
+    }
+
+
 class QuerySubscriptionConsumer:
     """
     A Kafka consumer that processes query subscription update messages. Each message has
     a related subscription id and the latest values related to the subscribed query.
     These values are passed along to a callback associated with the subscription.
+
+    With ``workers > 1`` messages are parsed on the consumer thread and then handed
+    to one of ``workers`` lanes, picked by subscription id. Each lane processes its
+    messages one at a time and in order, so updates for the same subscription are
+    still processed sequentially while different subscriptions are processed
+    concurrently. The offset of a partition is only advanced once all earlier
+    messages of that partition have been processed.
+
+    Up to ``max_batch_size`` messages are polled at once. The updates of a poll (or
+    of each lane's share of it) are handed together to subscription types that have
+    a batch callback, see `register_batch_subscriber`.
     """
 
     topic_to_dataset: Dict[str, QueryDatasets] = {
@@ -69,6 +117,9 @@ class QuerySubscriptionConsumer:
         commit_batch_timeout_ms: int = 5000,
         initial_offset_reset: str = "earliest",
         force_offset_reset: Optional[str] = None,
+        workers: int = 1,
+        max_pending_messages: int = 1000,
+        max_batch_size: int = 1,
     ):
         self.group_id = group_id
         if not topic:
@@ -104,6 +155,15 @@ class QuerySubscriptionConsumer:
         self.resolve_partition_force_offset = self.offset_reset_name_to_func(force_offset_reset)
         self.__shutdown_requested = False
 
+        self.wrapper_validator, self.payload_validators = build_validators()
+
+        self.workers = workers
+        self.max_pending_messages = max_pending_messages
+        self.max_batch_size = max_batch_size
+        self.__lanes: List[ThreadPoolExecutor] = []
+        # Messages handed to a lane, in offset order per partition.
+        self.__pending: Dict[int, Deque[Tuple[int, "Future[None]"]]] = defaultdict(deque)
+
     def offset_reset_name_to_func(
         self, offset_reset: Optional[str]
     ) -> Optional[Callable[[TopicPartition], TopicPartition]]:
@@ -149,9 +209,11 @@ class QuerySubscriptionConsumer:
 
         def on_revoke(consumer: Consumer, partitions: List[TopicPartition]) -> None:
             partition_numbers = [partition.partition for partition in partitions]
+            self.wait_for_pending(partition_numbers)
             self.commit_offsets(partition_numbers)
             for partition_number in partition_numbers:
                 self.offsets.pop(partition_number, None)
+                self.__pending.pop(partition_number, None)
             logger.info(
                 "query-subscription-consumer.on_revoke",
                 extra={
@@ -171,40 +233,145 @@ class QuerySubscriptionConsumer:
 
         self.consumer.subscribe([self.topic], on_assign=on_assign, on_revoke=on_revoke)
 
-        i = 0
-        while not self.__shutdown_requested:
-            message = self.consumer.poll(0.1)
-            if message is None:
-                continue
+        self.__lanes = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"query-subscription-lane-{lane}")
+            for lane in range(self.workers if self.workers > 1 else 0)
+        ]
+
+        try:
+            i = 0
+            while not self.__shutdown_requested:
+                messages = self.poll_messages()
+                if not messages:
+                    if self.__lanes:
+                        self.advance_offsets()
+                    continue
+
+                i = i + len(messages)
 
+                if self.__lanes:
+                    self.submit_messages(messages)
+                else:
+                    with sentry_sdk.start_transaction(
+                        op="handle_message",
+                        name="query_subscription_consumer_process_message",
+                        sampled=random() <= options.get("subscriptions-query.sample-rate"),
+                    ), metrics.timer("snuba_query_subscriber.handle_message"):
+                        self.handle_messages(messages)
+
+                    # Track latest completed message here, for use in `shutdown` handler.
+                    for message in messages:
+                        self.offsets[message.partition()] = message.offset() + 1
+
+                batch_by_size: bool = i >= self.commit_batch_size
+                batch_by_time: bool = (
+                    self.__batch_deadline is not None and time.time() > self.__batch_deadline
+                )
+
+                if batch_by_time or batch_by_size:
+                    logger.debug("Committing offsets")
+                    self.commit_offsets()
+                    i = 0
+
+            self.wait_for_pending()
+        finally:
+            for lane in self.__lanes:
+                lane.shutdown(wait=False)
+            self.__lanes = []
+
+        logger.debug("Committing offsets and closing consumer")
+        self.commit_offsets()
+        self.consumer.close()
+
+    def poll_messages(self) -> List[Message]:
+        """
+        Polls up to `max_batch_size` messages. Only waits for the first one.
+        """
+        messages: List[Message] = []
+        message = self.consumer.poll(0.1)
+        while message is not None:
             error = message.error()
             if error is not None:
                 raise KafkaException(error)
 
-            i = i + 1
+            messages.append(message)
+            if len(messages) >= self.max_batch_size:
+                break
+            message = self.consumer.poll(0)
 
-            with sentry_sdk.start_transaction(
-                op="handle_message",
-                name="query_subscription_consumer_process_message",
-                sampled=random() <= options.get("subscriptions-query.sample-rate"),
-            ), metrics.timer("snuba_query_subscriber.handle_message"):
-                self.handle_message(message)
+        return messages
 
-            # Track latest completed message here, for use in `shutdown` handler.
-            self.offsets[message.partition()] = message.offset() + 1
-
-            batch_by_size: bool = i % self.commit_batch_size == 0
-            batch_by_time: bool = (
-                self.__batch_deadline is not None and time.time() > self.__batch_deadline
+    def submit_messages(self, messages: List[Message]) -> None:
+        """
+        Parses messages and hands them to the lanes of their subscriptions, all
+        messages of a lane at once. Blocks while `max_pending_messages` messages are
+        in flight.
+        """
+        self.__start_batch()
+
+        # Invalid messages are done right away, but still have to wait for
+        # earlier messages before their offset can be committed.
+        done: "Future[None]" = Future()
+        done.set_result(None)
+
+        lane_items: Dict[int, List[Tuple[Message, Dict[str, Any]]]] = defaultdict(list)
+        message_lanes: List[Optional[int]] = []
+        for message in messages:
+            contents = self.parse_message(message)
+            if contents is None:
+                message_lanes.append(None)
+            else:
+                lane = hash(contents["subscription_id"]) % len(self.__lanes)
+                lane_items[lane].append((message, contents))
+                message_lanes.append(lane)
+
+        lane_futures = {
+            lane: self.__lanes[lane].submit(self.process_messages, items)
+            for lane, items in lane_items.items()
+        }
+        for message, lane in zip(messages, message_lanes):
+            future = done if lane is None else lane_futures[lane]
+            self.__pending[message.partition()].append((message.offset(), future))
+        self.advance_offsets()
+
+        while sum(len(pending) for pending in self.__pending.values()) >= self.max_pending_messages:
+            wait(
+                [pending[0][1] for pending in self.__pending.values() if pending],
+                return_when=FIRST_COMPLETED,
             )
+            self.advance_offsets()
 
-            if batch_by_time or batch_by_size:
-                logger.debug("Committing offsets")
-                self.commit_offsets()
+    def process_messages(self, items: List[Tuple[Message, Dict[str, Any]]]) -> None:
+        with sentry_sdk.start_transaction(
+            op="handle_message",
+            name="query_subscription_consumer_process_message",
+            sampled=random() <= options.get("subscriptions-query.sample-rate"),
+        ), metrics.timer("snuba_query_subscriber.handle_message"):
+            self.handle_contents_batch(items)
 
-        logger.debug("Committing offsets and closing consumer")
-        self.commit_offsets()
-        self.consumer.close()
+    def advance_offsets(self) -> None:
+        """
+        Moves the offset of each partition past the messages that have been
+        processed, up to the first message that is still in flight. Re-raises
+        the exception of a failed message.
+        """
+        for partition, pending in self.__pending.items():
+            while pending and pending[0][1].done():
+                offset, future = pending.popleft()
+                future.result()
+                self.offsets[partition] = offset + 1
+
+    def wait_for_pending(self, partitions: Optional[Iterable[int]] = None) -> None:
+        """
+        Waits until all messages in flight for the given partitions (all by default)
+        have been processed.
+        """
+        if partitions is None:
+            partitions = list(self.__pending.keys())
+        wait(
+            [future for partition in partitions for _, future in self.__pending.get(partition, ())]
+        )
+        self.advance_offsets()
 
     def _reset_batch(self) -> None:
         self.__batch_deadline = None
@@ -233,6 +400,11 @@ class QuerySubscriptionConsumer:
     def shutdown(self) -> None:
         self.__shutdown_requested = True
 
+    def __start_batch(self) -> None:
+        # set a commit time deadline only after the first message for this batch is seen
+        if not self.__batch_deadline:
+            self.__batch_deadline = self.commit_batch_timeout_ms / 1000.0 + time.time()
+
     def handle_message(self, message: Message) -> None:
         """
         Parses the value from Kafka, and if valid passes the payload to the callback defined by the
@@ -241,101 +413,170 @@ class QuerySubscriptionConsumer:
         :param message:
         :return:
         """
-        # set a commit time deadline only after the first message for this batch is seen
-        if not self.__batch_deadline:
-            self.__batch_deadline = self.commit_batch_timeout_ms / 1000.0 + time.time()
+        self.__start_batch()
+
+        contents = self.parse_message(message)
+        if contents is not None:
+            self.handle_contents(message, contents)
+
+    def handle_messages(self, messages: List[Message]) -> None:
+        """
+        Parses the values of many messages and passes the valid payloads to the
+        callbacks of their subscriptions, see `handle_contents_batch`.
+        """
+        self.__start_batch()
+
+        items = []
+        for message in messages:
+            contents = self.parse_message(message)
+            if contents is not None:
+                items.append((message, contents))
 
+        self.handle_contents_batch(items)
+
+    def parse_message(self, message: Message) -> Optional[Dict[str, Any]]:
+        """
+        Parses the value of a message, logs the error and returns `None` if the
+        message is invalid.
+        """
+        try:
+            with metrics.timer("snuba_query_subscriber.parse_message_value"):
+                return self.parse_message_value(message.value())
+        except InvalidMessageError:
+            # If the message is in an invalid format, just log the error
+            # and continue
+            logger.exception(
+                "Subscription update could not be parsed",
+                extra={
+                    "offset": message.offset(),
+                    "partition": message.partition(),
+                    "value": message.value(),
+                },
+            )
+            return None
+
+    def handle_contents(self, message: Message, contents: Dict[str, Any]) -> None:
+        """
+        Passes the parsed payload of a message to the callback defined by its subscription.
+        """
         with sentry_sdk.push_scope() as scope:
-            try:
-                with metrics.timer("snuba_query_subscriber.parse_message_value"):
-                    contents = self.parse_message_value(message.value())
-            except InvalidMessageError:
-                # If the message is in an invalid format, just log the error
-                # and continue
-                logger.exception(
-                    "Subscription update could not be parsed",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
-                return
             scope.set_tag("query_subscription_id", contents["subscription_id"])
 
-            try:
-                with metrics.timer("snuba_query_subscriber.fetch_subscription"):
-                    subscription: QuerySubscription = QuerySubscription.objects.get_from_cache(
-                        subscription_id=contents["subscription_id"]
-                    )
-                    if subscription.status != QuerySubscription.Status.ACTIVE.value:
-                        metrics.incr("snuba_query_subscriber.subscription_inactive")
-                        return
-            except QuerySubscription.DoesNotExist:
-                metrics.incr("snuba_query_subscriber.subscription_doesnt_exist")
-                logger.error(
-                    "Received subscription update, but subscription does not exist",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
-                try:
-                    if "entity" in contents:
-                        entity_key = contents["entity"]
-                    else:
-                        # XXX(ahmed): Remove this logic. This was kept here as backwards compat
-                        # for subscription updates with schema version `2`. However schema version 3
-                        # sends the "entity" in the payload
-                        entity_regex = r"^(MATCH|match)[ ]*\(([^)]+)\)"
-                        entity_match = re.match(entity_regex, contents["request"]["query"])
-                        if not entity_match:
-                            raise InvalidMessageError(
-                                "Unable to fetch entity from query in message"
-                            )
-                        entity_key = entity_match.group(2)
-                    _delete_from_snuba(
-                        self.topic_to_dataset[message.topic()],
-                        contents["subscription_id"],
-                        EntityKey(entity_key),
-                    )
-                except InvalidMessageError as e:
-                    logger.exception(e)
-                except Exception:
-                    logger.exception("Failed to delete unused subscription from snuba.")
-                return
-
-            if subscription.type not in subscriber_registry:
-                metrics.incr("snuba_query_subscriber.subscription_type_not_registered")
-                logger.error(
-                    "Received subscription update, but no subscription handler registered",
-                    extra={
-                        "offset": message.offset(),
-                        "partition": message.partition(),
-                        "value": message.value(),
-                    },
-                )
-                return
+            subscription = self.get_subscription(message, contents)
+            if subscription is not None:
+                self.call_subscriber(message, contents, subscription)
 
-            sentry_sdk.set_tag("project_id", subscription.project_id)
-            sentry_sdk.set_tag("query_subscription_id", contents["subscription_id"])
+    def handle_contents_batch(self, items: List[Tuple[Message, Dict[str, Any]]]) -> None:
+        """
+        Passes the parsed payloads of many messages to the callbacks defined by their
+        subscriptions. Subscription types with a batch callback get all of their updates
+        in one call, in message order.
+        """
+        batches: Dict[str, List[Tuple[Dict[str, Any], QuerySubscription]]] = defaultdict(list)
+        for message, contents in items:
+            with sentry_sdk.push_scope() as scope:
+                scope.set_tag("query_subscription_id", contents["subscription_id"])
 
-            callback = subscriber_registry[subscription.type]
-            with sentry_sdk.start_span(op="process_message") as span, metrics.timer(
-                "snuba_query_subscriber.callback.duration", instance=subscription.type
+                subscription = self.get_subscription(message, contents)
+                if subscription is None:
+                    continue
+
+                if subscription.type in batch_subscriber_registry:
+                    batches[subscription.type].append((contents, subscription))
+                else:
+                    self.call_subscriber(message, contents, subscription)
+
+        for subscription_type, updates in batches.items():
+            callback = batch_subscriber_registry[subscription_type]
+            with sentry_sdk.start_span(op="process_messages") as span, metrics.timer(
+                "snuba_query_subscriber.batch_callback.duration", instance=subscription_type
             ):
-                span.set_data("payload", contents)
-                span.set_data("subscription_dataset", subscription.snuba_query.dataset)
-                span.set_data("subscription_query", subscription.snuba_query.query)
-                span.set_data("subscription_aggregation", subscription.snuba_query.aggregate)
-                span.set_data("subscription_time_window", subscription.snuba_query.time_window)
-                span.set_data("subscription_resolution", subscription.snuba_query.resolution)
-                span.set_data("message_offset", message.offset())
-                span.set_data("message_partition", message.partition())
-                span.set_data("message_value", message.value())
-
-                callback(contents, subscription)
+                span.set_data("count", len(updates))
+                callback(updates)
+
+    def get_subscription(
+        self, message: Message, contents: Dict[str, Any]
+    ) -> Optional[QuerySubscription]:
+        """
+        Returns the active subscription of a payload, if there is one that has a callback
+        registered. Subscriptions that no longer exist are deleted from Snuba.
+        """
+        try:
+            with metrics.timer("snuba_query_subscriber.fetch_subscription"):
+                subscription: QuerySubscription = QuerySubscription.objects.get_from_cache(
+                    subscription_id=contents["subscription_id"]
+                )
+                if subscription.status != QuerySubscription.Status.ACTIVE.value:
+                    metrics.incr("snuba_query_subscriber.subscription_inactive")
+                    return None
+        except QuerySubscription.DoesNotExist:
+            metrics.incr("snuba_query_subscriber.subscription_doesnt_exist")
+            logger.error(
+                "Received subscription update, but subscription does not exist",
+                extra={
+                    "offset": message.offset(),
+                    "partition": message.partition(),
+                    "value": message.value(),
+                },
+            )
+            try:
+                if "entity" in contents:
+                    entity_key = contents["entity"]
+                else:
+                    # XXX(ahmed): Remove this logic. This was kept here as backwards compat
+                    # for subscription updates with schema version `2`. However schema version 3
+                    # sends the "entity" in the payload
+                    entity_regex = r"^(MATCH|match)[ ]*\(([^)]+)\)"
+                    entity_match = re.match(entity_regex, contents["request"]["query"])
+                    if not entity_match:
+                        raise InvalidMessageError("Unable to fetch entity from query in message")
+                    entity_key = entity_match.group(2)
+                _delete_from_snuba(
+                    self.topic_to_dataset[message.topic()],
+                    contents["subscription_id"],
+                    EntityKey(entity_key),
+                )
+            except InvalidMessageError as e:
+                logger.exception(e)
+            except Exception:
+                logger.exception("Failed to delete unused subscription from snuba.")
+            return None
+
+        if subscription.type not in subscriber_registry:
+            metrics.incr("snuba_query_subscriber.subscription_type_not_registered")
+            logger.error(
+                "Received subscription update, but no subscription handler registered",
+                extra={
+                    "offset": message.offset(),
+                    "partition": message.partition(),
+                    "value": message.value(),
+                },
+            )
+            return None
+
+        return subscription
+
+    def call_subscriber(
+        self, message: Message, contents: Dict[str, Any], subscription: QuerySubscription
+    ) -> None:
+        sentry_sdk.set_tag("project_id", subscription.project_id)
+        sentry_sdk.set_tag("query_subscription_id", contents["subscription_id"])
+
+        callback = subscriber_registry[subscription.type]
+        with sentry_sdk.start_span(op="process_message") as span, metrics.timer(
+            "snuba_query_subscriber.callback.duration", instance=subscription.type
+        ):
+            span.set_data("payload", contents)
+            span.set_data("subscription_dataset", subscription.snuba_query.dataset)
+            span.set_data("subscription_query", subscription.snuba_query.query)
+            span.set_data("subscription_aggregation", subscription.snuba_query.aggregate)
+            span.set_data("subscription_time_window", subscription.snuba_query.time_window)
+            span.set_data("subscription_resolution", subscription.snuba_query.resolution)
+            span.set_data("message_offset", message.offset())
+            span.set_data("message_partition", message.partition())
+            span.set_data("message_value", message.value())
+
+            callback(contents, subscription)
 
     def parse_message_value(self, value: str) -> Dict[str, Any]:
         """
@@ -349,20 +590,20 @@ class QuerySubscriptionConsumer:
 
         with metrics.timer("snuba_query_subscriber.parse_message_value.json_validate_wrapper"):
             try:
-                jsonschema.validate(wrapper, SUBSCRIPTION_WRAPPER_SCHEMA)
+                self.wrapper_validator.validate(wrapper)
             except jsonschema.ValidationError:
                 metrics.incr("snuba_query_subscriber.message_wrapper_invalid")
                 raise InvalidSchemaError("Message wrapper does not match schema")
 
         schema_version: int = wrapper["version"]
-        if schema_version not in SUBSCRIPTION_PAYLOAD_VERSIONS:
+        if schema_version not in self.payload_validators:
             metrics.incr("snuba_query_subscriber.message_wrapper_invalid_version")
             raise InvalidMessageError("Version specified in wrapper has no schema")
 
         payload: Dict[str, Any] = wrapper["payload"]
         with metrics.timer("snuba_query_subscriber.parse_message_value.json_validate_payload"):
             try:
-                jsonschema.validate(payload, SUBSCRIPTION_PAYLOAD_VERSIONS[schema_version])
+                self.payload_validators[schema_version].validate(payload)
             except jsonschema.ValidationError:
                 metrics.incr("snuba_query_subscriber.message_payload_invalid")
                 raise InvalidSchemaError("Message payload does not match schema")
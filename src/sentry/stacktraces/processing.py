@@ -13,6 +13,9 @@ from sentry.utils.safe import get_path, safe_execute
 
 logger = logging.getLogger(__name__)
 
+#: How long processed frames are kept in the cache.
+FRAME_CACHE_TIMEOUT = 3600
+
 StacktraceInfo = namedtuple(
     "StacktraceInfo", ["stacktrace", "container", "platforms", "is_exception"]
 )
@@ -30,6 +33,7 @@ class ProcessableFrame:
         self.data = None
         self.cache_key = None
         self.cache_value = None
+        self.cache_value_changed = False
         self.processable_frames = processable_frames
 
     def __repr__(self):
@@ -63,8 +67,13 @@ class ProcessableFrame:
         return self.processable_frames[last_idx]
 
     def set_cache_value(self, value):
+        """
+        Sets the value to be cached for this frame. The values of all frames
+        are written to the cache at once when the processing task is closed.
+        """
         if self.cache_key is not None:
-            cache.set(self.cache_key, value, 3600)
+            self.cache_value = value
+            self.cache_value_changed = True
             return True
         return False
 
@@ -84,9 +93,30 @@ class StacktraceProcessingTask:
         self.processors = processors
 
     def close(self):
+        try:
+            self.write_frame_cache()
+        except Exception:
+            # The frames have been processed, failing to cache them must not
+            # fail the event.
+            logger.exception("stacktraces.processing.frame_cache_write_failed")
+
         for frame in self.iter_processable_frames():
             frame.close()
 
+    def write_frame_cache(self):
+        """
+        Writes the values passed to `ProcessableFrame.set_cache_value` to the
+        cache in a single request.
+        """
+        values = {}
+        for frame in self.iter_processable_frames():
+            if frame.cache_value_changed:
+                values[frame.cache_key] = frame.cache_value
+                frame.cache_value_changed = False
+
+        if values:
+            cache.set_many(values, FRAME_CACHE_TIMEOUT)
+
     def iter_processors(self):
         return iter(self.processors)
 
@@ -441,10 +471,14 @@ def get_crash_frame_from_event_data(data, frame_filter=None):
 
 
 def lookup_frame_cache(keys):
-    rv = {}
-    for key in keys:
-        rv[key] = cache.get(key)
-    return rv
+    """
+    Returns the cached values of ``keys`` with a single request to the cache.
+    Keys that are not in the cache are missing from the result.
+    """
+    keys = list(keys)
+    if not keys:
+        return {}
+    return cache.get_many(keys)
 
 
 def get_stacktrace_processing_task(infos, processors):
@@ -30,6 +30,7 @@ def merge_groups(
     **kwargs,
 ):
     # TODO(mattrobenolt): Write tests for all of this
+    from sentry.grouping.grouphash_cache import invalidate_grouphash_cache
     from sentry.models import (
         Activity,
         Environment,
@@ -105,6 +106,10 @@ def merge_groups(
             model_list, group, new_group, logger=logger, transaction_id=transaction_id
         )
 
+        # Some of the merged GroupHash rows may be cached as still belonging
+        # to the old group.
+        invalidate_grouphash_cache(group.project_id)
+
         if not has_more:
             # There are no more objects to merge for *this* "from" group, remove it
             # from the list of "from" groups that are being merged, and finish the
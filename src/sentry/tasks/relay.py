@@ -30,7 +30,7 @@ def update_config_cache(
 
     from sentry.models import Project, ProjectKey, ProjectKeyStatus
     from sentry.relay import projectconfig_cache
-    from sentry.relay.config import get_project_config
+    from sentry.relay.config import get_project_configs
 
     if project_id:
         set_current_event_project(project_id)
@@ -55,14 +55,20 @@ def update_config_cache(
     projectconfig_debounce_cache.mark_task_done(public_key, project_id, organization_id)
 
     if organization_id:
-        projects = list(Project.objects.filter(organization_id=organization_id))
-        keys = list(ProjectKey.objects.filter(project__in=projects))
+        projects = list(
+            Project.objects.filter(organization_id=organization_id).select_related("organization")
+        )
+        keys = _get_keys_for_projects(projects)
     elif project_id:
-        projects = [Project.objects.get(id=project_id)]
-        keys = list(ProjectKey.objects.filter(project__in=projects))
+        projects = [Project.objects.select_related("organization").get(id=project_id)]
+        keys = _get_keys_for_projects(projects)
     elif public_key:
         try:
-            keys = [ProjectKey.objects.get(public_key=public_key)]
+            keys = [
+                ProjectKey.objects.select_related("project__organization").get(
+                    public_key=public_key
+                )
+            ]
         except ProjectKey.DoesNotExist:
             # In this particular case, where a project key got deleted and
             # triggered an update, we at least know the public key that needs
@@ -78,15 +84,12 @@ def update_config_cache(
         assert False
 
     if generate:
-        config_cache = {}
+        config_cache = get_project_configs(
+            [key for key in keys if key.status == ProjectKeyStatus.ACTIVE]
+        )
         for key in keys:
             if key.status != ProjectKeyStatus.ACTIVE:
-                project_config = {"disabled": True}
-            else:
-                project_config = get_project_config(
-                    key.project, project_keys=[key], full_config=True
-                ).to_dict()
-            config_cache[key.public_key] = project_config
+                config_cache[key.public_key] = {"disabled": True}
 
         projectconfig_cache.set_many(config_cache)
     else:
@@ -97,6 +100,18 @@ def update_config_cache(
         projectconfig_cache.delete_many(cache_keys_to_delete)
 
 
+def _get_keys_for_projects(projects):
+    from sentry.models import ProjectKey
+
+    projects_by_id = {project.id: project for project in projects}
+    keys = list(ProjectKey.objects.filter(project__in=projects))
+    for key in keys:
+        # Bind the already loaded projects, they would otherwise be fetched
+        # once per key.
+        key.project = projects_by_id[key.project_id]
+    return keys
+
+
 def schedule_update_config_cache(
     generate, project_id=None, organization_id=None, public_key=None, update_reason=None
 ):
@@ -1,7 +1,10 @@
 import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime
 from time import time
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 import sentry_sdk
 from django.conf import settings
@@ -30,6 +33,9 @@ info_logger = logging.getLogger("sentry.store")
 # Is reprocessing on or off by default?
 REPROCESSING_DEFAULT = False
 
+# Events submitted for saving while `batch_save_events` is active, by project.
+_pending_saves = threading.local()
+
 
 class RetryProcessing(Exception):
     pass
@@ -92,6 +98,13 @@ def submit_save_event(
     if cache_key:
         data = None
 
+    pending = getattr(_pending_saves, "events", None)
+    if pending is not None and cache_key and not from_reprocessing:
+        pending[project_id].append(
+            {"cache_key": cache_key, "start_time": start_time, "event_id": event_id}
+        )
+        return
+
     # XXX: honor from_reprocessing
 
     save_event.delay(
@@ -103,6 +116,37 @@ def submit_save_event(
     )
 
 
+@contextmanager
+def batch_save_events() -> Iterator[None]:
+    """
+    Collects the events that are submitted for saving within this block and
+    saves the events of each project together in `save_event_batch` tasks
+    when the block is left. Only events that are passed by cache key are
+    collected, everything else is submitted right away.
+
+    This does nothing unless ``store.save-event-batch-size`` is above 1.
+    """
+    batch_size = options.get("store.save-event-batch-size")
+    if batch_size <= 1 or getattr(_pending_saves, "events", None) is not None:
+        yield
+        return
+
+    _pending_saves.events = pending = defaultdict(list)
+    try:
+        yield
+    finally:
+        # Collected events have been handed over for saving already, so they
+        # need to be submitted even if the block failed.
+        _pending_saves.events = None
+        for project_id, events in pending.items():
+            for i in range(0, len(events), batch_size):
+                batch = events[i : i + batch_size]
+                if len(batch) == 1:
+                    save_event.delay(data=None, project_id=project_id, **batch[0])
+                else:
+                    save_event_batch.delay(project_id=project_id, events=batch)
+
+
 def _do_preprocess_event(
     cache_key: str,
     data: Optional[Event],
@@ -676,24 +720,114 @@ def _do_save_event(
                     processing.event_processing_store.delete_by_key(cache_key)
 
         finally:
-            reprocessing2.mark_event_reprocessed(data)
-            if cache_key:
-                with metrics.timer("tasks.store.do_save_event.delete_attachment_cache"):
-                    attachment_cache.delete(cache_key)
-
-            if start_time:
-                metrics.timing(
-                    "events.time-to-process",
-                    time() - start_time,
-                    instance=data["platform"],
-                    tags={
-                        "is_reprocessing2": "true"
-                        if reprocessing2.is_reprocessed_event(data)
-                        else "false",
-                    },
-                )
+            _finish_save_event(cache_key, data, start_time, project_id)
+
+
+def _finish_save_event(
+    cache_key: Optional[str], data: Event, start_time: Optional[int], project_id: int
+) -> None:
+    reprocessing2.mark_event_reprocessed(data)
+    if cache_key:
+        with metrics.timer("tasks.store.do_save_event.delete_attachment_cache"):
+            attachment_cache.delete(cache_key)
+
+    if start_time:
+        metrics.timing(
+            "events.time-to-process",
+            time() - start_time,
+            instance=data["platform"],
+            tags={
+                "is_reprocessing2": "true" if reprocessing2.is_reprocessed_event(data) else "false",
+            },
+        )
+
+    time_synthetic_monitoring_event(data, project_id, start_time)
+
+
+def _do_save_events(project_id: int, events: List[Dict[str, Any]]) -> None:
+    """
+    Saves error events of one project together. Every event is given by its
+    ``cache_key``, ``start_time`` and ``event_id``. If saving the batch fails,
+    the events are saved one by one instead.
+    """
+
+    set_current_event_project(project_id)
+
+    from sentry.event_manager import save_error_events
+
+    jobs = []
+    for event in events:
+        cache_key = event["cache_key"]
+        with metrics.timer("tasks.store.do_save_event.get_cache"):
+            data = processing.event_processing_store.get(cache_key)
+
+        if not data or reprocessing.event_supports_reprocessing(data):
+            with metrics.timer("tasks.store.do_save_event.delete_raw_event"):
+                delete_raw_event(project_id, event["event_id"], allow_hint_clear=True)
 
-            time_synthetic_monitoring_event(data, project_id, start_time)
+        if not data:
+            metrics.incr(
+                "events.failed", tags={"reason": "cache", "stage": "post"}, skip_internal=False
+            )
+            continue
+
+        data = CanonicalKeyDict(data)
+        if killswitch_matches_context(
+            "store.load-shed-save-event-projects",
+            {
+                "project_id": project_id,
+                "event_type": data.get("type") or "none",
+                "platform": data.get("platform") or "none",
+            },
+        ):
+            processing.event_processing_store.delete_by_key(cache_key)
+            _finish_save_event(cache_key, data, event["start_time"], project_id)
+            continue
+
+        jobs.append(
+            {
+                "data": data,
+                "project_id": project_id,
+                "raw": False,
+                "start_time": event["start_time"],
+                "cache_key": cache_key,
+            }
+        )
+
+    if not jobs:
+        return
+
+    project = Project.objects.get_from_cache(id=project_id)
+    try:
+        with metrics.timer("tasks.store.do_save_events.save_error_events"):
+            save_error_events(jobs, {project.id: project})
+    except Exception:
+        error_logger.exception("save_events.batch_failed", extra={"project_id": project_id})
+        metrics.incr("tasks.store.save_events.batch_failed", skip_internal=False)
+        for job in jobs:
+            _do_save_event(
+                cache_key=job["cache_key"],
+                start_time=job["start_time"],
+                event_id=job["data"]["event_id"],
+                project_id=project_id,
+            )
+        return
+
+    for job in jobs:
+        cache_key = job["cache_key"]
+        if "hash_discarded" in job:
+            # The event won't show up in post-processing.
+            with metrics.timer("tasks.store.do_save_event.delete_cache"):
+                processing.event_processing_store.delete_by_key(cache_key)
+            data = job["data"]
+        else:
+            # Put the updated event back into the cache so that post_process
+            # has the most recent data.
+            data = dict(job["event"].data.data.items())
+            with metrics.timer("tasks.store.do_save_event.write_processing_cache"):
+                processing.event_processing_store.store(data)
+
+        _finish_save_event(cache_key, data, job["start_time"], project_id)
 
 
 def time_synthetic_monitoring_event(
@@ -763,6 +897,16 @@ def save_event(
     _do_save_event(cache_key, data, start_time, event_id, project_id, **kwargs)
 
 
+@instrumented_task(  # type: ignore
+    name="sentry.tasks.store.save_event_batch",
+    queue="events.save_event",
+    time_limit=65,
+    soft_time_limit=60,
+)
+def save_event_batch(project_id: int, events: List[Dict[str, Any]], **kwargs: Any) -> None:
+    _do_save_events(project_id, events)
+
+
 @instrumented_task(  # type: ignore
     name="sentry.tasks.store.save_event_transaction",
     queue="events.save_event_transaction",
@@ -1,3 +1,4 @@
+from array import array
 from collections import OrderedDict
 from collections.abc import Callable
 from datetime import timedelta
@@ -100,6 +101,7 @@ class BaseTSDB(Service):
     __read_methods__ = frozenset(
         [
             "get_range",
+            "get_range_series",
             "get_sums",
             "get_distinct_counts_series",
             "get_distinct_counts_totals",
@@ -140,6 +142,7 @@ class BaseTSDB(Service):
                 "models_with_environment_support",
                 "normalize_to_epoch",
                 "rollup",
+                "rollup_series",
             ]
         )
         | __write_methods__
@@ -361,6 +364,27 @@ class BaseTSDB(Service):
         """
         raise NotImplementedError
 
+    def get_range_series(self, model, keys, start, end, rollup=None, environment_ids=None):
+        """
+        Like ``get_range``, but returns a 2-tuple of the form ``(series,
+        values)``: ``series`` is the list of bucket timestamps, and ``values``
+        maps every key to an ``array("q")`` with its count in every bucket.
+
+        The default implementation converts the result of ``get_range``.
+        """
+        range_set = self.get_range(model, keys, start, end, rollup, environment_ids)
+
+        series = sorted({ts for points in range_set.values() for ts, _ in points})
+        indexes = {ts: index for index, ts in enumerate(series)}
+
+        values = {}
+        for key in keys:
+            counts = array("q", [0]) * len(series)
+            for ts, count in range_set.get(key, ()):
+                counts[indexes[ts]] += int(count)
+            values[key] = counts
+        return series, values
+
     def get_sums(self, model, keys, start, end, rollup=None, environment_id=None, use_cache=False):
         range_set = self.get_range(
             model,
@@ -393,6 +417,28 @@ class BaseTSDB(Service):
                     last_new_ts = new_ts
         return result
 
+    def rollup_series(self, series, values, rollup):
+        """
+        Like ``rollup``, for the ``(series, values)`` returned by
+        ``get_range_series``: all keys share the same buckets, so the target
+        bucket of every point only has to be computed once.
+        """
+        new_series = []
+        indexes = []
+        for ts in series:
+            new_ts = self.normalize_ts_to_epoch(ts, rollup)
+            if not new_series or new_series[-1] != new_ts:
+                new_series.append(new_ts)
+            indexes.append(len(new_series) - 1)
+
+        result = {}
+        for key, counts in values.items():
+            new_counts = array("q", [0]) * len(new_series)
+            for index, count in zip(indexes, counts):
+                new_counts[index] += count
+            result[key] = new_counts
+        return new_series, result
+
     def record(self, model, key, values, timestamp=None, environment_id=None):
         """
         Record occurrence of items in a single distinct counter.
@@ -3,6 +3,7 @@ import logging
 import operator
 import random
 import uuid
+from array import array
 from collections import defaultdict, namedtuple
 from functools import reduce
 from hashlib import md5
@@ -12,7 +13,10 @@ from django.utils.encoding import force_bytes
 from pkg_resources import resource_string
 
 from sentry.tsdb.base import BaseTSDB
+from sentry.utils import metrics
 from sentry.utils.compat import crc32, map, zip
+from sentry.utils.concurrent import SingleFlight
+from sentry.utils.datastructures import LRUCache
 from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.redis import SentryScript, check_cluster_versions, get_cluster_from_options
 from sentry.utils.versioning import Version
@@ -103,6 +107,12 @@ class RedisTSDB(BaseTSDB):
     frequency table can be displayed as percentages of the whole data set.
     (Additional documentation and the bulk of the logic for implementing the
     frequency table API can be found in the ``cmsketch.lua`` script.)
+
+    Reads of ``get_sums`` and ``get_distinct_counts_totals`` that pass
+    ``use_cache=True`` are served from an in-process cache for
+    ``read_cache_ttl`` seconds (set it to ``0`` to disable the cache.) Results
+    are cached per key and bucket range, and concurrent reads of the same
+    range are coalesced into a single query.
     """
 
     DEFAULT_SKETCH_PARAMETERS = SketchParameters(3, 128, 50)
@@ -112,6 +122,12 @@ class RedisTSDB(BaseTSDB):
         self.prefix = prefix
         self.vnodes = vnodes
         self.enable_frequency_sketches = options.pop("enable_frequency_sketches", False)
+        read_cache_ttl = options.pop("read_cache_ttl", 5)
+        read_cache_size = options.pop("read_cache_size", 10000)
+        self.read_cache = (
+            LRUCache(maxsize=read_cache_size, ttl=read_cache_ttl) if read_cache_ttl else None
+        )
+        self.__read_flight = SingleFlight()
         super().__init__(**options)
 
     def validate(self):
@@ -271,6 +287,78 @@ class RedisTSDB(BaseTSDB):
         >>>          start=now - timedelta(days=1),
         >>>          end=now)
         """
+        series, values = self.get_range_series(model, keys, start, end, rollup, environment_ids)
+        return {key: list(zip(series, counts)) for key, counts in values.items()}
+
+    def get_sums(self, model, keys, start, end, rollup=None, environment_id=None, use_cache=False):
+        def get_sums(keys):
+            _, values = self.get_range_series(
+                model,
+                keys,
+                start,
+                end,
+                rollup,
+                environment_ids=[environment_id] if environment_id is not None else None,
+            )
+            return {key: sum(counts) for key, counts in values.items()}
+
+        if not use_cache:
+            return get_sums(keys)
+
+        return self._get_cached("sums", model, keys, start, end, rollup, environment_id, get_sums)
+
+    def _get_cached(self, method, model, keys, start, end, rollup, environment_id, fetch):
+        """
+        Returns the values of ``keys`` from the read cache, and calls
+        ``fetch(keys)`` for the keys that are not cached.
+
+        As counters are stored in buckets, the result of a query only depends
+        on the range of buckets it covers, not on the exact ``start`` and
+        ``end`` timestamps.
+        """
+        if self.read_cache is None:
+            return fetch(keys)
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+        if not series:
+            return fetch(keys)
+
+        prefix = (method, model, rollup, series[0], series[-1], environment_id)
+
+        result = {}
+        missing = []
+        for key in keys:
+            value = self.read_cache.get(prefix + (key,))
+            if value is not None:
+                result[key] = value
+            else:
+                missing.append(key)
+
+        if result:
+            metrics.incr("tsdb.read_cache", amount=len(result), tags={"result": "hit"})
+
+        if missing:
+            metrics.incr("tsdb.read_cache", amount=len(missing), tags={"result": "miss"})
+
+            def fetch_and_cache():
+                values = fetch(missing)
+                for key, value in values.items():
+                    self.read_cache.set(prefix + (key,), value)
+                return values
+
+            result.update(self.__read_flight.do(prefix + (tuple(missing),), fetch_and_cache))
+
+        return result
+
+    def get_range_series(self, model, keys, start, end, rollup=None, environment_ids=None):
+        """
+        Like ``get_range``, but returns a 2-tuple of the form ``(series,
+        values)``: ``series`` is the list of bucket timestamps, and ``values``
+        maps every key to an ``array("q")`` with its count in every bucket.
+
+        All fields stored in the same hash are fetched with a single
+        ``HMGET``.
+        """
         # redis backend doesn't support multiple envs
         if environment_ids is not None and len(environment_ids) > 1:
             raise NotImplementedError
@@ -279,27 +367,33 @@ class RedisTSDB(BaseTSDB):
         self.validate_arguments([model], [environment_id])
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
-        series = map(to_datetime, series)
+        timestamps = [to_datetime(epoch) for epoch in series]
+
+        # hash key -> ([hash field, ...], [(key, bucket index), ...])
+        requests = defaultdict(lambda: ([], []))
+        for key in keys:
+            for index, timestamp in enumerate(timestamps):
+                hash_key, hash_field = self.make_counter_key(
+                    model, rollup, timestamp, key, environment_id
+                )
+                fields, targets = requests[hash_key]
+                fields.append(hash_field)
+                targets.append((key, index))
 
-        results = []
         cluster, _ = self.get_cluster(environment_id)
         with cluster.map() as client:
-            for key in keys:
-                for timestamp in series:
-                    hash_key, hash_field = self.make_counter_key(
-                        model, rollup, timestamp, key, environment_id
-                    )
-                    results.append(
-                        (to_timestamp(timestamp), key, client.hget(hash_key, hash_field))
-                    )
+            responses = {
+                hash_key: client.hmget(hash_key, fields)
+                for hash_key, (fields, _) in requests.items()
+            }
 
-        results_by_key = defaultdict(dict)
-        for epoch, key, count in results:
-            results_by_key[key][epoch] = int(count.value or 0)
+        values = {key: array("q", [0]) * len(series) for key in keys}
+        for hash_key, (_, targets) in requests.items():
+            for (key, index), count in zip(targets, responses[hash_key].value):
+                if count is not None:
+                    values[key][index] = int(count)
 
-        for key, points in results_by_key.items():
-            results_by_key[key] = sorted(points.items())
-        return dict(results_by_key)
+        return series, values
 
     def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
         environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
@@ -442,6 +536,24 @@ class RedisTSDB(BaseTSDB):
         """
         self.validate_arguments([model], [environment_id])
 
+        def get_distinct_counts_totals(keys):
+            return self._get_distinct_counts_totals(model, keys, start, end, rollup, environment_id)
+
+        if not use_cache:
+            return get_distinct_counts_totals(keys)
+
+        return self._get_cached(
+            "distinct_counts_totals",
+            model,
+            keys,
+            start,
+            end,
+            rollup,
+            environment_id,
+            get_distinct_counts_totals,
+        )
+
+    def _get_distinct_counts_totals(self, model, keys, start, end, rollup, environment_id):
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
 
         responses = {}
@@ -1,6 +1,7 @@
+import threading
 import zlib
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, cast
+from typing import Generic, Optional, TypeVar, cast
 
 import zstandard
 
@@ -87,8 +88,42 @@ class ZlibCodec(Codec[bytes, bytes]):
 
 
 class ZstdCodec(Codec[bytes, bytes]):
+    """
+    Compresses values with zstd, optionally using a (trained) compression
+    dictionary. Values encoded with a dictionary can only be decoded with the
+    same dictionary.
+
+    Compressors and decompressors are not thread safe, so they are reused per
+    thread instead of being created for every value.
+    """
+
+    def __init__(
+        self, dictionary: Optional[zstandard.ZstdCompressionDict] = None, level: int = 3
+    ) -> None:
+        if dictionary is not None:
+            dictionary.precompute_compress(level=level)
+        self.dictionary = dictionary
+        self.level = level
+        self._local = threading.local()
+
+    def _get_compressor(self) -> zstandard.ZstdCompressor:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(
+                level=self.level, dict_data=self.dictionary
+            )
+        return compressor
+
+    def _get_decompressor(self) -> zstandard.ZstdDecompressor:
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = zstandard.ZstdDecompressor(
+                dict_data=self.dictionary
+            )
+        return decompressor
+
     def encode(self, value: bytes) -> bytes:
-        return cast(bytes, zstandard.ZstdCompressor().compress(value))
+        return cast(bytes, self._get_compressor().compress(value))
 
     def decode(self, value: bytes) -> bytes:
-        return cast(bytes, zstandard.ZstdDecompressor().decompress(value))
+        return cast(bytes, self._get_decompressor().decompress(value))
@@ -275,3 +275,41 @@ class FutureSet:
 
         if remaining == 0:
             self.__execute_callback(callback)
+
+
+class SingleFlight:
+    """\
+    Deduplicates concurrent calls with the same key: while a call for a key
+    is in progress, other threads calling ``do`` with the same key wait for
+    it and receive its result (or exception) instead of calling their own
+    function.
+
+    Results are not retained once the call has completed, this is not a
+    cache.
+    """
+
+    def __init__(self):
+        self.__calls = {}
+        self.__lock = threading.Lock()
+
+    def do(self, key, function):
+        with self.__lock:
+            future = self.__calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self.__calls[key] = Future()
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = function()
+        except Exception as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.__lock:
+                del self.__calls[key]
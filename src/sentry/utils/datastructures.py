@@ -1,3 +1,6 @@
+import threading
+import time
+from collections import OrderedDict
 from collections.abc import Hashable, MutableMapping
 
 __unset__ = object()
@@ -59,3 +62,83 @@ class BidirectionalMapping(MutableMapping):
 
     def inverse(self):
         return self.__inverse.copy()
+
+
+class LRUCache:
+    """\
+    A bounded, thread-safe mapping that evicts the least recently used entry
+    once it holds more than ``maxsize`` entries.
+
+    If ``ttl`` is given, entries expire that many seconds after they were
+    set. Lookups are counted in ``hits`` and ``misses`` so that callers can
+    report the hit rate of the cache.
+
+    If ``getsizeof`` is given, it is called with every value that is set and
+    ``maxsize`` bounds the total size of all values instead of their number.
+    Values larger than ``maxsize`` are not stored at all.
+    """
+
+    def __init__(self, maxsize, ttl=None, clock=time.monotonic, getsizeof=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.currsize = 0
+        self.__clock = clock
+        self.__getsizeof = getsizeof
+        self.__data = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.__lock:
+            try:
+                value, expires_at, size = self.__data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires_at is not None and expires_at <= self.__clock():
+                del self.__data[key]
+                self.currsize -= size
+                self.misses += 1
+                return default
+
+            self.__data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires_at = self.__clock() + self.ttl if self.ttl is not None else None
+        size = self.__getsizeof(value) if self.__getsizeof is not None else 1
+        with self.__lock:
+            self.__pop(key)
+            if size > self.maxsize:
+                return
+
+            self.__data[key] = (value, expires_at, size)
+            self.currsize += size
+            while self.currsize > self.maxsize:
+                _, (_, _, evicted_size) = self.__data.popitem(last=False)
+                self.currsize -= evicted_size
+
+    def __pop(self, key):
+        entry = self.__data.pop(key, None)
+        if entry is not None:
+            self.currsize -= entry[2]
+
+    def delete(self, key):
+        with self.__lock:
+            self.__pop(key)
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
+            self.currsize = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self.__data)
@@ -6,12 +6,12 @@
 
 import datetime
 import decimal
+import re
 import uuid
 from enum import Enum
-from typing import Any
+from typing import Any, Union
 
 import rapidjson
-import sentry_sdk
 from django.utils.encoding import force_text
 from django.utils.functional import Promise
 from django.utils.safestring import mark_safe
@@ -51,6 +51,91 @@ def better_default_encoder(o):
     raise TypeError(repr(o) + " is not JSON serializable")
 
 
+# rapidjson writes upper case hex digits in \\u escapes, simplejson lower case.
+# Every backslash in the output starts an escape, so matching escapes from
+# left to right never matches the second half of an escaped backslash.
+_RAPIDJSON_ESCAPE_RE = re.compile(r"\\(u[0-9A-F]{4}|.)")
+
+
+def _lower_escape(match):
+    escape = match.group(0)
+    return escape.lower() if escape[1] == "u" else escape
+
+
+class RapidJSONEncoder(JSONEncoder):
+    """
+    A simplejson `JSONEncoder` which encodes with rapidjson where possible.
+
+    The output is identical to the one of simplejson. rapidjson is configured
+    to give up on everything it would encode differently, like non-string
+    keys, NaN with ``ignore_nan``, iterables or lone surrogates, in which case
+    the value is encoded with simplejson instead. Only the compact, ASCII-only
+    encoding is supported this way, other configurations always use
+    simplejson.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self._rapidjson_kwargs = None
+        if (
+            self.ensure_ascii
+            and self.indent is None
+            and self.item_separator == ","
+            and self.key_separator == ":"
+            and not self.skipkeys
+            and self.use_decimal
+            and self.namedtuple_as_object
+            and self.tuple_as_array
+            and not self.iterable_as_array
+            and not self.bigint_as_string
+            and self.int_as_string_bitcount is None
+            and self.item_sort_key is None
+            and not self.for_json
+        ):
+            number_mode = rapidjson.NM_DECIMAL
+            if self.allow_nan and not self.ignore_nan:
+                number_mode |= rapidjson.NM_NAN
+
+            self._rapidjson_kwargs = {
+                "default": self._rapidjson_default,
+                "ensure_ascii": True,
+                "number_mode": number_mode,
+                "datetime_mode": rapidjson.DM_NONE,
+                "uuid_mode": rapidjson.UM_NONE,
+                "bytes_mode": rapidjson.BM_NONE,
+                "iterable_mode": rapidjson.IM_ONLY_LISTS,
+            }
+            if self.sort_keys:
+                self._rapidjson_kwargs["mapping_mode"] = rapidjson.MM_SORT_KEYS
+
+    def _rapidjson_default(self, o):
+        # Mirrors the order in which simplejson treats these types.
+        _asdict = getattr(o, "_asdict", None)
+        if _asdict is not None and callable(_asdict):
+            return _asdict()
+        if isinstance(o, tuple):
+            return list(o)
+        return self.default(o)
+
+    def encode(self, o):
+        if self._rapidjson_kwargs is None:
+            return super().encode(o)
+
+        try:
+            rv = rapidjson.dumps(o, **self._rapidjson_kwargs)
+        except (TypeError, ValueError, RecursionError):
+            # Also raises the appropriate error if simplejson can not encode
+            # the value either.
+            return super().encode(o)
+
+        if "\\u" in rv:
+            rv = _RAPIDJSON_ESCAPE_RE.sub(_lower_escape, rv)
+        if "\x7f" in rv:
+            rv = rv.replace("\x7f", "\\u007f")
+        return rv
+
+
 class JSONEncoderForHTML(JSONEncoder):
     # Our variant of JSONEncoderForHTML that also accounts for apostrophes
     # See: https://github.com/simplejson/simplejson/blob/master/simplejson/encoder.py
@@ -70,7 +155,7 @@ class JSONEncoderForHTML(JSONEncoder):
             yield chunk
 
 
-_default_encoder = JSONEncoder(
+_default_encoder = RapidJSONEncoder(
     # upstream: (', ', ': ')
     # Ours eliminates whitespace.
     separators=(",", ":"),
@@ -102,16 +187,34 @@ def dumps(value: JSONData, escape: bool = False, **kwargs) -> str:
     return _default_encoder.encode(value)
 
 
+def dumps_bytes(value: JSONData) -> bytes:
+    """Like `dumps`, but returns UTF-8 encoded bytes."""
+    # The output is ASCII only, which is the cheapest to encode.
+    return _default_encoder.encode(value).encode("ascii")
+
+
 def load(fp, **kwargs) -> JSONData:
     return loads(fp.read())
 
 
-def loads(value: str, use_rapid_json: bool = False, **kwargs) -> JSONData:
-    with sentry_sdk.start_span(op="sentry.utils.json.loads"):
-        if use_rapid_json is True:
-            return rapidjson.loads(value)
-        else:
-            return _default_decoder.decode(value)
+def loads(value: Union[str, bytes], use_rapid_json: bool = False, **kwargs) -> JSONData:
+    """
+    Decodes a JSON document from a string or UTF-8 encoded bytes.
+
+    Documents are parsed with rapidjson, and with simplejson if rapidjson
+    rejects them. simplejson is more lenient about lone surrogates and out of
+    range numbers, and raises the `JSONDecodeError` callers expect. Pass
+    ``use_rapid_json`` to only use rapidjson.
+    """
+    if use_rapid_json is True:
+        return rapidjson.loads(value)
+
+    try:
+        return rapidjson.loads(value)
+    except ValueError:
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return _default_decoder.decode(value)
 
 
 def dumps_htmlsafe(value):
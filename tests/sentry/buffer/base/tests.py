@@ -73,3 +73,102 @@ class BufferTest(TestCase):
         self.buf.process(Group, columns, filters, {"last_seen": the_date}, signal_only=True)
         group.refresh_from_db()
         assert group.times_seen == prev_times_seen
+
+    @mock.patch("sentry.buffer.base.buffer_incr_complete")
+    def test_process_batch(self, buffer_incr_complete):
+        project = self.create_project()
+        group_1 = Group.objects.create(project=project, times_seen=1)
+        group_2 = Group.objects.create(project=project, times_seen=5)
+        the_date = timezone.now() + timedelta(days=5)
+
+        with self.assertNumQueries(1):
+            self.buf.process_batch(
+                [
+                    (Group, {"times_seen": 2}, {"id": group_1.id}, {"last_seen": the_date}, None),
+                    (Group, {"times_seen": 1}, {"id": group_2.id}, {"last_seen": the_date}, None),
+                ]
+            )
+
+        group_1.refresh_from_db()
+        group_2.refresh_from_db()
+        assert group_1.times_seen == 3
+        assert group_2.times_seen == 6
+        assert group_1.last_seen == group_2.last_seen == the_date
+        assert buffer_incr_complete.send_robust.call_count == 2
+
+        # The score is the same as when processing the group on its own
+        group_3 = Group.objects.create(project=project, times_seen=1)
+        self.buf.process(Group, {"times_seen": 2}, {"id": group_3.id}, {"last_seen": the_date})
+        group_3.refresh_from_db()
+        assert group_1.score == group_3.score
+
+    def test_process_batch_fallback(self):
+        project = self.create_project()
+        group = Group.objects.create(project=project, times_seen=1)
+
+        self.buf.process_batch(
+            [
+                (Group, {"times_seen": 1}, {"id": group.id}, None, None),
+                # Merged with the previous increment
+                (Group, {"times_seen": 1}, {"id": group.id}, None, None),
+                # The row does not exist and is created
+                (
+                    Group,
+                    {"times_seen": 1},
+                    {"id": group.id + 1000, "project_id": project.id},
+                    None,
+                    None,
+                ),
+            ]
+        )
+
+        group.refresh_from_db()
+        assert group.times_seen == 3
+        assert Group.objects.filter(id=group.id + 1000, times_seen=2).exists()
+
+    def test_process_batch_merges_duplicates(self):
+        project = self.create_project()
+        group_1 = Group.objects.create(project=project, times_seen=1)
+        group_2 = Group.objects.create(project=project, times_seen=1)
+        first_date = timezone.now() + timedelta(days=5)
+        second_date = first_date - timedelta(days=1)
+
+        with self.assertNumQueries(1):
+            self.buf.process_batch(
+                [
+                    (Group, {"times_seen": 1}, {"id": group_1.id}, {"last_seen": first_date}, None),
+                    (Group, {"times_seen": 1}, {"id": group_2.id}, {"last_seen": first_date}, None),
+                    (
+                        Group,
+                        {"times_seen": 2},
+                        {"id": group_1.id},
+                        {"last_seen": second_date},
+                        None,
+                    ),
+                ]
+            )
+
+        group_1.refresh_from_db()
+        group_2.refresh_from_db()
+        assert group_1.times_seen == 4
+        assert group_1.last_seen == second_date
+        assert group_2.times_seen == 2
+
+    @mock.patch("sentry.buffer.base.Buffer._bulk_update", side_effect=Exception("boom"))
+    def test_process_batch_bulk_update_failure(self, bulk_update):
+        project = self.create_project()
+        group_1 = Group.objects.create(project=project, times_seen=1)
+        group_2 = Group.objects.create(project=project, times_seen=5)
+
+        self.buf.process_batch(
+            [
+                (Group, {"times_seen": 1}, {"id": group_1.id}, None, None),
+                (Group, {"times_seen": 1}, {"id": group_2.id}, None, None),
+            ]
+        )
+
+        assert bulk_update.call_count == 1
+        group_1.refresh_from_db()
+        group_2.refresh_from_db()
+        assert group_1.times_seen == 2
+        assert group_2.times_seen == 6
@@ -1,13 +1,16 @@
+import os
 import pickle
 from datetime import datetime
 from unittest import mock
 
+from celery.signals import worker_process_shutdown
 from django.utils import timezone
 from django.utils.encoding import force_text
 
 from sentry.buffer.redis import RedisBuffer
 from sentry.models import Group, Project
 from sentry.testutils import TestCase
+from sentry.utils import json
 
 
 class RedisBufferTest(TestCase):
@@ -101,9 +104,9 @@ class RedisBufferTest(TestCase):
         result = {force_text(k): v for k, v in result.items()}
 
         f = result.pop("f")
-        assert pickle.loads(f) == {"pk": 1, "datetime": now}
-        assert pickle.loads(result.pop("e+datetime")) == now
-        assert pickle.loads(result.pop("e+foo")) == "bar"
+        assert json.loads(f) == {"pk": ["i", "1"], "datetime": ["d", "1493791566.000000"]}
+        assert json.loads(result.pop("e+datetime")) == ["d", "1493791566.000000"]
+        assert json.loads(result.pop("e+foo")) == ["s", "bar"]
         assert result == {"i+times_seen": b"1", "m": b"unittest.mock.Mock"}
 
         pending = client.zrange("b:p", 0, -1)
@@ -113,14 +116,112 @@ class RedisBufferTest(TestCase):
         # Force keys to strings
         result = {force_text(k): v for k, v in result.items()}
         f = result.pop("f")
-        assert pickle.loads(f) == {"pk": 1, "datetime": now}
-        assert pickle.loads(result.pop("e+datetime")) == now
-        assert pickle.loads(result.pop("e+foo")) == "baz"
+        assert json.loads(f) == {"pk": ["i", "1"], "datetime": ["d", "1493791566.000000"]}
+        assert json.loads(result.pop("e+datetime")) == ["d", "1493791566.000000"]
+        assert json.loads(result.pop("e+foo")) == ["s", "baz"]
         assert result == {"i+times_seen": b"2", "m": b"unittest.mock.Mock"}
 
         pending = client.zrange("b:p", 0, -1)
         assert pending == [b"foo"]
 
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.redis.process_incr", mock.Mock())
+    def test_incr_pickle_fallback(self):
+        client = self.buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        project = Project(id=1)
+        self.buf.incr(model, {}, {"project": project}, extra={"project": project})
+        result = client.hgetall("foo")
+        assert pickle.loads(result[b"f"]) == {"project": project}
+        assert pickle.loads(result[b"e+project"]) == project
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_incr_process_roundtrip(self, process):
+        now = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        extra = {
+            "last_seen": now,
+            "data": {"type": "default", "metadata": {"title": "foo"}},
+            "active": True,
+            "level": 40,
+        }
+        self.buf.incr(Group, {"times_seen": 1}, {"id": 1}, extra=extra)
+        self.buf.incr(Group, {"times_seen": 2}, {"id": 1}, extra=extra, signal_only=True)
+        self.buf.process("foo")
+        process.assert_called_once_with(Group, {"times_seen": 3}, {"id": 1}, extra, True)
+
+        # The key got removed, so processing again does nothing
+        client = self.buf.cluster.get_routing_client()
+        assert client.exists("foo") == 0
+        assert client.zrange("b:p", 0, -1) == []
+        self.buf.process("foo")
+        assert process.call_count == 1
+
+    @mock.patch("sentry.buffer.base.Buffer.process_batch")
+    def test_process_batch_keys(self, process_batch):
+        self.buf.incr(Group, {"times_seen": 1}, {"id": 1})
+        self.buf.incr(Group, {"times_seen": 2}, {"id": 2})
+        self.buf.incr(Group, {"times_seen": 3}, {"id": 2})
+
+        keys = [self.buf._make_key(Group, {"id": 1}), self.buf._make_key(Group, {"id": 2})]
+        self.buf.process(batch_keys=keys + ["missing"])
+        process_batch.assert_called_once_with(
+            [
+                (Group, {"times_seen": 1}, {"id": 1}, {}, None),
+                (Group, {"times_seen": 5}, {"id": 2}, {}, None),
+            ]
+        )
+
+        client = self.buf.cluster.get_routing_client()
+        assert client.zrange("b:p", 0, -1) == []
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    def test_incr_coalesced(self):
+        now = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        buf = RedisBuffer(coalesce_window=60, coalesce_max_ops=3)
+        client = buf.cluster.get_routing_client()
+
+        buf.incr(Group, {"times_seen": 1}, {"id": 1}, extra={"last_seen": now})
+        buf.incr(Group, {"times_seen": 2}, {"id": 1}, extra={"message": "foo"})
+        assert client.hgetall("foo") == {}
+
+        buf.incr(Group, {"times_seen": 3}, {"id": 1}, extra={"message": "bar"})
+        result = {force_text(k): v for k, v in client.hgetall("foo").items()}
+        assert result["i+times_seen"] == b"6"
+        assert json.loads(result["e+last_seen"]) == ["d", "1493791566.000000"]
+        assert json.loads(result["e+message"]) == ["s", "bar"]
+
+        buf.incr(Group, {"times_seen": 1}, {"id": 1})
+        buf.coalescer.flush()
+        assert client.hget("foo", "i+times_seen") == b"7"
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    def test_incr_coalesced_worker_shutdown(self):
+        buf = RedisBuffer(coalesce_window=60, coalesce_max_ops=3)
+        client = buf.cluster.get_routing_client()
+
+        buf.incr(Group, {"times_seen": 2}, {"id": 1})
+        assert client.hgetall("foo") == {}
+
+        worker_process_shutdown.send(sender=None, pid=os.getpid(), exitcode=0)
+        assert client.hget("foo", "i+times_seen") == b"2"
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    def test_incr_coalesced_flush_failure(self):
+        buf = RedisBuffer(coalesce_window=60, coalesce_max_ops=3)
+        client = buf.cluster.get_routing_client()
+
+        with mock.patch.object(buf.coalescer, "flush_func", side_effect=Exception("boom")):
+            buf.incr(Group, {"times_seen": 1}, {"id": 1})
+            buf.incr(Group, {"times_seen": 2}, {"id": 1})
+            buf.incr(Group, {"times_seen": 3}, {"id": 1})
+        assert client.hgetall("foo") == {}
+
+        # The failed increments are retried with the next flush.
+        buf.coalescer.flush()
+        assert client.hget("foo", "i+times_seen") == b"6"
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.redis.process_incr")
     @mock.patch("sentry.buffer.redis.process_pending")
@@ -16,6 +16,7 @@ from sentry.event_manager import (
     EventUser,
     HashDiscarded,
     has_pending_commit_resolution,
+    save_error_events,
 )
 from sentry.eventstore.models import Event
 from sentry.grouping.utils import hash_from_values
@@ -1860,6 +1861,73 @@ class EventManagerTest(TestCase):
         assert mechanism.synthetic is True
         assert event.title == "foo"
 
+    def _make_error_job(self, **kwargs):
+        manager = EventManager(make_event(**kwargs))
+        manager.normalize()
+        return {
+            "data": manager.get_data(),
+            "project_id": self.project.id,
+            "raw": False,
+            "start_time": None,
+            "cache_key": None,
+        }
+
+    def test_save_error_events_batch(self):
+        timestamp = time() - 300
+        jobs = [
+            self._make_error_job(
+                message="foo", event_id=event_id, checksum="a" * 32, timestamp=timestamp + i
+            )
+            for i, event_id in enumerate(("a" * 32, "b" * 32, "c" * 32))
+        ]
+        jobs.append(self._make_error_job(message="bar", event_id="d" * 32, checksum="d" * 32))
+
+        with self.tasks():
+            saved_jobs = save_error_events(jobs, {self.project.id: self.project})
+
+        assert len(saved_jobs) == 4
+        group_ids = [job["event"].group_id for job in saved_jobs]
+        assert group_ids[0] == group_ids[1] == group_ids[2] != group_ids[3]
+        assert [job["is_new"] for job in saved_jobs] == [True, False, False, True]
+        assert [job["is_new_group_environment"] for job in saved_jobs] == [
+            True,
+            False,
+            False,
+            True,
+        ]
+
+        group = Group.objects.get(id=group_ids[0])
+        assert group.times_seen == 3
+        assert GroupHash.objects.filter(project=self.project, hash="a" * 32).count() == 1
+
+        for job in saved_jobs:
+            node_id = Event.generate_node_id(self.project.id, job["event"].event_id)
+            assert nodestore.get(node_id)["event_id"] == job["event"].event_id
+
+    def test_save_error_events_batch_discarded(self):
+        tombstone = GroupTombstone.objects.create(project_id=self.project.id)
+        GroupHash.objects.create(
+            project=self.project, hash="a" * 32, group_tombstone_id=tombstone.id
+        )
+        discarded_job = self._make_error_job(message="foo", checksum="a" * 32)
+        saved_job = self._make_error_job(message="bar", checksum="b" * 32)
+
+        saved_jobs = save_error_events([discarded_job, saved_job], {self.project.id: self.project})
+
+        assert saved_jobs == [saved_job]
+        assert isinstance(discarded_job["hash_discarded"], HashDiscarded)
+        assert saved_job["group"] is not None
+
+    def test_save_error_events_requires_single_project(self):
+        other_project = self.create_project()
+        jobs = [self._make_error_job(message="foo"), self._make_error_job(message="foo")]
+        jobs[1]["project_id"] = other_project.id
+
+        with pytest.raises(ValueError):
+            save_error_events(
+                jobs, {self.project.id: self.project, other_project.id: other_project}
+            )
+
 
 class ReleaseIssueTest(TestCase):
     def setUp(self):
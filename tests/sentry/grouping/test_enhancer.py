@@ -2,6 +2,7 @@ import pytest
 
 from sentry.grouping.component import GroupingComponent
 from sentry.grouping.enhancer import Enhancements, InvalidEnhancerConfig, create_match_frame
+from sentry.grouping.enhancer.matchers import frame_match_cache
 
 
 def dump_obj(obj):
@@ -418,3 +419,92 @@ def test_sentinel_and_prefix(action, type):
     actions[0][1].update_frame_components_contributions([component], frames, 0)
     expected = True if action == "+" else False
     assert getattr(component, f"is_{type}_frame") is expected
+
+
+def test_rule_index():
+    enhancement = Enhancements.from_config_string(
+        """
+family:native function:std::*                   -app
+family:native package:/usr/lib/**               -app
+function:panic_handler                          ^-group -group
+module:core::*                                  -app
+family:javascript path:*/test.js                -app
+!function:foo                                   -group
+""",
+    )
+
+    frames = [
+        {"function": "std::panicking::begin_panic", "platform": "native"},
+        {"function": "main", "package": "usr/lib/libc.so", "platform": "native"},
+        {"function": "panic_handler", "module": "core::panic", "platform": "native"},
+        {"function": "foo", "abs_path": "http://example.com/test.js", "platform": "javascript"},
+    ]
+    match_frames = [create_match_frame(frame, "native") for frame in frames]
+
+    index = enhancement._updater_index
+    candidates = [
+        (enhancement._updater_rules.index(rule), frame_indices)
+        for rule, frame_indices in index.iter_candidates(match_frames)
+    ]
+
+    assert candidates == [(0, [0]), (1, [1]), (2, [2]), (3, [2]), (4, [3]), (5, None)]
+
+    expected = [
+        (rule, idx, action)
+        for rule in enhancement._updater_rules
+        for idx, action in rule.get_matching_frame_actions(match_frames, "native", cache={})
+    ]
+    actual = [
+        (rule, idx, action)
+        for rule, frame_indices in index.iter_candidates(match_frames)
+        for idx, action in rule.get_matching_frame_actions(
+            match_frames, "native", cache={}, frame_indices=frame_indices
+        )
+    ]
+    assert actual == expected
+
+
+def test_loads_cached():
+    dumped = Enhancements.from_config_string("function:foo -group").dumps()
+    assert Enhancements.loads(dumped) is Enhancements.loads(dumped)
+
+
+def test_frame_match_cache():
+    frame_match_cache.clear()
+    rule = Enhancements.from_config_string("function:foo* error.type:Error -group").rules[0]
+    frames = [{"function": "foobar"}, {"function": "baz"}]
+    exception_data = {"type": "Error"}
+
+    assert _get_matching_frame_actions(rule, frames, "python", exception_data)
+    assert len(frame_match_cache) == 2
+    assert (frame_match_cache.hits, frame_match_cache.misses) == (0, 2)
+
+    assert _get_matching_frame_actions(rule, frames, "python", exception_data)
+    assert len(frame_match_cache) == 2
+    assert (frame_match_cache.hits, frame_match_cache.misses) == (2, 2)
+
+
+def test_category_modifications_are_visible_to_later_rules():
+    enhancement = Enhancements.from_config_string(
+        """
+        family:native function:_*                       category=system
+        category:system function:_dispatch*             category=internals
+        [ category:internals ] | category:system        category=internals
+        category:internals                              -app
+        """
+    )
+
+    # The caller of each frame is the one before it.
+    frames = [
+        {"function": "_dispatch_main", "platform": "native"},
+        {"function": "_start", "platform": "native"},
+        {"function": "main", "platform": "native"},
+    ]
+    enhancement.apply_modifications_to_frame(frames, "native", {})
+
+    assert [frame.get("data", {}).get("category") for frame in frames] == [
+        "internals",
+        "internals",
+        None,
+    ]
+    assert [frame.get("in_app") for frame in frames] == [False, False, None]
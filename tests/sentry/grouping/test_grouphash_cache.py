@@ -0,0 +1,88 @@
+from unittest import mock
+
+from sentry.grouping import grouphash_cache
+from sentry.grouping.grouphash_cache import get_grouphashes, invalidate_grouphash_cache
+from sentry.models import GroupHash
+from sentry.testutils import TestCase
+
+
+class GroupHashCacheTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        grouphash_cache._local_cache.clear()
+        self.group = self.create_group(project=self.project)
+        self.grouphash = GroupHash.objects.create(
+            project=self.project, hash="a" * 32, group=self.group
+        )
+        GroupHash.objects.create(project=self.project, hash="b" * 32)
+
+    def test_disabled(self):
+        with self.assertNumQueries(1):
+            result = get_grouphashes(self.project, ["a" * 32, "c" * 32])
+
+        assert result == {"a" * 32: self.grouphash, "c" * 32: None}
+
+    def test_cached(self):
+        with self.options({"store.grouphash-cache-enabled": True}):
+            with self.assertNumQueries(1):
+                result = get_grouphashes(self.project, ["a" * 32, "b" * 32])
+
+            assert result["a" * 32].group_id == self.group.id
+            assert result["b" * 32].group_id is None
+
+            # Only the row attached to a group got cached, the other one is
+            # still looked up.
+            with self.assertNumQueries(1):
+                result = get_grouphashes(self.project, ["a" * 32, "b" * 32])
+
+            assert result["a" * 32].id == self.grouphash.id
+            assert result["a" * 32].group_id == self.group.id
+
+            with self.assertNumQueries(0):
+                get_grouphashes(self.project, ["a" * 32])
+
+    def test_redis_tier(self):
+        with self.options({"store.grouphash-cache-enabled": True}):
+            get_grouphashes(self.project, ["a" * 32])
+            grouphash_cache._local_cache.clear()
+
+            with self.assertNumQueries(0):
+                result = get_grouphashes(self.project, ["a" * 32])
+
+            assert result["a" * 32].group_id == self.group.id
+
+    def test_invalidate(self):
+        other_group = self.create_group(project=self.project)
+
+        with self.options({"store.grouphash-cache-enabled": True}):
+            get_grouphashes(self.project, ["a" * 32])
+
+            GroupHash.objects.filter(id=self.grouphash.id).update(group=other_group)
+            invalidate_grouphash_cache(self.project.id)
+
+            with self.assertNumQueries(1):
+                result = get_grouphashes(self.project, ["a" * 32])
+
+            assert result["a" * 32].group_id == other_group.id
+
+    @mock.patch("sentry.event_manager.invalidate_grouphash_cache")
+    def test_deleted_group_retry(self, mock_invalidate):
+        from sentry.event_manager import EventManager
+
+        with self.options({"store.grouphash-cache-enabled": True}):
+            manager = EventManager({"message": "foo", "checksum": "a" * 32})
+            manager.normalize()
+            event = manager.save(self.project.id)
+            assert event.group_id == self.group.id
+
+            # Simulate a stale cache entry of a group that has been deleted
+            # without invalidating the cache.
+            GroupHash.objects.filter(id=self.grouphash.id).delete()
+            self.group.delete()
+
+            manager = EventManager({"message": "foo", "checksum": "a" * 32})
+            manager.normalize()
+            event = manager.save(self.project.id)
+
+            assert event.group_id != self.group.id
+            assert mock_invalidate.call_count == 1
@@ -78,6 +78,32 @@ class IncidentGetForSubscriptionTest(TestCase):
         assert AlertRule.objects.get_for_subscription(subscription) == alert_rule
 
 
+class IncidentGetForSubscriptionsTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        subscription = alert_rule.snuba_query.subscriptions.get()
+        other_alert_rule = self.create_alert_rule()
+        other_subscription = other_alert_rule.snuba_query.subscriptions.get()
+        AlertRule.objects.get_for_subscription(subscription)
+
+        with self.assertNumQueries(1):
+            assert AlertRule.objects.get_for_subscriptions([subscription, other_subscription]) == {
+                subscription.id: alert_rule,
+                other_subscription.id: other_alert_rule,
+            }
+
+        with self.assertNumQueries(0):
+            assert AlertRule.objects.get_for_subscriptions([other_subscription]) == {
+                other_subscription.id: other_alert_rule
+            }
+
+    def test_deleted_alert_rule(self):
+        alert_rule = self.create_alert_rule()
+        subscription = alert_rule.snuba_query.subscriptions.get()
+        delete_alert_rule(alert_rule)
+        assert AlertRule.objects.get_for_subscriptions([subscription]) == {}
+
+
 class IncidentClearSubscriptionCacheTest(TestCase):
     def setUp(self):
         self.alert_rule = self.create_alert_rule()
@@ -161,6 +187,54 @@ class AlertRuleTriggerClearCacheTest(TestCase):
         ) is None
 
 
+class AlertRuleTriggerGetForAlertRulesTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        trigger = self.create_alert_rule_trigger(alert_rule)
+        other_alert_rule = self.create_alert_rule()
+        AlertRuleTrigger.objects.get_for_alert_rule(alert_rule)
+
+        with self.assertNumQueries(1):
+            assert AlertRuleTrigger.objects.get_for_alert_rules([alert_rule, other_alert_rule]) == {
+                alert_rule.id: [trigger],
+                other_alert_rule.id: [],
+            }
+
+        with self.assertNumQueries(0):
+            AlertRuleTrigger.objects.get_for_alert_rules([alert_rule, other_alert_rule])
+
+
+class GetActiveIncidentsTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        other_project = self.create_project()
+        self.create_incident(alert_rule=alert_rule, projects=[self.project])
+        active_incident = self.create_incident(alert_rule=alert_rule, projects=[self.project])
+        self.create_incident(
+            alert_rule=alert_rule, projects=[other_project], status=IncidentStatus.CLOSED.value
+        )
+        keys = [(alert_rule.id, self.project.id), (alert_rule.id, other_project.id)]
+
+        with self.assertNumQueries(1):
+            assert Incident.objects.get_active_incidents(keys) == {
+                (alert_rule.id, self.project.id): active_incident,
+                (alert_rule.id, other_project.id): None,
+            }
+        assert (
+            cache.get(
+                Incident.objects._build_active_incident_cache_key(alert_rule.id, other_project.id)
+            )
+            is False
+        )
+
+        with self.assertNumQueries(0):
+            assert Incident.objects.get_active_incidents(keys) == {
+                (alert_rule.id, self.project.id): active_incident,
+                (alert_rule.id, other_project.id): None,
+            }
+        assert Incident.objects.get_active_incident(alert_rule, self.project) == active_incident
+
+
 class ActiveIncidentClearCacheTest(TestCase):
     def setUp(self):
         self.alert_rule = self.create_alert_rule()
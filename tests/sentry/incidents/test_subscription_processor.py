@@ -4,6 +4,7 @@ from random import randint
 from unittest.mock import Mock, call, patch
 from uuid import uuid4
 
+import pytest
 import pytz
 from django.utils import timezone
 from exam import fixture, patcher
@@ -36,6 +37,7 @@ from sentry.incidents.subscription_processor import (
     get_alert_rule_stats,
     get_redis_client,
     partition,
+    process_subscription_updates,
     update_alert_rule_stats,
 )
 from sentry.models import Integration
@@ -1322,6 +1324,81 @@ class ProcessUpdateTest(ProcessUpdateBaseClass):
         self.assert_trigger_exists_with_status(incident, trigger, TriggerStatus.RESOLVED)
         self.assert_actions_resolved_for_incident(incident, [self.action])
 
+    def test_process_subscription_updates(self):
+        rule = self.rule
+        trigger = self.trigger
+        rule.update(threshold_period=2)
+        updates = [
+            (
+                self.build_subscription_update(
+                    self.sub, value=trigger.alert_threshold + 1, time_delta=timedelta(minutes=-2)
+                ),
+                self.sub,
+            ),
+            (
+                self.build_subscription_update(
+                    self.other_sub,
+                    value=trigger.alert_threshold + 1,
+                    time_delta=timedelta(minutes=-1),
+                ),
+                self.other_sub,
+            ),
+            (
+                self.build_subscription_update(
+                    self.sub, value=trigger.alert_threshold + 1, time_delta=timedelta(minutes=-1)
+                ),
+                self.sub,
+            ),
+        ]
+        with self.feature(["organizations:incidents"]), self.capture_on_commit_callbacks(
+            execute=True
+        ):
+            process_subscription_updates(updates)
+
+        # Two consecutive updates for `sub` fire the alert, the single one for `other_sub`
+        # only counts towards it.
+        incident = self.assert_active_incident(rule)
+        self.assert_trigger_exists_with_status(incident, trigger, TriggerStatus.ACTIVE)
+        self.assert_no_active_incident(rule, self.other_sub)
+        assert get_alert_rule_stats(rule, self.sub, [trigger])[1] == {trigger.id: 0}
+        assert get_alert_rule_stats(rule, self.other_sub, [trigger])[1] == {trigger.id: 1}
+
+    def test_process_subscription_updates_failure(self):
+        rule = self.rule
+        trigger = self.trigger
+        rule.update(threshold_period=2)
+        updates = [
+            (
+                self.build_subscription_update(
+                    self.sub, value=trigger.alert_threshold + 1, time_delta=timedelta(minutes=-1)
+                ),
+                self.sub,
+            ),
+            (
+                self.build_subscription_update(
+                    self.other_sub,
+                    value=trigger.alert_threshold + 1,
+                    time_delta=timedelta(minutes=-1),
+                ),
+                self.other_sub,
+            ),
+        ]
+        process_update = SubscriptionProcessor.process_update
+
+        def fail_other_sub(processor, subscription_update):
+            if processor.subscription.id == self.other_sub.id:
+                raise Exception("boom")
+            return process_update(processor, subscription_update)
+
+        with self.feature(["organizations:incidents"]), patch.object(
+            SubscriptionProcessor, "process_update", autospec=True, side_effect=fail_other_sub
+        ), pytest.raises(Exception, match="boom"):
+            process_subscription_updates(updates)
+
+        # The stats of `sub` are written even though `other_sub` failed afterwards.
+        assert get_alert_rule_stats(rule, self.sub, [trigger])[1] == {trigger.id: 1}
+        assert get_alert_rule_stats(rule, self.other_sub, [trigger])[1] == {trigger.id: 0}
+
 
 class CrashRateAlertProcessUpdateTest(ProcessUpdateBaseClass):
     def setUp(self):
@@ -12,6 +12,7 @@ from requests.exceptions import RequestException
 from symbolic import SourceMapTokenMatch
 
 from sentry import http, options
+from sentry.lang.javascript.cache import make_source_view
 from sentry.lang.javascript.errormapping import REACT_MAPPING_URL, rewrite_exception
 from sentry.lang.javascript.processor import (
     CACHE_CONTROL_MAX,
@@ -25,9 +26,11 @@ from sentry.lang.javascript.processor import (
     fetch_release_file,
     fetch_sourcemap,
     generate_module,
+    get_fetch_executor,
     get_max_age,
     get_release_file_cache_key,
     get_release_file_cache_key_meta,
+    parsed_artifact_cache,
     should_retry_fetch,
     trim_line,
 )
@@ -107,6 +110,18 @@ def test_build_fetch_retry_condition() -> None:
     assert should_retry_fetch(1, Exception("something else")) is False
 
 
+def test_get_fetch_executor() -> None:
+    executor = get_fetch_executor(2)
+    assert get_fetch_executor(2) is executor
+
+    resized = get_fetch_executor(3)
+    assert resized is not executor
+    assert get_fetch_executor(3) is resized
+
+    with patch("os.getpid", return_value=-1):
+        assert get_fetch_executor(3) is not resized
+
+
 class FetchReleaseFileTest(TestCase):
     def test_unicode(self):
         project = self.project
@@ -1023,6 +1038,45 @@ class FetchSourcemapTest(TestCase):
         with pytest.raises(UnparseableSourcemap):
             fetch_sourcemap("http://example.com")
 
+    def create_sourcemap_release_file(self, release, name, body):
+        file = File.objects.create(name=name, type="release.file")
+        file.putfile(BytesIO(body))
+        ReleaseFile.objects.create(
+            name=name, release_id=release.id, organization_id=release.organization_id, file=file
+        )
+
+    @patch("sentry.lang.javascript.processor.SourceMapView.from_json_bytes")
+    def test_parsed_cache(self, mock_from_json_bytes):
+        parsed_artifact_cache.clear()
+        url = "http://example.com/file.min.js.map"
+        release = self.create_release(project=self.project, version="abc")
+        self.create_sourcemap_release_file(release, url, b"{}")
+
+        for _ in range(2):
+            smap_view = fetch_sourcemap(url, release=release)
+            assert smap_view is mock_from_json_bytes.return_value
+
+        assert mock_from_json_bytes.call_count == 1
+
+        # Sourcemaps are cached per release.
+        other_release = self.create_release(project=self.project, version="def")
+        self.create_sourcemap_release_file(other_release, url, b"{}")
+        fetch_sourcemap(url, release=other_release)
+        assert mock_from_json_bytes.call_count == 2
+
+    @patch("sentry.lang.javascript.processor.get_index_entry", return_value=None)
+    @patch("sentry.lang.javascript.processor.SourceMapView.from_json_bytes")
+    def test_index_entry_lookup(self, mock_from_json_bytes, mock_get_index_entry):
+        parsed_artifact_cache.clear()
+        url = "http://example.com/file.min.js.map"
+        release = self.create_release(project=self.project, version="abc")
+        self.create_sourcemap_release_file(release, url, b"{}")
+
+        fetch_sourcemap(url, release=release)
+
+        # The entry looked up for the parsed cache is reused for fetching
+        assert mock_get_index_entry.call_count == 1
+
 
 class TrimLineTest(unittest.TestCase):
     long_line = "The public is more familiar with bad design than good design. It is, in effect, conditioned to prefer bad design, because that is what it lives with. The new becomes threatening, the old reassuring."
@@ -1269,6 +1323,10 @@ class ErrorMappingTest(unittest.TestCase):
 
 
 class CacheSourceTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        parsed_artifact_cache.clear()
+
     def test_file_no_source_records_error(self):
         """
         If we can't find a given file, either on the release or by scraping, an
@@ -1372,3 +1430,53 @@ class CacheSourceTest(TestCase):
         # now we have an error
         assert len(processor.cache.get_errors(abs_path)) == 1
         assert processor.cache.get_errors(abs_path)[0] == {"url": map_url, "type": "js_no_source"}
+
+    @patch("sentry.lang.javascript.processor.make_source_view", side_effect=make_source_view)
+    def test_parsed_cache(self, mock_make_source_view):
+        project = self.create_project()
+        release = self.create_release(project=project, version="12.31.12")
+
+        abs_path = "app:///some-package/index.js"
+        self.create_release_file(release_id=release.id, name=abs_path)
+
+        for _ in range(2):
+            processor = JavaScriptStacktraceProcessor(
+                data={"release": release.version}, stacktrace_infos=None, project=project
+            )
+            processor.release = release
+            processor.cache_source(abs_path)
+
+            assert processor.cache.get(abs_path)
+
+        assert mock_make_source_view.call_count == 1
+
+    @patch("sentry.lang.javascript.processor.fetch_file")
+    def test_populate_source_cache_concurrently(self, mock_fetch_file):
+        body = b'console.log("hello, World!")\n//# sourceMappingURL=' + base64_sourcemap.encode()
+        mock_fetch_file.side_effect = lambda url, **kwargs: http.UrlResult(url, {}, body, 200, None)
+
+        project = self.create_project()
+        processor = JavaScriptStacktraceProcessor(data={}, stacktrace_infos=None, project=project)
+        processor.max_fetches = 3
+
+        abs_paths = [f"http://example.com/{i}.js" for i in range(4)]
+        with self.options({"sourcemaps.fetch-concurrency": 4}):
+            processor.populate_source_cache([{"abs_path": abs_path} for abs_path in abs_paths])
+
+        assert mock_fetch_file.call_count == 3
+
+        errors = {abs_path: processor.cache.get_errors(abs_path) for abs_path in abs_paths}
+        too_many = [abs_path for abs_path, errs in errors.items() if errs]
+        assert len(too_many) == 1
+        assert errors[too_many[0]] == [{"type": EventError.JS_TOO_MANY_REMOTE_SOURCES}]
+
+        for abs_path in abs_paths:
+            if abs_path in too_many:
+                continue
+            assert processor.cache.get(abs_path)
+            sourcemap_url, sourcemap_view = processor.sourcemaps.get_link(abs_path)
+            assert sourcemap_url == base64_sourcemap
+            assert sourcemap_view is not None
+
+        # inlined sources of the sourcemap are cached as well
+        assert processor.cache.get("/test.js").get_source() == 'console.log("hello, World!")'
@@ -1,5 +1,6 @@
 from sentry.models import ProjectOption
 from sentry.testutils import TestCase
+from sentry.utils.cache import cache
 
 
 class ProjectOptionManagerTest(TestCase):
@@ -28,3 +29,20 @@ class ProjectOptionManagerTest(TestCase):
         ProjectOption.objects.create(project=self.project, key="foo", value="bar")
         result = ProjectOption.objects.get_value_bulk([self.project], "foo")
         assert result == {self.project: "bar"}
+
+    def test_get_all_values_bulk(self):
+        other_project = self.create_project()
+        ProjectOption.objects.create(project=self.project, key="foo", value="bar")
+        ProjectOption.objects._option_cache.clear()
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            result = ProjectOption.objects.get_all_values_bulk([self.project, other_project])
+
+        assert result == {self.project.id: {"foo": "bar"}, other_project.id: {}}
+
+        with self.assertNumQueries(0):
+            assert ProjectOption.objects.get_value(self.project, "foo") == "bar"
+            assert ProjectOption.objects.get_all_values_bulk([other_project]) == {
+                other_project.id: {}
+            }
@@ -1,4 +1,7 @@
+from unittest import mock
+
 from sentry.models import ActorTuple, ProjectOwnership, Team, User
+from sentry.models import projectownership as projectownership_module
 from sentry.ownership.grammar import Matcher, Owner, Rule, dump_schema, resolve_actors
 from sentry.testutils import TestCase
 from sentry.utils.cache import cache
@@ -16,6 +19,35 @@ class ProjectOwnershipTestCase(TestCase):
     def test_get_owners_default(self):
         assert ProjectOwnership.get_owners(self.project.id, {}) == (ProjectOwnership.Everyone, None)
 
+    def test_compiled_rules_cached(self):
+        projectownership_module._compiled_rules_cache.clear()
+        rule_a = Rule(Matcher("path", "*.py"), [Owner("team", self.team.slug)])
+        ownership = ProjectOwnership.objects.create(
+            project_id=self.project.id, schema=dump_schema([rule_a]), fallthrough=True
+        )
+        data = {"stacktrace": {"frames": [{"filename": "foo.py"}]}}
+
+        with mock.patch(
+            "sentry.models.projectownership.compile_schema",
+            side_effect=projectownership_module.compile_schema,
+        ) as compile_schema:
+            for _ in range(2):
+                assert ProjectOwnership.get_owners(self.project.id, data) == (
+                    [ActorTuple(self.team.id, Team)],
+                    [rule_a],
+                )
+            assert compile_schema.call_count == 1
+
+            # A changed schema is compiled again
+            rule_b = Rule(Matcher("path", "*.js"), [Owner("team", self.team.slug)])
+            ownership.schema = dump_schema([rule_b])
+            ownership.save()
+            assert ProjectOwnership.get_owners(self.project.id, data) == (
+                ProjectOwnership.Everyone,
+                None,
+            )
+            assert compile_schema.call_count == 2
+
     def test_get_owners_no_record(self):
         assert ProjectOwnership.get_owners(self.project.id, {}) == (ProjectOwnership.Everyone, None)
         assert ProjectOwnership.get_owners(self.project.id, {}) == (ProjectOwnership.Everyone, None)
@@ -1,12 +1,15 @@
 import pickle
+from base64 import b64decode
 from datetime import timedelta
 from unittest import mock
 
 import pytest
+import zstandard
+from django.db import IntegrityError
 from django.utils import timezone
 
 from sentry.nodestore.base import json_dumps
-from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.nodestore.django.backend import ZSTD_MAGIC, DjangoNodeStorage
 from sentry.nodestore.django.models import Node
 from sentry.utils.strings import compress
 
@@ -51,6 +54,41 @@ class TestDjangoNodeStorage:
             b'{"foo":"bar"}'
         )
 
+    def test_set_multi_existing(self):
+        Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=compress(b'{"foo": "old"}'))
+        self.ns.set_multi(
+            {
+                "d2502ebbd7df41ceba8d3275595cac33": {"foo": "bar"},
+                "5394aa025b8e401ca6bc3ddee3130edc": {"foo": "baz"},
+            }
+        )
+        assert Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33").data == compress(
+            b'{"foo":"bar"}'
+        )
+        assert Node.objects.get(id="5394aa025b8e401ca6bc3ddee3130edc").data == compress(
+            b'{"foo":"baz"}'
+        )
+
+    def test_set_multi_conflict(self):
+        Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=compress(b'{"foo": "old"}'))
+
+        # Simulates another writer inserting the node between the delete and
+        # the insert.
+        with mock.patch.object(Node.objects, "bulk_create", side_effect=IntegrityError):
+            self.ns.set_multi(
+                {
+                    "d2502ebbd7df41ceba8d3275595cac33": {"foo": "bar"},
+                    "5394aa025b8e401ca6bc3ddee3130edc": {"foo": "baz"},
+                }
+            )
+
+        assert Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33").data == compress(
+            b'{"foo":"bar"}'
+        )
+        assert Node.objects.get(id="5394aa025b8e401ca6bc3ddee3130edc").data == compress(
+            b'{"foo":"baz"}'
+        )
+
     def test_delete(self):
         node = Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=b'{"foo": "bar"}')
 
@@ -132,3 +170,47 @@ class TestDjangoNodeStorage:
             self.ns.get("node_4")
             self.ns.get("node_4")
             assert mock_get.call_count == 2
+
+    def test_zstd(self):
+        ns = DjangoNodeStorage(compression="zstd")
+        ns.set("d2502ebbd7df41ceba8d3275595cac33", {"foo": "bar"})
+        data = Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33").data
+        assert data.startswith(ZSTD_MAGIC)
+        assert ns._get_bytes("d2502ebbd7df41ceba8d3275595cac33") == b'{"foo":"bar"}'
+
+        # Rows written with zstd and zlib can be read regardless of the configured
+        # compression.
+        self.ns.set("5394aa025b8e401ca6bc3ddee3130edc", {"foo": "baz"})
+        assert ns.get_multi(
+            ["d2502ebbd7df41ceba8d3275595cac33", "5394aa025b8e401ca6bc3ddee3130edc"]
+        ) == {
+            "d2502ebbd7df41ceba8d3275595cac33": {"foo": "bar"},
+            "5394aa025b8e401ca6bc3ddee3130edc": {"foo": "baz"},
+        }
+        assert self.ns._get_bytes("d2502ebbd7df41ceba8d3275595cac33") == b'{"foo":"bar"}'
+
+    def test_zstd_dictionaries(self, tmp_path):
+        samples = [
+            json_dumps(
+                {"platform": "python", "event_id": "%032x" % i, "message": "x" * (i % 50)}
+            ).encode("utf8")
+            for i in range(1000)
+        ]
+        dictionary = zstandard.train_dictionary(1024, samples)
+        path = tmp_path / "python.dict"
+        path.write_bytes(dictionary.as_bytes())
+
+        ns = DjangoNodeStorage(compression="zstd", zstd_dictionaries={"python": str(path)})
+        ns.set("a" * 32, {"platform": "python", "message": "hello"})
+        ns.set("b" * 32, {"platform": "java", "message": "hello"})
+
+        frame = b64decode(Node.objects.get(id="a" * 32).data[len(ZSTD_MAGIC) :])
+        assert zstandard.get_frame_parameters(frame).dict_id == dictionary.dict_id()
+        frame = b64decode(Node.objects.get(id="b" * 32).data[len(ZSTD_MAGIC) :])
+        assert zstandard.get_frame_parameters(frame).dict_id == 0
+
+        assert ns._get_bytes("a" * 32) == b'{"message":"hello","platform":"python"}'
+        assert ns._get_bytes("b" * 32) == b'{"message":"hello","platform":"java"}'
+
+        with pytest.raises(ValueError):
+            DjangoNodeStorage(compression="zstd")._get_bytes("a" * 32)
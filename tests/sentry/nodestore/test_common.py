@@ -6,7 +6,9 @@ from contextlib import contextmanager
 
 import pytest
 
+from sentry.nodestore.base import SUBKEY_INDEX_MAGIC
 from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.testutils.helpers.options import override_options
 from tests.sentry.nodestore.bigtable.backend.tests import (
     MockedBigtableNodeStorage,
     get_temporary_bigtable_nodestorage,
@@ -97,3 +99,65 @@ def test_set_subkeys(ns):
     ns.delete("node_1")
     assert ns.get("node_1") is None
     assert ns.get("node_1", subkey="other") is None
+
+
+def test_subkeys_legacy_format(ns):
+    """
+    Nodes with subkeys used to be stored newline-delimited, those still have
+    to be readable.
+    """
+
+    ns._set_bytes("node_1", b'{"foo":"a"}\nother\n{"foo":"b"}\nlast\n{"foo":"c"}')
+    assert ns.get("node_1") == {"foo": "a"}
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+    assert ns.get("node_1", subkey="last") == {"foo": "c"}
+    assert ns.get("node_1", subkey="missing") is None
+
+
+def test_subkeys_default_format(ns):
+    """
+    Until every reader understands the indexed format, nodes with subkeys are
+    written newline-delimited.
+    """
+
+    ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}})
+    assert ns._get_bytes("node_1") == b'{"foo":"a"}\nother\n{"foo":"b"}'
+    assert ns.get("node_1") == {"foo": "a"}
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+
+
+@override_options({"nodestore.write-subkey-index": True})
+def test_subkeys_indexed_format(ns):
+    ns.set_subkeys("node_1", {None: {"foo": "a\nb"}, "other": {"foo": "b"}, "o": {"foo": "c"}})
+    assert ns._get_bytes("node_1").startswith(SUBKEY_INDEX_MAGIC)
+    assert ns.get("node_1") == {"foo": "a\nb"}
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+    assert ns.get("node_1", subkey="o") == {"foo": "c"}
+    assert ns.get("node_1", subkey="missing") is None
+
+    # Nodes without subkeys are plain JSON
+    ns.set("node_2", {"foo": "a"})
+    assert ns._get_bytes("node_2") == b'{"foo":"a"}'
+
+
+def test_set_multi(ns):
+    ns.set_multi({"node_1": {"foo": "a"}, "node_2": {"foo": "b"}})
+    assert ns.get_multi(["node_1", "node_2"]) == {"node_1": {"foo": "a"}, "node_2": {"foo": "b"}}
+
+    ns.set_subkeys_multi(
+        {"node_1": {None: {"foo": "c"}, "other": {"foo": "d"}}, "node_2": {None: {"foo": "e"}}}
+    )
+    assert ns.get("node_1") == {"foo": "c"}
+    assert ns.get("node_1", subkey="other") == {"foo": "d"}
+    assert ns.get("node_2") == {"foo": "e"}
+
+
+def test_multi_batches(ns):
+    ns.multi_batch_size = 2
+    nodes = {f"node_{i}": {"foo": i} for i in range(5)}
+
+    ns.set_multi(nodes)
+    assert ns.get_multi(list(nodes)) == nodes
+
+    ns.delete_multi(list(nodes))
+    assert not any(ns.get(id) for id in nodes)
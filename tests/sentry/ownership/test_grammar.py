@@ -1,6 +1,7 @@
 import pytest
 
 from sentry.ownership.grammar import (
+    CompiledRules,
     Matcher,
     Owner,
     Rule,
@@ -215,6 +216,9 @@ def _assert_matcher(matcher: Matcher, path_details, expected):
     frames = {"stacktrace": {"frames": path_details}}
     assert matcher.test(frames) == expected
 
+    rule = Rule(matcher, [])
+    assert CompiledRules([rule]).match(frames) == ([rule] if expected else [])
+
 
 @pytest.mark.parametrize(
     "path_details, expected",
@@ -560,6 +564,35 @@ def test_codeowners_match_fowardslash(path_details, expected):
     _assert_matcher(Matcher("codeowners", "/"), path_details, expected)
 
 
+def test_compiled_rules_match():
+    rules = parse_rules(fixture_data)
+    compiled_rules = CompiledRules(rules)
+
+    for data in [
+        {"request": {"url": "http://google.com/foo"}},
+        {"tags": [["foo", "bar baz"]]},
+        {
+            "exception": {
+                "values": [
+                    {
+                        "stacktrace": {
+                            "frames": [
+                                {"filename": "src/components/app.js", "module": "foo.bar"},
+                                {"abs_path": "/usr/src/sentry/models.py", "module": "foo bar"},
+                                {"filename": "frontend/index.ts"},
+                                None,
+                            ]
+                        }
+                    }
+                ]
+            }
+        },
+        {"stacktrace": {"frames": [{"filename": "src/sentry/api.py"}]}},
+        {},
+    ]:
+        assert compiled_rules.match(data) == [rule for rule in rules if rule.test(data)]
+
+
 def test_parse_code_owners():
     assert parse_code_owners(codeowners_fixture_data) == (
         ["@getsentry/frontend", "@getsentry/docs", "@getsentry/ecosystem"],
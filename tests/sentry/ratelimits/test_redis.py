@@ -1,6 +1,8 @@
 from time import time
+from unittest import mock
 
 from freezegun import freeze_time
+from redis.exceptions import RedisError
 
 from sentry.ratelimits.redis import RedisRateLimiter
 from sentry.testutils import TestCase
@@ -65,3 +67,39 @@ class RedisRateLimiterTest(TestCase):
             assert not limited
             assert value == 1
             assert reset_time == expected_reset_time + 5
+
+    def test_is_limited_with_value_multi(self):
+        with freeze_time("2000-01-01"):
+            expected_reset_time = int(time() + 5)
+
+            self.backend.is_limited("bar", 1, window=10)
+
+            results = self.backend.is_limited_with_value_multi(
+                [("foo", 1, 5), ("bar", 1, 10), ("baz", 2, None)]
+            )
+            assert results == [
+                (False, 1, expected_reset_time),
+                (True, 2, int(time() + 10)),
+                (False, 1, int(time() + 60)),
+            ]
+
+            assert self.backend.current_value("foo", window=5) == 1
+            assert self.backend.current_value("bar", window=10) == 2
+            assert self.backend.current_value("baz") == 1
+
+    def test_is_limited_with_value_multi_project(self):
+        with freeze_time("2000-01-01"):
+            self.backend.is_limited_with_value_multi([("foo", 1, None)], project=self.project)
+
+            assert self.backend.current_value("foo", self.project) == 1
+            assert self.backend.current_value("foo") == 0
+
+    def test_redis_error(self):
+        with freeze_time("2000-01-01"), mock.patch.object(self.backend, "client") as client:
+            pipe = client.pipeline.return_value.__enter__.return_value
+            pipe.execute.side_effect = RedisError()
+
+            assert self.backend.is_limited_with_value_multi([("foo", 1, 5), ("bar", 1, 10)]) == [
+                (False, 0, int(time() + 5)),
+                (False, 0, int(time() + 10)),
+            ]
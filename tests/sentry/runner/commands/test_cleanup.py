@@ -0,0 +1,64 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from sentry.models import File, FileBlob, FileBlobIndex
+from sentry.runner.commands.cleanup import UNUSED_FILES_CURSOR_KEY, cleanup_unused_files
+from sentry.testutils import TestCase
+from sentry.utils.cache import cache
+
+
+class CleanupUnusedFilesTest(TestCase):
+    def create_blob(self, checksum, days=2):
+        return FileBlob.objects.create(
+            checksum=checksum,
+            path=f"path/{checksum}",
+            size=1,
+            timestamp=timezone.now() - timedelta(days=days),
+        )
+
+    @mock.patch("sentry.models.file.get_storage")
+    def test_simple(self, get_storage):
+        indexed_blob = self.create_blob("a" * 40)
+        file = File.objects.create(name="foo", type="bar")
+        FileBlobIndex.objects.create(file=file, blob=indexed_blob, offset=0)
+        legacy_blob = self.create_blob("b" * 40)
+        File.objects.create(name="foo", type="bar", blob=legacy_blob)
+        unused_blob = self.create_blob("c" * 40)
+        new_blob = self.create_blob("d" * 40, days=0)
+
+        cleanup_unused_files(quiet=True)
+
+        assert set(FileBlob.objects.values_list("id", flat=True)) == {
+            indexed_blob.id,
+            legacy_blob.id,
+            new_blob.id,
+        }
+        get_storage.return_value.delete.assert_called_once_with(unused_blob.path)
+        assert cache.get(UNUSED_FILES_CURSOR_KEY) is None
+
+    @mock.patch("sentry.models.file.get_storage")
+    def test_resume(self, get_storage):
+        first_blob = self.create_blob("a" * 40)
+        second_blob = self.create_blob("b" * 40)
+        cache.set(UNUSED_FILES_CURSOR_KEY, first_blob.id)
+
+        cleanup_unused_files(quiet=True)
+
+        assert list(FileBlob.objects.values_list("id", flat=True)) == [first_blob.id]
+        get_storage.return_value.delete.assert_called_once_with(second_blob.path)
+        assert cache.get(UNUSED_FILES_CURSOR_KEY) is None
+
+    @mock.patch("sentry.tasks.files.delete_file.apply_async")
+    @mock.patch("sentry.models.file.get_storage")
+    def test_storage_failure(self, get_storage, delete_file_task):
+        get_storage.return_value.delete.side_effect = Exception("boom")
+        unused_blob = self.create_blob("a" * 40)
+
+        cleanup_unused_files(quiet=True)
+
+        assert not FileBlob.objects.filter(id=unused_blob.id).exists()
+        delete_file_task.assert_called_once_with(
+            kwargs={"path": unused_blob.path, "checksum": unused_blob.checksum}
+        )
@@ -28,3 +28,23 @@ class PostgresIndexerTest(TestCase):
         # test invalid values
         assert PGStringIndexer().resolve("beep") is None
         assert PGStringIndexer().reverse_resolve(1234) is None
+
+    def test_bulk_resolve(self):
+        results = self.indexer.bulk_record(strings=["hello", "hey"])
+
+        indexer = PGStringIndexer()
+        assert indexer.bulk_resolve({"hello", "hey", "beep"}) == {
+            "hello": results["hello"],
+            "hey": results["hey"],
+            "beep": None,
+        }
+        assert indexer.bulk_reverse_resolve({results["hello"], 1234}) == {
+            results["hello"]: "hello",
+            1234: None,
+        }
+
+        # Resolved strings are kept in the process-local cache, in both
+        # directions.
+        with self.assertNumQueries(0):
+            assert indexer.resolve("hello") == results["hello"]
+            assert indexer.reverse_resolve(results["hey"]) == "hey"
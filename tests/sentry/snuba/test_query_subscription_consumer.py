@@ -14,6 +14,8 @@ from sentry.snuba.query_subscription_consumer import (
     InvalidMessageError,
     InvalidSchemaError,
     QuerySubscriptionConsumer,
+    batch_subscriber_registry,
+    register_batch_subscriber,
     register_subscriber,
     subscriber_registry,
 )
@@ -174,6 +176,74 @@ class ParseMessageValueTest(BaseQuerySubscriptionTest, unittest.TestCase):
         self.run_invalid_schema_test({"payload": self.valid_payload})
 
 
+class HandleMessagesTest(BaseQuerySubscriptionTest, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.orig_registry = dict(subscriber_registry)
+        self.orig_batch_registry = dict(batch_subscriber_registry)
+
+    def tearDown(self):
+        super().tearDown()
+        subscriber_registry.clear()
+        subscriber_registry.update(self.orig_registry)
+        batch_subscriber_registry.clear()
+        batch_subscriber_registry.update(self.orig_batch_registry)
+
+    def create_subscription(self, registration_key):
+        with self.tasks():
+            snuba_query = create_snuba_query(
+                QueryDatasets.EVENTS,
+                "hello",
+                "count()",
+                timedelta(minutes=10),
+                timedelta(minutes=1),
+                None,
+            )
+            sub = create_snuba_subscription(self.project, registration_key, snuba_query)
+        sub.refresh_from_db()
+        return sub
+
+    def build_message(self, sub, value):
+        data = deepcopy(self.valid_wrapper)
+        data["payload"]["subscription_id"] = sub.subscription_id
+        data["payload"]["result"] = {"data": [{"hello": value}]}
+        return self.build_mock_message(data)
+
+    def test_batch_subscriber(self):
+        mock_callback = mock.Mock()
+        mock_batch_callback = mock.Mock()
+        register_subscriber("batched_test")(mock_callback)
+        register_batch_subscriber("batched_test")(mock_batch_callback)
+        other_callback = mock.Mock()
+        register_subscriber("unbatched_test")(other_callback)
+
+        sub = self.create_subscription("batched_test")
+        other_sub = self.create_subscription("batched_test")
+        unbatched_sub = self.create_subscription("unbatched_test")
+
+        self.consumer.handle_messages(
+            [
+                self.build_message(sub, 1),
+                self.build_message(unbatched_sub, 2),
+                self.build_message(other_sub, 3),
+                self.build_message(sub, 4),
+            ]
+        )
+
+        assert mock_callback.call_count == 0
+        mock_batch_callback.assert_called_once()
+        ((updates,), _) = mock_batch_callback.call_args
+        assert [
+            (contents["values"]["data"][0]["hello"], subscription)
+            for contents, subscription in updates
+        ] == [(1, sub), (3, other_sub), (4, sub)]
+
+        other_callback.assert_called_once()
+        ((contents, subscription), _) = other_callback.call_args
+        assert contents["values"]["data"][0]["hello"] == 2
+        assert subscription == unbatched_sub
+
+
 class RegisterSubscriberTest(unittest.TestCase):
     def setUp(self):
         self.orig_registry = deepcopy(subscriber_registry)
@@ -198,3 +268,23 @@ class RegisterSubscriberTest(unittest.TestCase):
         with self.assertRaises(Exception) as cm:
             register_subscriber("hello")(other_callback)
         assert str(cm.exception) == "Handler already registered for hello"
+
+
+class RegisterBatchSubscriberTest(unittest.TestCase):
+    def setUp(self):
+        self.orig_registry = dict(batch_subscriber_registry)
+
+    def tearDown(self):
+        batch_subscriber_registry.clear()
+        batch_subscriber_registry.update(self.orig_registry)
+
+    def test_register(self):
+        callback = object()
+        register_batch_subscriber("hello")(callback)
+        assert batch_subscriber_registry["hello"] == callback
+
+    def test_already_registered(self):
+        register_batch_subscriber("hello")(object())
+        with self.assertRaises(Exception) as cm:
+            register_batch_subscriber("hello")(object())
+        assert str(cm.exception) == "Batch handler already registered for hello"
@@ -0,0 +1,45 @@
+import jsonschema
+import pytest
+
+from sentry.snuba.json_schemas import SUBSCRIPTION_PAYLOAD_VERSIONS, SUBSCRIPTION_WRAPPER_SCHEMA
+from sentry.snuba.query_subscription_consumer import QuerySubscriptionConsumer
+from sentry.utils import json
+
+MESSAGE = json.dumps(
+    {
+        "version": 3,
+        "payload": {
+            "subscription_id": "1234",
+            "result": {"data": [{"count": 50}]},
+            "request": {"query": "MATCH (events) SELECT count() AS count"},
+            "entity": "events",
+            "timestamp": "2020-01-01T01:23:45.1234",
+        },
+    }
+)
+
+
+def benchmark_available():
+    try:
+        import pytest_benchmark  # NOQA
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+def validate_uncompiled(value):
+    wrapper = json.loads(value)
+    jsonschema.validate(wrapper, SUBSCRIPTION_WRAPPER_SCHEMA)
+    jsonschema.validate(wrapper["payload"], SUBSCRIPTION_PAYLOAD_VERSIONS[wrapper["version"]])
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_validate_uncompiled(benchmark):
+    benchmark(validate_uncompiled, MESSAGE)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_parse_message_value(benchmark):
+    consumer = QuerySubscriptionConsumer("hello")
+    benchmark(consumer.parse_message_value, MESSAGE)
@@ -226,3 +226,46 @@ def test_projectkeys(default_project, task_runner, redis_cache):
 
     for key in ProjectKey.objects.filter(project_id=default_project.id):
         assert not redis_cache.get(key.public_key)
+
+
+@pytest.mark.django_db
+def test_generate_organization_keys(
+    default_project, default_organization, default_projectkey, factories, task_runner, redis_cache
+):
+    other_key = factories.create_project_key(project=default_project)
+    other_project = factories.create_project(organization=default_organization)
+    other_project_keys = list(ProjectKey.objects.filter(project=other_project))
+
+    with task_runner():
+        schedule_update_config_cache(generate=True, organization_id=default_organization.id)
+
+    for project, key in [(default_project, default_projectkey), (default_project, other_key)] + [
+        (other_project, key) for key in other_project_keys
+    ]:
+        cfg = redis_cache.get(key.public_key)
+        assert cfg["projectId"] == project.id
+        (pk_json,) = cfg["publicKeys"]
+        assert pk_json["publicKey"] == key.public_key
+        assert pk_json["numericId"] == key.id
+
+
+@pytest.mark.django_db
+def test_set_many_unchanged(default_projectkey, redis_cache):
+    public_key = default_projectkey.public_key
+    redis_cache.set_many({public_key: {"lastFetch": 1, "config": {"foo": "bar"}}})
+
+    # Only volatile fields changed, the config is not rewritten.
+    redis_cache.set_many({public_key: {"lastFetch": 2, "config": {"foo": "bar"}}})
+    assert redis_cache.get(public_key) == {"lastFetch": 1, "config": {"foo": "bar"}}
+
+    redis_cache.set_many({public_key: {"lastFetch": 3, "config": {"foo": "baz"}}})
+    assert redis_cache.get(public_key) == {"lastFetch": 3, "config": {"foo": "baz"}}
+
+    # A config that is gone is written again even though its digest matches.
+    redis_cache.cluster.delete(f"relayconfig:{public_key}")
+    redis_cache.set_many({public_key: {"lastFetch": 4, "config": {"foo": "baz"}}})
+    assert redis_cache.get(public_key) == {"lastFetch": 4, "config": {"foo": "baz"}}
+
+    redis_cache.delete_many([public_key])
+    redis_cache.set_many({public_key: {"lastFetch": 5, "config": {"foo": "baz"}}})
+    assert redis_cache.get(public_key) == {"lastFetch": 5, "config": {"foo": "baz"}}
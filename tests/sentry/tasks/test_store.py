@@ -6,13 +6,18 @@ from django.test.utils import override_settings
 
 from sentry import quotas
 from sentry.event_manager import EventManager, HashDiscarded
+from sentry.eventstore.processing import event_processing_store
+from sentry.models import Group
 from sentry.plugins.base.v2 import Plugin2
 from sentry.tasks.store import (
+    batch_save_events,
     preprocess_event,
     process_event,
     save_event,
+    save_event_batch,
     time_synthetic_monitoring_event,
 )
+from sentry.testutils.helpers.options import override_options
 
 EVENT_ID = "cc3e6c2bb6b6498097f336d1e6979f4b"
 
@@ -48,6 +53,12 @@ def mock_save_event():
         yield m
 
 
+@pytest.fixture
+def mock_save_event_batch():
+    with mock.patch("sentry.tasks.store.save_event_batch") as m:
+        yield m
+
+
 @pytest.fixture
 def mock_process_event():
     with mock.patch("sentry.tasks.store.process_event") as m:
@@ -232,6 +243,117 @@ def test_hash_discarded_raised(default_project, mock_refund, register_plugin):
         # should be caught
 
 
+@pytest.mark.django_db
+def test_batch_save_events(
+    default_project, mock_process_event, mock_save_event, mock_save_event_batch, register_plugin
+):
+    register_plugin(globals(), BasicPreprocessorPlugin)
+
+    def preprocess(event_id, platform="NOTMATTLANG"):
+        data = {
+            "project": default_project.id,
+            "platform": platform,
+            "logentry": {"formatted": "test"},
+            "event_id": event_id,
+            "extra": {"foo": "bar"},
+        }
+        preprocess_event(cache_key=f"e:{event_id}", data=data, start_time=1, event_id=event_id)
+
+    with override_options({"store.save-event-batch-size": 2}), batch_save_events():
+        preprocess("a" * 32)
+        preprocess("b" * 32)
+        preprocess("c" * 32)
+        # Events that need processing are not held back.
+        preprocess("d" * 32, platform="mattlang")
+        assert mock_process_event.delay.call_count == 1
+        assert mock_save_event.delay.call_count == 0
+        assert mock_save_event_batch.delay.call_count == 0
+
+    mock_save_event_batch.delay.assert_called_once_with(
+        project_id=default_project.id,
+        events=[
+            {"cache_key": f"e:{'a' * 32}", "start_time": 1, "event_id": "a" * 32},
+            {"cache_key": f"e:{'b' * 32}", "start_time": 1, "event_id": "b" * 32},
+        ],
+    )
+    mock_save_event.delay.assert_called_once_with(
+        cache_key=f"e:{'c' * 32}",
+        data=None,
+        start_time=1,
+        event_id="c" * 32,
+        project_id=default_project.id,
+    )
+
+
+@pytest.mark.django_db
+def test_batch_save_events_disabled(default_project, mock_save_event, mock_save_event_batch):
+    data = {
+        "project": default_project.id,
+        "platform": "NOTMATTLANG",
+        "logentry": {"formatted": "test"},
+        "event_id": EVENT_ID,
+    }
+
+    with batch_save_events():
+        preprocess_event(cache_key="e:1", data=data, start_time=1, event_id=EVENT_ID)
+        assert mock_save_event.delay.call_count == 1
+
+    assert mock_save_event_batch.delay.call_count == 0
+
+
+@pytest.mark.django_db
+def test_save_event_batch(default_project):
+    events = []
+    for event_id in ("a" * 32, "b" * 32):
+        data = {
+            "project": default_project.id,
+            "platform": "python",
+            "logentry": {"formatted": "test"},
+            "event_id": event_id,
+            "timestamp": time(),
+        }
+        manager = EventManager(data)
+        manager.normalize()
+        cache_key = event_processing_store.store(dict(manager.get_data()))
+        events.append({"cache_key": cache_key, "start_time": time(), "event_id": event_id})
+
+    save_event_batch(project_id=default_project.id, events=events)
+
+    assert Group.objects.filter(project=default_project).count() == 1
+    for event in events:
+        assert "hashes" in event_processing_store.get(event["cache_key"])
+
+
+@pytest.mark.django_db
+def test_save_event_batch_failure(default_project):
+    events = []
+    for event_id in ("a" * 32, "b" * 32):
+        data = {
+            "project": default_project.id,
+            "platform": "python",
+            "logentry": {"formatted": "test"},
+            "event_id": event_id,
+        }
+        cache_key = event_processing_store.store(data)
+        events.append({"cache_key": cache_key, "start_time": 1, "event_id": event_id})
+
+    with mock.patch(
+        "sentry.event_manager.save_error_events", side_effect=Exception("boom")
+    ), mock.patch("sentry.tasks.store._do_save_event") as mock_do_save_event:
+        save_event_batch(project_id=default_project.id, events=events)
+
+    # Every event is saved on its own instead.
+    assert mock_do_save_event.mock_calls == [
+        mock.call(
+            cache_key=event["cache_key"],
+            start_time=1,
+            event_id=event["event_id"],
+            project_id=default_project.id,
+        )
+        for event in events
+    ]
+
+
 @pytest.fixture(params=["org", "project"])
 def options_model(request, default_organization, default_project):
     if request.param == "org":
@@ -1,12 +1,18 @@
+import uuid
+from unittest import mock
+
 import pytest
 
 from sentry.grouping.api import get_default_grouping_config_dict, load_grouping_config
 from sentry.stacktraces.processing import (
+    StacktraceProcessor,
     find_stacktraces_in_data,
     get_crash_frame_from_event_data,
     normalize_stacktraces_for_grouping,
+    process_stacktraces,
 )
 from sentry.testutils import TestCase
+from sentry.utils.cache import cache
 
 
 class FindStacktracesTest(TestCase):
@@ -157,6 +163,63 @@ class FindStacktracesTest(TestCase):
         assert len(infos[0].stacktrace["frames"]) == 3
 
 
+class UppercaseProcessor(StacktraceProcessor):
+    computed = 0
+
+    def handles_frame(self, frame, stacktrace_info):
+        return True
+
+    def preprocess_frame(self, processable_frame):
+        processable_frame.set_cache_key_from_values(processable_frame["function"])
+
+    def process_frame(self, processable_frame, processing_task):
+        if processable_frame.cache_value is None:
+            UppercaseProcessor.computed += 1
+            processable_frame.set_cache_value(processable_frame["function"].upper())
+
+        return [dict(processable_frame.frame, function=processable_frame.cache_value)], None, None
+
+
+class FrameCacheTest(TestCase):
+    @mock.patch("sentry.stacktraces.processing.cache.set_many", side_effect=cache.set_many)
+    @mock.patch("sentry.stacktraces.processing.cache.get_many", side_effect=cache.get_many)
+    def test_frame_cache(self, mock_get_many, mock_set_many):
+        UppercaseProcessor.computed = 0
+        functions = [uuid.uuid4().hex for _ in range(3)]
+
+        def make_processors(data, infos):
+            return [UppercaseProcessor(data, infos, project=self.project)]
+
+        for _ in range(2):
+            data = {"stacktrace": {"frames": [{"function": function} for function in functions]}}
+            data = process_stacktraces(data, make_processors=make_processors)
+            assert [frame["function"] for frame in data["stacktrace"]["frames"]] == [
+                function.upper() for function in functions
+            ]
+
+        # The second run only reads the cache.
+        assert UppercaseProcessor.computed == 3
+        assert mock_get_many.call_count == 2
+        assert mock_set_many.call_count == 1
+
+    @mock.patch("sentry.stacktraces.processing.ProcessableFrame.close")
+    @mock.patch("sentry.stacktraces.processing.cache.set_many", side_effect=Exception("boom"))
+    def test_frame_cache_write_failure(self, mock_set_many, mock_close):
+        functions = [uuid.uuid4().hex for _ in range(3)]
+
+        def make_processors(data, infos):
+            return [UppercaseProcessor(data, infos, project=self.project)]
+
+        data = {"stacktrace": {"frames": [{"function": function} for function in functions]}}
+        data = process_stacktraces(data, make_processors=make_processors)
+
+        assert [frame["function"] for frame in data["stacktrace"]["frames"]] == [
+            function.upper() for function in functions
+        ]
+        assert mock_set_many.call_count == 1
+        assert mock_close.call_count == 3
+
+
 class NormalizeInApptest(TestCase):
     def test_normalize_with_system_frames(self):
         data = {
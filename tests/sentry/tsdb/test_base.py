@@ -1,10 +1,11 @@
 import itertools
+from array import array
 from datetime import datetime, timedelta
 from unittest import TestCase, mock
 
 import pytz
 
-from sentry.tsdb.base import ONE_DAY, ONE_HOUR, ONE_MINUTE, BaseTSDB
+from sentry.tsdb.base import ONE_DAY, ONE_HOUR, ONE_MINUTE, BaseTSDB, TSDBModel
 from sentry.utils.dates import to_timestamp
 
 
@@ -39,6 +40,28 @@ class BaseTSDBTest(TestCase):
         assert len(post_results) == 1
         assert post_results[1] == [[1368889200, 15], [1368892800, 7]]
 
+    def test_rollup_series(self):
+        series = [1368889980, 1368890040, 1368893640]
+        values = {1: array("q", [5, 10, 7]), 2: array("q", [0, 1, 0])}
+        new_series, new_values = self.tsdb.rollup_series(series, values, 3600)
+        assert new_series == [1368889200, 1368892800]
+        assert new_values == {1: array("q", [15, 7]), 2: array("q", [1, 0])}
+
+    def test_get_range_series(self):
+        range_set = {1: [(1368889980, 5), (1368890040, 10)], 2: [(1368890040, 1)]}
+        with mock.patch.object(self.tsdb, "get_range", return_value=range_set) as get_range:
+            series, values = self.tsdb.get_range_series(
+                TSDBModel.group, [1, 2, 3], start=None, end=None, environment_ids=[4]
+            )
+
+        get_range.assert_called_once_with(TSDBModel.group, [1, 2, 3], None, None, None, [4])
+        assert series == [1368889980, 1368890040]
+        assert values == {
+            1: array("q", [5, 10]),
+            2: array("q", [0, 1]),
+            3: array("q", [0, 0]),
+        }
+
     def test_calculate_expiry(self):
         timestamp = datetime(2013, 5, 18, 15, 13, 58, 132928, tzinfo=pytz.UTC)
         result = self.tsdb.calculate_expiry(10, 30, timestamp)
@@ -1,3 +1,4 @@
+from array import array
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 
@@ -179,6 +180,60 @@ class RedisTSDBTest(TestCase):
         results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1], environment_id=1)
         assert results == {1: 0, 2: 0}
 
+    def test_get_range_series(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        self.db.incr(TSDBModel.group, 1, dts[0])
+        self.db.incr(TSDBModel.group, 65, dts[0], count=2)
+        self.db.incr(TSDBModel.group, "foo", dts[2], count=3)
+
+        series, values = self.db.get_range_series(
+            TSDBModel.group, [1, 65, "foo", 2], dts[0], dts[-1]
+        )
+        assert series == [int(to_timestamp(d)) - int(to_timestamp(d)) % 3600 for d in dts]
+        assert values == {
+            1: array("q", [1, 0, 0, 0]),
+            65: array("q", [2, 0, 0, 0]),
+            "foo": array("q", [0, 0, 3, 0]),
+            2: array("q", [0, 0, 0, 0]),
+        }
+
+    def test_get_sums_cached(self):
+        now = datetime.utcnow().replace(second=30, tzinfo=pytz.UTC)
+        start = now - timedelta(hours=1)
+
+        self.db.incr(TSDBModel.group, 1, now)
+        assert self.db.get_sums(TSDBModel.group, [1, 2], start, now, use_cache=True) == {
+            1: 1,
+            2: 0,
+        }
+
+        self.db.incr(TSDBModel.group, 1, now)
+        # The cache is keyed by the buckets of the range, not by its timestamps.
+        assert self.db.get_sums(
+            TSDBModel.group, [1], start, now + timedelta(seconds=1), use_cache=True
+        ) == {1: 1}
+        assert self.db.get_sums(TSDBModel.group, [1], start, now) == {1: 2}
+        assert self.db.get_sums(
+            TSDBModel.group, [1], start, now, environment_id=1, use_cache=True
+        ) == {1: 0}
+
+        self.db.read_cache.clear()
+        assert self.db.get_sums(TSDBModel.group, [1], start, now, use_cache=True) == {1: 2}
+
+    def test_count_distinct_cached(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+        start = now - timedelta(hours=1)
+        model = TSDBModel.users_affected_by_group
+
+        self.db.record(model, 1, ("foo",), now)
+        assert self.db.get_distinct_counts_totals(model, [1], start, now, use_cache=True) == {1: 1}
+
+        self.db.record(model, 1, ("bar",), now)
+        assert self.db.get_distinct_counts_totals(model, [1], start, now, use_cache=True) == {1: 1}
+        assert self.db.get_distinct_counts_totals(model, [1], start, now) == {1: 2}
+
     def test_count_distinct(self):
         now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
         dts = [now + timedelta(hours=i) for i in range(4)]
@@ -1,8 +1,11 @@
 import datetime
+import decimal
 import uuid
-from enum import Enum
+from collections import OrderedDict, namedtuple
+from enum import Enum, IntEnum
 from unittest import TestCase
 
+import simplejson
 from django.utils.translation import ugettext_lazy as _
 
 from sentry.utils import json
@@ -48,3 +51,64 @@ class JSONTest(TestCase):
 
     def test_translation(self):
         self.assertEqual(json.dumps(_("word")), '"word"')
+
+    def test_bytes(self):
+        assert json.dumps_bytes({"foo": "\u00e9"}) == b'{"foo":"\\u00e9"}'
+        assert json.loads(b'{"foo":"\xc3\xa9"}') == {"foo": "\u00e9"}
+
+    def test_loads_fallback(self):
+        # Rejected by rapidjson, but accepted by simplejson
+        assert json.loads('"\\ud800"') == "\ud800"
+        assert json.loads(b"1e400") == float("inf")
+
+        with self.assertRaises(json.JSONDecodeError):
+            json.loads("{")
+
+
+class RapidJSONEncoderTest(TestCase):
+    Point = namedtuple("Point", "x y")
+
+    class Color(IntEnum):
+        RED = 1
+
+    values = [
+        {"foo": [1, 2.5, None, True, False, 10 ** 30, -0.0, 1e22, 1e-7]},
+        {"text": '<\u00e9\u2028\x00\x1f\x7f\\u00E9"\\/\U0001f600>'},
+        "\ud800",
+        {"nan": float("nan"), "inf": float("-inf"), "decimal": decimal.Decimal("1.10")},
+        {"tuple": (1, (2, 3)), "namedtuple": Point(1, [2])},
+        {"nested": OrderedDict([("b", 1), ("a", {"c": uuid.UUID(int=1)})])},
+        {"date": datetime.datetime(2011, 1, 1, 1, 1, 1), "set": {"foo"}, "enum": Color.RED},
+        {1: "int key", None: "none key"},
+        {"bytes": b"foo"},
+    ]
+
+    def assert_same_output(self, **kwargs):
+        rapidjson_encoder = json.RapidJSONEncoder(**kwargs)
+        simplejson_encoder = simplejson.JSONEncoder(**kwargs)
+        assert rapidjson_encoder._rapidjson_kwargs is not None
+
+        for value in self.values:
+            assert rapidjson_encoder.encode(value) == simplejson_encoder.encode(value)
+
+    def test_default_encoder(self):
+        self.assert_same_output(
+            separators=(",", ":"), ignore_nan=True, default=json.better_default_encoder
+        )
+
+    def test_sort_keys(self):
+        self.values = [v for v in self.values if not (isinstance(v, dict) and None in v)]
+        self.assert_same_output(
+            separators=(",", ":"), sort_keys=True, default=json.better_default_encoder
+        )
+
+    def test_errors(self):
+        encoder = json.RapidJSONEncoder(separators=(",", ":"))
+
+        with self.assertRaises(TypeError):
+            encoder.encode({"date": datetime.datetime(2011, 1, 1)})
+
+        circular = []
+        circular.append(circular)
+        with self.assertRaises(ValueError):
+            encoder.encode(circular)
@@ -125,3 +125,20 @@ def test_multiple_key_operations(properties: Properties) -> None:
     store.delete_many(all_keys)
 
     assert dict(store.get_many(all_keys)) == {}
+
+
+def test_set_many(properties: Properties) -> None:
+    store = properties.store
+
+    items = dict(itertools.islice(properties.items, 10))
+    store.set_many(list(items.items()))
+
+    missing_keys = set(itertools.islice(properties.keys, 5))
+
+    all_keys = list(items.keys() | missing_keys)
+    assert dict(store.get_many(all_keys)) == items
+
+    # Test overwriting existing keys.
+    updated_items = dict(zip(items.keys(), itertools.islice(properties.values, len(items))))
+    store.set_many(list(updated_items.items()))
+    assert dict(store.get_many(all_keys)) == updated_items
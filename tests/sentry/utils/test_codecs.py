@@ -1,4 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+import zstandard
 
 from sentry.utils.codecs import BytesCodec, JSONCodec, ZlibCodec, ZstdCodec
 
@@ -22,3 +25,26 @@ def test_codec_chaining() -> None:
 
     assert codec.encode([1, 2, 3]) == b"[1,2,3]"
     assert codec.decode(b"[1,2,3]") == [1, 2, 3]
+
+
+def test_zstd_dictionary() -> None:
+    samples = [b'{"event_id":"%032x","platform":"python"}' % i for i in range(1000)]
+    codec = ZstdCodec(zstandard.train_dictionary(1024, samples))
+
+    encoded = codec.encode(samples[0])
+    assert len(encoded) < len(ZstdCodec().encode(samples[0]))
+    assert codec.decode(encoded) == samples[0]
+
+
+def test_zstd_reuses_compressors_per_thread() -> None:
+    codec = ZstdCodec()
+    assert codec.decode(codec.encode(b"hello")) == b"hello"
+    compressor = codec._get_compressor()
+    decompressor = codec._get_decompressor()
+    assert codec.decode(codec.encode(b"world")) == b"world"
+    assert codec._get_compressor() is compressor
+    assert codec._get_decompressor() is decompressor
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(codec._get_compressor).result() is not compressor
+        assert executor.submit(codec.encode, b"hello").result() == codec.encode(b"hello")
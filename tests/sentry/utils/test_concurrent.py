@@ -1,5 +1,5 @@
 import _thread
-from concurrent.futures import CancelledError, Future
+from concurrent.futures import CancelledError, Future, TimeoutError
 from contextlib import contextmanager
 from queue import Full
 from threading import Event
@@ -9,6 +9,7 @@ import pytest
 
 from sentry.utils.concurrent import (
     FutureSet,
+    SingleFlight,
     SynchronousExecutor,
     ThreadedExecutor,
     TimedFuture,
@@ -282,3 +283,45 @@ def test_threaded_executor():
     low_priority_waiting.set()  # let the task finish
     assert low_priority_future.result(timeout=1) == 2
     assert low_priority_future.done()
+
+
+def test_single_flight():
+    flight = SingleFlight()
+    started = Event()
+    release = Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "result"
+
+    leader = execute(lambda: flight.do("key", slow))
+    started.wait()
+    follower = execute(lambda: flight.do("key", lambda: calls.append(2) or "other"))
+    assert flight.do("other", lambda: "other") == "other"
+
+    # The follower is blocked on the call in progress.
+    with pytest.raises(TimeoutError):
+        follower.result(timeout=0.1)
+    release.set()
+
+    assert leader.result() == "result"
+    assert follower.result(timeout=1) == "result"
+    assert calls == [1]
+
+    # Results are not retained once the call has completed.
+    assert flight.do("key", lambda: "again") == "again"
+
+
+def test_single_flight_exception():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("Boom!")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+
+    assert flight.do("key", lambda: "result") == "result"
@@ -1,6 +1,6 @@
 import pytest
 
-from sentry.utils.datastructures import BidirectionalMapping
+from sentry.utils.datastructures import BidirectionalMapping, LRUCache
 
 
 def test_bidirectional_mapping():
@@ -30,3 +30,64 @@ def test_bidirectional_mapping():
     del value["c"]
 
     assert len(value) == len(value.inverse()) == 2
+
+
+def test_lru_cache_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.get("a") == 1  # "b" is now least recently used
+
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    cache.delete("a")
+    assert cache.get("a", "default") == "default"
+
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_lru_cache_ttl():
+    now = [100.0]
+    cache = LRUCache(maxsize=10, ttl=5, clock=lambda: now[0])
+    cache.set("a", 1)
+
+    now[0] += 4
+    assert cache.get("a") == 1
+
+    now[0] += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+
+
+def test_lru_cache_getsizeof():
+    cache = LRUCache(maxsize=10, getsizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    assert cache.currsize == 8
+
+    cache.set("a", "xx")
+    assert cache.currsize == 6
+
+    cache.set("c", "xxxxxx")
+    assert cache.get("b") is None
+    assert cache.get("a") == "xx"
+    assert cache.currsize == 8
+
+    # Values larger than the cache are not stored.
+    cache.set("d", "x" * 11)
+    assert cache.get("d") is None
+    assert cache.currsize == 8
+
+    cache.delete("a")
+    assert cache.currsize == 6
@@ -61,3 +61,18 @@ class ForOrganizationMemberTestCase(TestCase):
         assert ratelimits.for_organization_member_invite(
             Organization(id=1), "anything@example.com", user=user, config=RELAXED_CONFIG
         )
+
+    def test_counts_every_limit(self):
+        user = User(email="biz@example.com")
+        organization = Organization(id=1)
+        email = "foo@example.com"
+        config = dict(RELAXED_CONFIG, **{"members:invite-by-user": {"limit": 1, "window": 60}})
+
+        assert not ratelimits.for_organization_member_invite(
+            organization, email, user=user, config=config
+        )
+        # Over the user limit, the invite still counts towards the email limit
+        assert ratelimits.for_organization_member_invite(
+            organization, email, user=user, config=config
+        )
+        assert ratelimits.for_organization_member_invite(organization, email, config=config)
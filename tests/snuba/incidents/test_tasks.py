@@ -21,7 +21,11 @@ from sentry.incidents.models import (
     TriggerStatus,
 )
 from sentry.incidents.tasks import INCIDENTS_SNUBA_SUBSCRIPTION_TYPE
-from sentry.snuba.query_subscription_consumer import QuerySubscriptionConsumer, subscriber_registry
+from sentry.snuba.query_subscription_consumer import (
+    QuerySubscriptionConsumer,
+    batch_subscriber_registry,
+    subscriber_registry,
+)
 from sentry.testutils import TestCase
 from sentry.utils import json
 
@@ -35,12 +39,15 @@ class HandleSnubaQueryUpdateTest(TestCase):
         )
         self.override_settings_cm.__enter__()
         self.orig_registry = deepcopy(subscriber_registry)
+        self.orig_batch_registry = deepcopy(batch_subscriber_registry)
 
     def tearDown(self):
         super().tearDown()
         self.override_settings_cm.__exit__(None, None, None)
         subscriber_registry.clear()
         subscriber_registry.update(self.orig_registry)
+        batch_subscriber_registry.clear()
+        batch_subscriber_registry.update(self.orig_batch_registry)
 
     @fixture
     def subscription(self):
@@ -119,7 +126,7 @@ class HandleSnubaQueryUpdateTest(TestCase):
 
         consumer = QuerySubscriptionConsumer("hi", topic=self.topic)
 
-        original_callback = subscriber_registry[INCIDENTS_SNUBA_SUBSCRIPTION_TYPE]
+        original_callback = batch_subscriber_registry[INCIDENTS_SNUBA_SUBSCRIPTION_TYPE]
 
         def shutdown_callback(*args, **kwargs):
             # We want to just exit after the callback so that we can see the result of
@@ -127,7 +134,7 @@ class HandleSnubaQueryUpdateTest(TestCase):
             original_callback(*args, **kwargs)
             consumer.shutdown()
 
-        subscriber_registry[INCIDENTS_SNUBA_SUBSCRIPTION_TYPE] = shutdown_callback
+        batch_subscriber_registry[INCIDENTS_SNUBA_SUBSCRIPTION_TYPE] = shutdown_callback
 
         with self.feature(["organizations:incidents", "organizations:performance-view"]):
             with self.assertChanges(
@@ -226,3 +226,42 @@ class QuerySubscriptionConsumerTest(TestCase, SnubaTestCase):
         consumer.run()
         # Once on revoke, once on shutdown, and once due to batch timeout
         assert len(commit_offset_mock.call_args_list) == 3
+
+    def test_workers(self):
+        values = [10, 20, 30, 40]
+        for value in values:
+            wrapper = deepcopy(self.valid_wrapper)
+            wrapper["payload"]["result"]["data"] = [{"hello": value}]
+            self.producer.produce(self.topic, json.dumps(wrapper))
+        self.producer.flush()
+
+        consumer = QuerySubscriptionConsumer(
+            "hi", topic=self.topic, commit_batch_size=100, workers=4
+        )
+        seen = []
+
+        def mock_callback(payload, subscription):
+            # Keep the first message busy, later updates of the same
+            # subscription must still wait for it.
+            if not seen:
+                time.sleep(0.1)
+            seen.append(payload["values"]["data"][0]["hello"])
+            if len(seen) >= len(values):
+                consumer.shutdown()
+
+        register_subscriber(self.registration_key)(Mock(side_effect=mock_callback))
+        self.create_subscription()
+
+        committed = []
+        commit_offsets = consumer.commit_offsets
+
+        def mock_commit_offsets(partitions=None):
+            committed.append(dict(consumer.offsets))
+            commit_offsets(partitions)
+
+        consumer.commit_offsets = mock_commit_offsets
+        consumer.run()
+
+        assert seen == values
+        # All messages have been processed before the final commit.
+        assert {0: len(values)} in committed